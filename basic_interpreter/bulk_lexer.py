@@ -0,0 +1,113 @@
+from functools import lru_cache
+from typing import Any
+
+import basic_interpreter.input_tokens as input_tokens
+import basic_interpreter.source_lexer as source_lexer
+
+try:
+    import numpy as np
+except ImportError:  # numpy is only needed for bulk lexing
+    np = None
+
+
+# one entry per byte value, the extra last entry classifies every code point above it
+CLASS_TABLE_SIZE = 257
+
+
+@lru_cache(maxsize=None)
+def get_class_table() -> Any:
+    """
+    Build the lookup table mapping a character code to its character class bitmask
+    """
+    table = np.zeros(CLASS_TABLE_SIZE, dtype=np.uint16)
+
+    for code in range(CLASS_TABLE_SIZE - 1):
+        table[code] = source_lexer.get_character_class(chr(code)).mask
+
+    return table
+
+
+def get_run_ends(in_run: Any) -> Any:
+    """
+    For each position, the position where the run containing it ends, or the position itself when it isn't in a run
+    """
+    positions = np.arange(len(in_run), dtype=np.intp)
+    stops = np.where(in_run, len(in_run), positions)
+    return np.minimum.accumulate(stops[::-1])[::-1]
+
+
+def get_runs(in_run: Any) -> tuple[Any, Any]:
+    """
+    The start and end positions of each run
+    """
+    padded = np.concatenate(([False], in_run, [False]))
+    changes = np.flatnonzero(padded[1:] != padded[:-1])
+    return (changes[0::2], changes[1::2])
+
+
+class BulkLexResult:
+    """
+    Character classes for a whole source, stored as parallel arrays indexed by offset.
+
+    Every array has one more entry than the source, for the end of the stream.
+    """
+
+    def __init__(self, source: input_tokens.Source, classes: Any) -> None:
+        self.source = source
+        self.classes = classes
+
+        is_digit = (classes & source_lexer.DIGIT) != 0
+        is_whitespace = (classes & source_lexer.WHITESPACE) != 0
+
+        (self.digit_run_starts, self.digit_run_stops) = get_runs(is_digit)
+        (self.whitespace_run_starts,
+         self.whitespace_run_stops) = get_runs(is_whitespace)
+        self.digit_run_ends = get_run_ends(is_digit)
+        self.whitespace_run_ends = get_run_ends(is_whitespace)
+
+    def __len__(self) -> int:
+        return len(self.classes)
+
+    def get_digit_run_end(self, offset: int) -> int:
+        return int(self.digit_run_ends[offset])
+
+    def get_whitespace_run_end(self, offset: int) -> int:
+        return int(self.whitespace_run_ends[offset])
+
+    def get_run_end(self, offset: int, mask: int) -> int:
+        """
+        Where the run of digits or whitespace starting at the offset ends
+        """
+        if mask == source_lexer.DIGIT:
+            return int(self.digit_run_ends[offset])
+        elif mask == source_lexer.WHITESPACE:
+            return int(self.whitespace_run_ends[offset])
+        else:
+            raise Exception("Runs are only tracked for digits and whitespace")
+
+    def text(self, start: int, end: int) -> str:
+        if isinstance(self.source, str):
+            return self.source[start:end]
+
+        return bytes(self.source[start:end]).decode()
+
+
+def bulk_lex(source: input_tokens.Source) -> BulkLexResult:
+    """
+    Classify every character of the source with a single table lookup over the whole buffer
+    """
+    if np is None:
+        raise ImportError("bulk lexing requires numpy")
+
+    if isinstance(source, str):
+        codes = np.frombuffer(source.encode("utf-32-le"), dtype=np.uint32)
+        table_indexes = np.minimum(codes, CLASS_TABLE_SIZE - 1)
+    else:
+        codes = np.frombuffer(source, dtype=np.uint8)
+        table_indexes = codes
+
+    classes = np.zeros(len(codes) + 1, dtype=np.uint16)
+    classes[:-1] = get_class_table()[table_indexes]
+
+    # the codes view the source buffer, so they aren't kept past this point
+    return BulkLexResult(source, classes)
@@ -1,3 +1,9 @@
+import mmap
+from typing import Iterable, Iterator, Optional
+
+import basic_interpreter.line_index as line_index
+
+
 class InputToken:
     """
     This is the basic input token that our syntax will process
@@ -20,6 +26,126 @@ class EndOfStream(InputToken):
         super().__init__("", offset)
 
 
+Source = str | bytes | bytearray | memoryview
+
+
+class TokenStream:
+    """
+    A compact stand-in for the list returned by tokenize.
+
+    Only the source buffer is kept; the offset of each token is its position in
+    the buffer, and InputToken views are created on demand when indexed. The
+    stream is one token longer than the source, the last one being EndOfStream.
+    """
+
+    def __init__(self, source: Source) -> None:
+        self.source = source
+        self.is_text = isinstance(source, str)
+        self.line_index: Optional[line_index.LineIndex] = None
+
+    def __len__(self) -> int:
+        return len(self.source) + 1
+
+    def char_at(self, offset: int) -> str:
+        """
+        Get the character at the offset without creating a token, '' at the end of the stream
+        """
+        if offset == len(self.source):
+            return ""
+
+        if self.is_text:
+            return self.source[offset]
+
+        return chr(self.source[offset])
+
+    def text(self, start: int, end: int) -> str:
+        """
+        Decode the characters between the two offsets
+        """
+        if self.is_text:
+            return self.source[start:end]
+
+        # only the slice is copied out of the buffer
+        return bytes(self.source[start:end]).decode()
+
+    def get_line_index(self) -> line_index.LineIndex:
+        """
+        Get the line index of the source, built on first use
+        """
+        if self.line_index is None:
+            self.line_index = line_index.index_source(self.source)
+
+        return self.line_index
+
+    def get_token(self, offset: int) -> InputToken:
+        if offset < 0:
+            offset += len(self)
+
+        if offset == len(self.source):
+            return EndOfStream(offset)
+
+        if offset < 0 or offset > len(self.source):
+            raise IndexError("token index out of range")
+
+        return InputToken(self.char_at(offset), offset)
+
+    def __getitem__(self, index: int | slice) -> InputToken | list[InputToken]:
+        if isinstance(index, slice):
+            return [self.get_token(offset) for offset in range(*index.indices(len(self)))]
+
+        return self.get_token(index)
+
+    def __iter__(self) -> Iterator[InputToken]:
+        for offset in range(len(self)):
+            yield self.get_token(offset)
+
+
+class MappedSource:
+    """
+    The source file mapped into memory and exposed as a read-only buffer, without reading it into a str.
+
+    Use it as a context manager; the buffer is released on exit, so nothing may keep slices of it past that.
+    Offsets into the buffer are byte offsets.
+    """
+
+    def __init__(self, source_name: str) -> None:
+        self.source_name = source_name
+        self.file = None
+        self.map: Optional[mmap.mmap] = None
+        self.buffer = memoryview(b"")
+
+    def open(self) -> memoryview:
+        self.file = open(self.source_name, "rb")
+
+        try:
+            self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # empty files can't be mapped
+            self.map = None
+            self.buffer = memoryview(b"")
+        else:
+            self.buffer = memoryview(self.map)
+
+        return self.buffer
+
+    def close(self) -> None:
+        self.buffer.release()
+
+        if self.map is not None:
+            self.map.close()
+            self.map = None
+
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+    def __enter__(self) -> memoryview:
+        return self.open()
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+
 def tokenize(source: str) -> list[InputToken]:
     """
     Convert the source into a list of input tokens for processing
@@ -27,3 +153,41 @@ def tokenize(source: str) -> list[InputToken]:
     result = [InputToken(c, offset) for offset, c in enumerate(source)]
     result.append(EndOfStream(len(source)))
     return result
+
+
+def tokenize_stream(source: Source) -> TokenStream:
+    """
+    Wrap the source in a token stream without creating a token per character
+    """
+    return TokenStream(source)
+
+
+DEFAULT_CHUNK_SIZE = 1 << 16
+
+
+def read_chunks(source_name: str, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[str]:
+    """
+    Read the source file in chunks of at most chunk_size characters
+    """
+    with open(source_name) as file:
+        while True:
+            chunk = file.read(chunk_size)
+
+            if chunk == "":
+                break
+
+            yield chunk
+
+
+def tokenize_chunks(chunks: Iterable[str]) -> Iterator[InputToken]:
+    """
+    Lazily convert chunks of source into input tokens, ending with EndOfStream
+    """
+    offset = 0
+
+    for chunk in chunks:
+        for c in chunk:
+            yield InputToken(c, offset)
+            offset += 1
+
+    yield EndOfStream(offset)
@@ -0,0 +1,66 @@
+from array import array
+from bisect import bisect_right
+from typing import Any, Iterable
+
+
+class LineIndex:
+    """
+    The sorted offsets where each line starts, so the line and column of an offset is a binary search
+    """
+
+    def __init__(self) -> None:
+        self.line_starts = array('q', [0])
+
+    def add_newline(self, offset: int) -> None:
+        """
+        Record a newline at the offset; newlines must be added in order
+        """
+        self.line_starts.append(offset + 1)
+
+    def get_line_start(self, line_number: int) -> int:
+        return self.line_starts[line_number - 1]
+
+    def get_line_number(self, offset: int) -> int:
+        return bisect_right(self.line_starts, offset)
+
+    def get_column_number(self, offset: int) -> int:
+        return offset - self.line_starts[bisect_right(self.line_starts, offset) - 1] + 1
+
+    def __len__(self) -> int:
+        return len(self.line_starts)
+
+
+def index_source(source: str | bytes | bytearray | memoryview) -> LineIndex:
+    """
+    Index the lines of a source buffer
+    """
+    line_index = LineIndex()
+    newline: str | bytes = '\n' if isinstance(source, str) else b'\n'
+
+    if isinstance(source, memoryview):
+        # a memoryview can't be searched, but the whole bytes or mmap behind it can without copying
+        if hasattr(source.obj, 'find') and len(source.obj) == source.nbytes:
+            source = source.obj
+        else:
+            source = bytes(source)
+
+    offset = source.find(newline)
+
+    while offset != -1:
+        line_index.add_newline(offset)
+        offset = source.find(newline, offset + 1)
+
+    return line_index
+
+
+def index_tokens(tokens: Iterable[Any]) -> LineIndex:
+    """
+    Index the lines of a sequence of input tokens
+    """
+    line_index = LineIndex()
+
+    for token in tokens:
+        if token.c == '\n':
+            line_index.add_newline(token.offset)
+
+    return line_index
@@ -1,5 +1,6 @@
-from typing import Optional, Union
+from typing import Callable, Optional, Union
 from functools import reduce
+import operator
 
 # import input_tokens
 import basic_interpreter.source_lexer as source_lexer
@@ -16,6 +17,55 @@ ParenGroup -> '(' AdditionOrSubtraction ')'
 """
 
 
+Closure = Callable[[], Optional[int | float]]
+
+
+def compile_level(node: 'AdditionOrSubtraction | MultiplicationOrDivision') -> Optional[Closure]:
+    """
+    Compile a level to a closure applying its resolved operators from the left, or None if an operand has
+    no closure
+    """
+    start = node.start.to_closure()
+
+    if len(node.rest) == 0:
+        return start
+
+    steps = [(part.get_operation(), part.right.to_closure())
+             for part in node.rest]
+
+    if start is None or any(right is None for (_, right) in steps):
+        # an operand without a value has to be reported like exec_part does
+        return None
+
+    if len(steps) == 1:
+        ((operation, right),) = steps
+        return lambda: operation(start(), right())
+
+    def run_level() -> Optional[int | float]:
+        value = start()
+
+        for (operation, right) in steps:
+            value = operation(value, right())
+
+        return value
+
+    return run_level
+
+
+def compile_to_closure(node: 'ExecNode') -> Closure:
+    """
+    Turn the AST into nested closures once, so evaluating it again is a call without walking the nodes.
+
+    An AST with a node that may give no value is left to exec, so its errors stay the same.
+    """
+    closure = node.to_closure()
+
+    if closure is None:
+        return node.exec
+
+    return closure
+
+
 class ExecNode:
     def __init__(self) -> None:
         pass
@@ -23,6 +73,13 @@ class ExecNode:
     def exec(self) -> Optional[int | float]:
         return None
 
+    def to_closure(self) -> Optional[Closure]:
+        """
+        A function returning what exec does, with the operators resolved and the wrapper nodes skipped, or
+        None if exec may give None
+        """
+        return None
+
     def __str__(self) -> str:
         return f"exec()"
 
@@ -35,6 +92,9 @@ class Expresion(ExecNode):
     def exec(self) -> Optional[int | float]:
         return self.value.exec()
 
+    def to_closure(self) -> Optional[Closure]:
+        return self.value.to_closure()
+
     def __str__(self) -> str:
         return f"Expresion({self.value})"
 
@@ -60,6 +120,14 @@ class AdditionOrSubtractionPart:
         else:
             raise Exception("right operand returned None")
 
+    def get_operation(self) -> Callable[[int | float, int | float], int | float]:
+        if self.operator.plus:
+            return operator.add
+        elif self.operator.minus:
+            return operator.sub
+        else:
+            raise Exception("Unknown operator type encountered")
+
     def __str__(self) -> str:
         return f"{self.operator}({self.right})"
 
@@ -75,6 +143,9 @@ class AdditionOrSubtraction(ExecNode):
                         self.rest, self.start.exec())
         return result
 
+    def to_closure(self) -> Optional[Closure]:
+        return compile_level(self)
+
     def __str__(self) -> str:
         return f"AdditionOrSubtraction({self.start}{',' if len(self.rest) > 0 else ''}{','.join([str(part) for part in self.rest])})"
 
@@ -102,6 +173,16 @@ class MultiplicationOrDivisionPart:
         else:
             raise Exception("right operand returned None")
 
+    def get_operation(self) -> Callable[[int | float, int | float], int | float]:
+        if self.operator.multiply:
+            return operator.mul
+        elif self.operator.divide:
+            return operator.truediv
+        elif self.operator.percent:
+            return operator.mod
+        else:
+            raise Exception("Unknown operator type encountered")
+
     def __str__(self) -> str:
         return f"{self.operator}({self.right})"
 
@@ -117,6 +198,9 @@ class MultiplicationOrDivision(ExecNode):
                         self.rest, self.start.exec())
         return result
 
+    def to_closure(self) -> Optional[Closure]:
+        return compile_level(self)
+
     def __str__(self) -> str:
         return f"MultiplicationOrDivision({self.start}{',' if len(self.rest) > 0 else ''}{','.join([str(part) for part in self.rest])})"
 
@@ -129,6 +213,9 @@ class Numeric(ExecNode):
     def exec(self) -> Optional[int | float]:
         return self.number_or_paren_group.exec()
 
+    def to_closure(self) -> Optional[Closure]:
+        return self.number_or_paren_group.to_closure()
+
     def __str__(self) -> str:
         return f"Numeric({self.number_or_paren_group})"
 
@@ -141,6 +228,9 @@ class Number(ExecNode):
     def exec(self) -> Optional[int | float]:
         return self.integer_or_float.exec()
 
+    def to_closure(self) -> Optional[Closure]:
+        return self.integer_or_float.to_closure()
+
     def __str__(self) -> str:
         return f"Number({self.integer_or_float})"
 
@@ -153,6 +243,10 @@ class Integer(ExecNode):
     def exec(self) -> Optional[int | float]:
         return self.value
 
+    def to_closure(self) -> Optional[Closure]:
+        value = self.value
+        return lambda: value
+
     def __str__(self) -> str:
         return f"Integer({self.value})"
 
@@ -165,6 +259,10 @@ class Float(ExecNode):
     def exec(self) -> Optional[int | float]:
         return self.value
 
+    def to_closure(self) -> Optional[Closure]:
+        value = self.value
+        return lambda: value
+
     def __str__(self) -> str:
         return f"Float({self.value})"
 
@@ -177,5 +275,8 @@ class ParenGroup(ExecNode):
     def exec(self) -> Optional[int | float]:
         return self.content.exec()
 
+    def to_closure(self) -> Optional[Closure]:
+        return self.content.to_closure()
+
     def __str__(self) -> str:
         return f"({self.content})"
@@ -1,28 +1,395 @@
+import re
+from array import array
+from bisect import bisect_right
+from collections import deque
+from enum import Enum
+from functools import lru_cache
+from typing import Iterable, Iterator, NamedTuple, Optional
+
 import basic_interpreter.input_tokens as input_tokens
+import basic_interpreter.line_index as line_index
+
+
+DIGIT = 1 << 0
+WHITESPACE = 1 << 1
+PLUS = 1 << 2
+MINUS = 1 << 3
+MULTIPLY = 1 << 4
+DIVIDE = 1 << 5
+PERCENT = 1 << 6
+EQUALS = 1 << 7
+LEFT_ANGLE_BRACKET = 1 << 8
+RIGHT_ANGLE_BRACKET = 1 << 9
+DOT = 1 << 10
+OPEN_PAREN = 1 << 11
+CLOSE_PAREN = 1 << 12
+
+# characters that own a bit on their own, so a mask test can replace a comparison
+CHARACTER_BITS: dict[str, int] = {
+    '+': PLUS,
+    '-': MINUS,
+    '*': MULTIPLY,
+    '/': DIVIDE,
+    '%': PERCENT,
+    '=': EQUALS,
+    '<': LEFT_ANGLE_BRACKET,
+    '>': RIGHT_ANGLE_BRACKET,
+    '.': DOT,
+    '(': OPEN_PAREN,
+    ')': CLOSE_PAREN,
+}
+
+
+class CharacterClass(NamedTuple):
+    """
+    The classification of a single character. One record is shared by every token of that character.
+    """
+    c: str
+    mask: int
+
+
+def classify(c: str) -> int:
+    mask = CHARACTER_BITS.get(c, 0)
+
+    if len(c) > 0 and ord('0') <= ord(c) <= ord('9'):
+        mask |= DIGIT
+
+    if c == ' ' or c == '\t' or c == '\r' or c == '\n':
+        mask |= WHITESPACE
+
+    return mask
+
+
+CHARACTER_CLASSES: dict[str, CharacterClass] = {
+    c: CharacterClass(c, classify(c)) for c in [''] + [chr(i) for i in range(128)]}
+
 
+def get_character_class(c: str) -> CharacterClass:
+    character_class = CHARACTER_CLASSES.get(c)
 
-class LexerToken:
+    if character_class is None:
+        character_class = CHARACTER_CLASSES[c] = CharacterClass(
+            c, classify(c))
+
+    return character_class
+
+
+@lru_cache(maxsize=None)
+def get_options_mask(options: tuple[str, ...]) -> Optional[int]:
+    """
+    Combine the bits of the options, or None if one of them doesn't own a bit
+    """
+    mask = 0
+
+    for c in options:
+        if c not in CHARACTER_BITS:
+            return None
+
+        mask |= CHARACTER_BITS[c]
+
+    return mask
+
+
+class CharacterFlags:
+    """
+    The character class flags of a token, read from its mask
+    """
+    __slots__ = ()
+
+    @property
+    def mask(self) -> int:
+        return 0
+
+    @property
+    def digit(self) -> bool:
+        return self.mask & DIGIT != 0
+
+    @property
+    def whitespace(self) -> bool:
+        return self.mask & WHITESPACE != 0
+
+    @property
+    def plus(self) -> bool:
+        return self.mask & PLUS != 0
+
+    @property
+    def minus(self) -> bool:
+        return self.mask & MINUS != 0
+
+    @property
+    def multiply(self) -> bool:
+        return self.mask & MULTIPLY != 0
+
+    @property
+    def divide(self) -> bool:
+        return self.mask & DIVIDE != 0
+
+    @property
+    def percent(self) -> bool:
+        return self.mask & PERCENT != 0
+
+    @property
+    def equals(self) -> bool:
+        return self.mask & EQUALS != 0
+
+    @property
+    def left_angle_bracket(self) -> bool:
+        return self.mask & LEFT_ANGLE_BRACKET != 0
+
+    @property
+    def right_angle_bracket(self) -> bool:
+        return self.mask & RIGHT_ANGLE_BRACKET != 0
+
+
+class LexerToken(CharacterFlags):
     """
     The lexer produces these tokens. They have additional information the parser needs for processing.
     """
+    __slots__ = ('token', 'character_class')
 
     def __init__(self, token: input_tokens.InputToken) -> None:
         self.token = token
-        self.digit = ord('0') <= ord(token.c) <= ord(
-            '9') if len(token.c) > 0 else False
-        self.whitespace = token.c == ' ' or token.c == '\t' or token.c == '\r' or token.c == '\n'
-        self.plus = token.c == '+'
-        self.minus = token.c == '-'
-        self.multiply = token.c == '*'
-        self.divide = token.c == '/'
-        self.percent = token.c == '%'
-        self.equals = token.c == '='
-        self.left_angle_bracket = token.c == '<'
-        self.right_angle_bracket = token.c == '>'
+        self.character_class = get_character_class(token.c)
+
+    @property
+    def mask(self) -> int:
+        return self.character_class.mask
 
     def __str__(self) -> str:
         return f"token({self.token})"
 
 
-def lex(tokens: list[input_tokens.InputToken]) -> list[LexerToken]:
+class LexerTokenStream:
+    """
+    Lexer tokens over a TokenStream, created on demand when indexed instead of being stored
+    """
+
+    def __init__(self, tokens: input_tokens.TokenStream) -> None:
+        self.tokens = tokens
+
+    def __len__(self) -> int:
+        return len(self.tokens)
+
+    def __getitem__(self, index: int | slice) -> LexerToken | list[LexerToken]:
+        if isinstance(index, slice):
+            return [LexerToken(token) for token in self.tokens[index]]
+
+        return LexerToken(self.tokens.get_token(index))
+
+    def __iter__(self) -> Iterator[LexerToken]:
+        for token in self.tokens:
+            yield LexerToken(token)
+
+
+def lex(tokens: list[input_tokens.InputToken] | input_tokens.TokenStream) -> list[LexerToken] | LexerTokenStream:
+    if isinstance(tokens, input_tokens.TokenStream):
+        return LexerTokenStream(tokens)
+
     return [LexerToken(token) for token in tokens]
+
+
+WHITESPACE_RUN_PATTERN = r"[ \t\r\n]+"
+TEXT_WHITESPACE_RUN_REGEX = re.compile(WHITESPACE_RUN_PATTERN)
+BYTES_WHITESPACE_RUN_REGEX = re.compile(WHITESPACE_RUN_PATTERN.encode())
+# shorter runs are skipped by scanning them, which is cheaper than keeping them
+MIN_INDEXED_RUN = 4
+
+
+class WhitespaceRuns:
+    """
+    The whitespace runs of a source, as the offsets each one starts and ends at in order
+    """
+
+    def __init__(self) -> None:
+        self.starts = array('q')
+        self.ends = array('q')
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def get_run_end(self, offset: int) -> Optional[int]:
+        """
+        Where the run the offset is in ends, or None if it isn't in one of the runs kept
+        """
+        run = bisect_right(self.starts, offset) - 1
+
+        if run >= 0 and offset < self.ends[run]:
+            return self.ends[run]
+
+        return None
+
+
+def index_whitespace_runs(source: input_tokens.Source, min_length: int = MIN_INDEXED_RUN) -> WhitespaceRuns:
+    """
+    Find every run of whitespace in the source at least min_length long
+    """
+    runs = WhitespaceRuns()
+    regex = TEXT_WHITESPACE_RUN_REGEX if isinstance(
+        source, str) else BYTES_WHITESPACE_RUN_REGEX
+
+    for match in regex.finditer(source):
+        (start, end) = match.span()
+
+        if end - start < min_length:
+            continue
+
+        runs.starts.append(start)
+        runs.ends.append(end)
+
+    return runs
+
+
+def lex_iter(tokens: Iterable[input_tokens.InputToken]) -> Iterator[LexerToken]:
+    """
+    Lazily lex the input tokens
+    """
+    for token in tokens:
+        yield LexerToken(token)
+
+
+DEFAULT_WINDOW_SIZE = 1 << 16
+
+
+class LookaheadTokens:
+    """
+    Lexer tokens pulled on demand from an iterator, indexable like the list lex returns.
+
+    Only the most recent window_size tokens are kept, so the parser may look ahead as far as it needs
+    but can only backtrack within the window.
+    """
+
+    def __init__(self, tokens: Iterable[LexerToken], window_size: int = DEFAULT_WINDOW_SIZE) -> None:
+        self.tokens = iter(tokens)
+        self.window: deque[LexerToken] = deque()
+        self.window_size = window_size
+        self.start = 0
+        # lines are indexed as tokens are pulled, so positions stay known after tokens leave the window
+        self.line_index = line_index.LineIndex()
+
+    def pull(self) -> bool:
+        token = next(self.tokens, None)
+
+        if token is None:
+            return False
+
+        self.window.append(token)
+
+        if token.token.c == '\n':
+            self.line_index.add_newline(token.token.offset)
+
+        if len(self.window) > self.window_size:
+            self.window.popleft()
+            self.start += 1
+
+        return True
+
+    def get_token(self, index: int) -> LexerToken:
+        if index < self.start:
+            raise IndexError(
+                f"token {index} is no longer in the lookahead window")
+
+        while index >= self.start + len(self.window):
+            if not self.pull():
+                raise IndexError("token index out of range")
+
+        return self.window[index - self.start]
+
+    def __getitem__(self, index: int | slice) -> LexerToken | list[LexerToken]:
+        if isinstance(index, slice):
+            if index.step is not None or index.stop is None:
+                raise IndexError("only bounded slices are supported")
+
+            return [self.get_token(i) for i in range(index.start or 0, index.stop)]
+
+        return self.get_token(index)
+
+
+def lex_stream(tokens: Iterable[input_tokens.InputToken], window_size: int = DEFAULT_WINDOW_SIZE) -> LookaheadTokens:
+    """
+    Lex the tokens lazily, keeping a bounded window for the parser
+    """
+    return LookaheadTokens(lex_iter(tokens), window_size)
+
+
+class TokenKind(Enum):
+    NUMBER = 0
+    OPERATOR = 1
+    OPEN_PAREN = 2
+    CLOSE_PAREN = 3
+    END = 4
+    UNKNOWN = 5
+
+
+# the two character operators share the bit of their first character, like the character level parser sees them
+OPERATOR_MASKS: dict[str, int] = {
+    '+': PLUS,
+    '-': MINUS,
+    '*': MULTIPLY,
+    '/': DIVIDE,
+    '%': PERCENT,
+    '=': EQUALS,
+    '<<': LEFT_ANGLE_BRACKET,
+    '>>': RIGHT_ANGLE_BRACKET,
+    '**': MULTIPLY,
+}
+
+TOKEN_PATTERN = r"""[ \t\r\n]*(?:(?P<NUMBER>[0-9]+(?:\.[0-9]+)?)|(?P<OPERATOR><<|>>|\*\*|[-+*/%=])|(?P<OPEN_PAREN>\()|(?P<CLOSE_PAREN>\))|(?P<UNKNOWN>[^ \t\r\n]))"""
+TEXT_TOKEN_REGEX = re.compile(TOKEN_PATTERN)
+BYTES_TOKEN_REGEX = re.compile(TOKEN_PATTERN.encode())
+
+
+class SourceToken(CharacterFlags):
+    """
+    A token of one or more characters: a number with its value, an operator, a paren, or the end.
+    """
+    __slots__ = ('kind', 'text', 'offset', 'value', 'mask')
+
+    def __init__(self, kind: TokenKind, text: str, offset: int, value: Optional[int | float] = None) -> None:
+        self.kind = kind
+        self.text = text
+        self.offset = offset
+        self.value = value
+        self.mask = OPERATOR_MASKS.get(
+            text, 0) if kind == TokenKind.OPERATOR else get_character_class(text[:1]).mask
+
+    @property
+    def end(self) -> int:
+        return self.offset + len(self.text)
+
+    def __str__(self) -> str:
+        return f"token({self.offset}:{self.text})"
+
+
+def iter_source_tokens(source: input_tokens.Source | input_tokens.TokenStream) -> Iterator[SourceToken]:
+    """
+    Lex the source into multi-character tokens, dropping whitespace, ending with an END token
+    """
+    if isinstance(source, input_tokens.TokenStream):
+        source = source.source
+
+    is_text = isinstance(source, str)
+    regex = TEXT_TOKEN_REGEX if is_text else BYTES_TOKEN_REGEX
+
+    for match in regex.finditer(source):
+        kind_name = match.lastgroup or "UNKNOWN"
+        text = match.group(kind_name)
+
+        if not is_text:
+            text = text.decode()
+
+        kind = TokenKind[kind_name]
+        offset = match.start(kind_name)
+
+        if kind == TokenKind.NUMBER:
+            yield SourceToken(kind, text, offset, float(text) if '.' in text else int(text))
+        else:
+            yield SourceToken(kind, text, offset)
+
+    yield SourceToken(TokenKind.END, "", len(source))
+
+
+def lex_tokens(source: input_tokens.Source | input_tokens.TokenStream) -> list[SourceToken]:
+    """
+    Lex the source into a list of multi-character tokens
+    """
+    return list(iter_source_tokens(source))
@@ -73,6 +73,11 @@ class ParseState:
         return self.get_token().token.c == c
 
     def is_one_of_chars(self, options: list[str]):
+        mask = source_lexer.get_options_mask(tuple(options))
+
+        if mask is not None:
+            return self.get_token().token.c if self.get_token().mask & mask else None
+
         return next((c for c in options if self.is_char(c)), None)
 
     def is_end(self):
@@ -94,13 +99,13 @@ class ParseState:
             return self.get_failure()
 
     def get_digit(self):
-        if self.get_token().digit:
+        if self.get_token().mask & source_lexer.DIGIT:
             return self.get_success()
         else:
             return self.get_failure()
 
     def get_whitespace(self):
-        if self.get_token().whitespace:
+        if self.get_token().mask & source_lexer.WHITESPACE:
             return self.get_success()
         else:
             return self.get_failure()
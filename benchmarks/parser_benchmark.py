@@ -0,0 +1,266 @@
+import contextlib
+import io
+import pickle
+import sys
+import tempfile
+import time
+import timeit
+import tracemalloc
+from typing import Callable
+
+sys.path.insert(0, ".")
+
+import basic_interpreter.input_tokens as input_tokens
+import basic_interpreter.source_lexer as source_lexer
+import interpreter_vm.interpreter_operations as interpreter_operations
+import interpreter_vm.parser_generator as parser_generator
+import interpreter_vm.parser_node as parser_node
+import interpreter_vm.peephole as peephole
+import interpreter_vm.source_parser as source_parser
+import stack_executer.stack_executer as stack_executer
+
+
+def operator_chain(length: int, padding: int = 1) -> str:
+    """
+    A long chain of operators of every precedence level, with padding between the tokens
+    """
+    space = " " * padding
+    operators = ["+", "*", "-", "/", "<<", "%", "**", ">>"]
+    parts = ["= 1"]
+
+    for i in range(length):
+        parts.append(f"{space}{operators[i % len(operators)]}{space}{i % 7 + 1}")
+
+    return "".join(parts)
+
+
+def numeric_literals(count: int, digits: int) -> str:
+    """
+    A sum of large integer and float literals
+    """
+    literals = [str(10 ** (digits - 1) + i) if i % 2 == 0 else f"{i}.{'5' * digits}"
+                for i in range(count)]
+    return "= " + " + ".join(literals)
+
+
+def run(name: str, func: Callable[[], object], number: int):
+    seconds = min(timeit.repeat(func, number=number, repeat=3)) / number
+    print(f"  {name:<24} {seconds * 1000:10.3f} ms")
+
+
+def benchmark_descent(source: str, number: int):
+    lexer_tokens = source_lexer.lex(input_tokens.tokenize_stream(source))
+
+    run("descent", lambda: source_parser.parse(lexer_tokens), number)
+    run("descent, no diagnostics", lambda: source_parser.parse(
+        lexer_tokens, diagnostics=False), number)
+
+
+def benchmark_numbers(source: str, number: int):
+    lexer_tokens = source_lexer.lex(input_tokens.tokenize_stream(source))
+
+    run("descent", lambda: source_parser.parse(lexer_tokens), number)
+    run("descent, list tokens", lambda: source_parser.parse(
+        source_lexer.lex(input_tokens.tokenize(source))), number)
+
+
+# the objects a parse allocates for each step, counted since ones freed right away never move the peak
+COUNTED_CLASSES = [source_parser.ParseState, source_parser.ParseResult]
+
+
+def count_instances(func: Callable[[], object]) -> dict[str, int]:
+    """
+    How many instances of each counted class are created during one call
+    """
+    counts = {cls.__name__: 0 for cls in COUNTED_CLASSES}
+    originals = {cls: cls.__init__ for cls in COUNTED_CLASSES}
+
+    def counting(name: str, init: Callable[..., None]) -> Callable[..., None]:
+        def __init__(self, *args, **kwargs):
+            counts[name] += 1
+            init(self, *args, **kwargs)
+
+        return __init__
+
+    for cls in COUNTED_CLASSES:
+        cls.__init__ = counting(cls.__name__, originals[cls])
+
+    try:
+        func()
+    finally:
+        for cls in COUNTED_CLASSES:
+            cls.__init__ = originals[cls]
+
+    return counts
+
+
+def measure_allocations(name: str, func: Callable[[], object], characters: int):
+    """
+    Report the peak memory traced during one call, how much of it the returned result still holds, and how
+    many parse objects were created
+    """
+    tracemalloc.start()
+    start = tracemalloc.get_traced_memory()[0]
+    result = func()
+    (current, peak) = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print(f"  {name:<24} peak {(peak - start) / characters:8.1f} B/char, "
+          f"result {(current - start) / characters:8.1f} B/char")
+
+    counts = count_instances(func)
+
+    if any(count > 0 for count in counts.values()):
+        print(f"  {'':<24} " + ", ".join(f"{count} {class_name} ({count / characters:.3f}/char)"
+                                         for (class_name, count) in counts.items()))
+
+    return result
+
+
+def benchmark_cursor(source: str, number: int):
+    lexer_tokens = source_lexer.lex(input_tokens.tokenize_stream(source))
+
+    for engine in ["descent", "cursor"]:
+        run(engine, lambda: source_parser.parse(
+            lexer_tokens, engine=engine), number)
+        measure_allocations(engine, lambda: source_parser.parse(
+            lexer_tokens, engine=engine), len(source))
+
+
+def benchmark_engines(source: str, number: int):
+    lexer_tokens = source_lexer.lex(input_tokens.tokenize_stream(source))
+
+    for engine in ["descent", "cursor", "pratt", "tokens"]:
+        run(engine, lambda: source_parser.parse(
+            lexer_tokens, engine=engine), number)
+
+
+def benchmark_direct(source: str, number: int):
+    lexer_tokens = source_lexer.lex(input_tokens.tokenize_stream(source))
+
+    run("pratt + compile_node", lambda: parser_node.compile_node(
+        source_parser.parse(lexer_tokens, engine="pratt").value), number)
+    run("compile_source", lambda: source_parser.compile_source(
+        lexer_tokens), number)
+    measure_allocations("pratt + compile_node", lambda: parser_node.compile_node(
+        source_parser.parse(lexer_tokens, engine="pratt").value), len(source))
+    measure_allocations("compile_source", lambda: source_parser.compile_source(
+        lexer_tokens), len(source))
+
+
+def benchmark_generated(source: str, number: int):
+    lexer_tokens = source_lexer.lex(input_tokens.tokenize_stream(source))
+
+    for engine in ["descent", "cursor", "pratt", "generated"]:
+        run(engine, lambda: source_parser.parse(
+            lexer_tokens, engine=engine), number)
+
+
+def benchmark_arena(source: str, number: int):
+    lexer_tokens = source_lexer.lex(input_tokens.tokenize_stream(source))
+
+    for engine in ["pratt", "arena"]:
+        run(engine, lambda: source_parser.parse(
+            lexer_tokens, engine=engine), number)
+        run(f"{engine} + compile_node", lambda: parser_node.compile_node(
+            source_parser.parse(lexer_tokens, engine=engine).value), number)
+        measure_allocations(engine, lambda: source_parser.parse(
+            lexer_tokens, engine=engine).value, len(source))
+
+
+def execute_quietly(code: list[stack_executer.Operation]):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return stack_executer.execute_code(code)
+
+
+def benchmark_bytecode(source: str, number: int):
+    node = source_parser.parse(source_lexer.lex(
+        input_tokens.tokenize_stream(source))).value
+    code = parser_node.compile_node(node)
+    bytecode = interpreter_operations.encode(code)
+
+    measure_allocations("operation list", lambda: parser_node.compile_node(node), len(source))
+    measure_allocations("bytecode", lambda: interpreter_operations.encode(code), len(source))
+    print(f"  {'pickled operation list':<24} {len(pickle.dumps(code)):10} bytes")
+    print(f"  {'serialized bytecode':<24} {len(bytecode.to_bytes()):10} bytes")
+    run("pickle operation list", lambda: pickle.loads(pickle.dumps(code)), number)
+    run("serialize bytecode", lambda: stack_executer.Bytecode.from_bytes(bytecode.to_bytes()), number)
+
+    # execute_code prints each instruction it runs, into a buffer here
+    run("execute_code", lambda: execute_quietly(code), number)
+    run("execute_bytecode", lambda: stack_executer.execute_bytecode(
+        bytecode, interpreter_operations.HANDLERS), number)
+
+
+def benchmark_peephole(source: str, number: int):
+    code = parser_node.compile_node(source_parser.parse(
+        source_lexer.lex(input_tokens.tokenize_stream(source))).value)
+    optimizer = peephole.PeepholeOptimizer()
+    optimized = optimizer.optimize(code)
+
+    print(f"  {len(code)} instructions, {len(optimized)} after the passes:")
+    print(optimizer.report())
+    run("peephole passes", lambda: peephole.PeepholeOptimizer().optimize(code), number)
+    run("execute_code", lambda: execute_quietly(code), number)
+    run("execute_code, optimized", lambda: execute_quietly(optimized), number)
+
+
+def benchmark_generated_startup():
+    with tempfile.TemporaryDirectory() as cache_dir:
+        start = time.perf_counter()
+        parser_generator.load_parser(cache_dir=cache_dir)
+        print(f"  {'generate and load':<24} {(time.perf_counter() - start) * 1000:10.3f} ms")
+
+        parser_generator.LOADED_PARSERS.clear()
+        start = time.perf_counter()
+        parser_generator.load_parser(cache_dir=cache_dir)
+        print(f"  {'load from the cache':<24} {(time.perf_counter() - start) * 1000:10.3f} ms")
+
+
+def main():
+    for length, padding in [(200, 1), (200, 8), (200, 64), (2000, 4)]:
+        source = operator_chain(length, padding)
+        print(f"operator chain of {length}, padding {padding} ({len(source)} characters):")
+        benchmark_descent(source, 5)
+
+    for count, digits in [(200, 40), (20, 2000)]:
+        source = numeric_literals(count, digits)
+        print(f"{count} numeric literals of {digits} digits ({len(source)} characters):")
+        benchmark_numbers(source, 5)
+
+    for source in [operator_chain(2000, 4), numeric_literals(200, 40), "= " + "(" * 30 + "1" + " )" * 30]:
+        print(f"cursor engine, {len(source)} characters:")
+        benchmark_cursor(source, 5)
+
+    for length, padding in [(200, 1), (2000, 4)]:
+        source = operator_chain(length, padding)
+        print(f"engines, operator chain of {length}, padding {padding} ({len(source)} characters):")
+        benchmark_engines(source, 5)
+
+    for source in [operator_chain(2000, 1), "= " + "(" * 30 + "1 ** 2 + 3" + " )" * 30]:
+        print(f"direct compile, {len(source)} characters:")
+        benchmark_direct(source, 5)
+
+    for source in [operator_chain(20000, 1), numeric_literals(2000, 10)]:
+        print(f"node arena, {len(source)} characters:")
+        benchmark_arena(source, 3)
+
+    for source in ["= 1" + " + 2 * 3 - 4" * 2000, numeric_literals(2000, 10)]:
+        print(f"bytecode, {len(source)} characters:")
+        benchmark_bytecode(source, 3)
+
+    for source in [operator_chain(2000, 1), "= 1" + " + 2 * 3 - 4 << 0" * 1000]:
+        print(f"peephole, {len(source)} characters:")
+        benchmark_peephole(source, 3)
+
+    print("generated parser startup:")
+    benchmark_generated_startup()
+
+    for source in [operator_chain(2000, 1), operator_chain(2000, 4), numeric_literals(200, 40),
+                   "= " + "(" * 30 + "1 ** 2 + 3" + " )" * 30]:
+        print(f"generated parser, {len(source)} characters:")
+        benchmark_generated(source, 5)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+from typing import Any, Optional
+
+import interpreter_vm.interpreter_operations as interpreter_operations
+import interpreter_vm.optimizer as optimizer
+import interpreter_vm.parser_node as parser_node
+import interpreter_vm.pratt_parser as pratt_parser
+from stack_executer.stack_executer import Operation
+
+FAILED = pratt_parser.FAILED
+LEVEL_NODES = (*optimizer.LEVEL_NODES, parser_node.Exponentiation)
+WRAPPER_NODES = (parser_node.Expresion, parser_node.Numeric,
+                 parser_node.Number, parser_node.ParenGroup)
+
+
+def get_key(node: Any) -> tuple:
+    """
+    The structure of the node, its children being compared by identity since they are already interned.
+    Operator offsets aren't part of it, so the first copy's offsets are the ones kept.
+    """
+    if isinstance(node, parser_node.Integer) or isinstance(node, parser_node.Float):
+        return (type(node), node.value)
+    elif isinstance(node, LEVEL_NODES):
+        return (type(node), id(node.start), tuple((part.operator, id(part.right)) for part in node.rest))
+    elif isinstance(node, WRAPPER_NODES):
+        return (type(node), id(optimizer.get_children(node)[0]))
+
+    raise Exception(f"Unknown node {type(node).__name__} encountered while interning")
+
+
+class NodeTable:
+    """
+    Hash-consing of the nodes of a parse: one node for each distinct subtree
+    """
+
+    def __init__(self) -> None:
+        self.nodes: dict[tuple, Any] = {}
+        self.hits = 0
+
+    def __len__(self) -> int:
+        return len(self.nodes)
+
+    def intern(self, node: Any) -> Any:
+        """
+        The node equal to this one already in the table, or this one after adding it
+        """
+        key = get_key(node)
+        existing = self.nodes.get(key)
+
+        if existing is not None:
+            self.hits += 1
+            return existing
+
+        self.nodes[key] = node
+        return node
+
+
+class InterningAccumulator(pratt_parser.LevelAccumulator):
+    def __init__(self, level: pratt_parser.Level, nodes: NodeTable) -> None:
+        super().__init__(level)
+        self.nodes = nodes
+
+    def close(self, operand: Any) -> Any:
+        return self.nodes.intern(super().close(operand))
+
+
+class InterningFrame(pratt_parser.PrattFrame):
+    def __init__(self, nodes: NodeTable) -> None:
+        super().__init__()
+        self.accumulators = [InterningAccumulator(level, nodes)
+                             for level in pratt_parser.LEVELS]
+
+
+class InterningParser(pratt_parser.PrattParser):
+    """
+    The precedence climbing parser, interning each node as it is built so equal subtrees are one object
+    """
+
+    def __init__(self, state: Any, nodes: Optional[NodeTable] = None) -> None:
+        super().__init__(state)
+        self.nodes = nodes if nodes is not None else NodeTable()
+
+    def create_frame(self) -> pratt_parser.PrattFrame:
+        return InterningFrame(self.nodes)
+
+    def get_operand_value(self) -> Any:
+        leaf = self.nodes.intern(self.value.integer_or_float)
+        return self.nodes.intern(parser_node.Numeric(self.nodes.intern(parser_node.Number(leaf))))
+
+    def get_paren_group_value(self, value: Any) -> Any:
+        return self.nodes.intern(parser_node.Numeric(self.nodes.intern(parser_node.ParenGroup(value))))
+
+
+def parse_interned(state: Any, nodes: Optional[NodeTable] = None) -> Optional[tuple[parser_node.Expresion, int]]:
+    """
+    Parse from the state with the nodes interned in the table, giving the AST and the index after it, or
+    None if it isn't a valid expression
+    """
+    parser = InterningParser(state, nodes)
+
+    try:
+        end = parser.parse_expresion(state.index)
+    except (IndexError, RecursionError):
+        return None
+
+    if end == FAILED:
+        return None
+
+    return (parser.value, end)
+
+
+def count_uses(node: Any) -> dict[int, int]:
+    """
+    How many times each node is a child of another, visiting every distinct node once
+    """
+    uses: dict[int, int] = {id(node): 1}
+    stack = [node]
+
+    while len(stack) > 0:
+        for child in optimizer.get_children(stack.pop()):
+            if id(child) in uses:
+                uses[id(child)] += 1
+            else:
+                uses[id(child)] = 1
+                stack.append(child)
+
+    return uses
+
+
+def is_leaf(node: Any) -> bool:
+    """
+    Whether the node's code is a single push, which is no dearer than loading a temporary
+    """
+    while isinstance(node, parser_node.Numeric) or isinstance(node, parser_node.Number) or \
+            (isinstance(node, LEVEL_NODES) and len(node.rest) == 0):
+        node = optimizer.get_children(node)[0]
+
+    return isinstance(node, parser_node.Integer) or isinstance(node, parser_node.Float)
+
+
+def compile_shared(node: parser_node.ExecNode) -> list[Operation]:
+    """
+    Generate the node's opcodes, computing each subtree used more than once a single time.
+
+    The first use keeps the value in a temporary slot and the later uses load it, so the code grows with
+    the distinct subtrees of an interned AST instead of its size when written out. An AST without shared
+    nodes gives the same code as compile_node.
+    """
+    uses = count_uses(node)
+    # the slot of each shared node whose code has been emitted
+    slots: dict[int, int] = {}
+    output: list[Operation] = []
+    stack: list = [node]
+
+    while len(stack) > 0:
+        item = stack.pop()
+
+        if isinstance(item, Operation):
+            output.append(item)
+            continue
+
+        if uses.get(id(item), 0) > 1 and not is_leaf(item):
+            if id(item) in slots:
+                output.append(
+                    interpreter_operations.LoadTemporary(slots[id(item)]))
+                continue
+
+            slots[id(item)] = len(slots)
+            stack.append(interpreter_operations.StoreTemporary(
+                slots[id(item)]))
+
+        steps = item.opcode_steps()
+        steps.reverse()
+        stack.extend(steps)
+
+    return output
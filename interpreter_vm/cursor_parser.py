@@ -0,0 +1,238 @@
+from typing import Any, Optional
+
+import basic_interpreter.source_lexer as source_lexer
+import interpreter_vm.parser_node as parser_node
+
+"""
+Expresion -> \\s* '=' \\s* BitwiseShift $
+BitwiseShift -> AdditionOrSubtraction (\\s* ('<' '<' | '>' '>') \\s* AdditionOrSubtraction)*
+AdditionOrSubtraction -> MultiplicationOrDivision (\\s* ('+' | '-') \\s* MultiplicationOrDivision)*
+MultiplicationOrDivision -> Exponentiation (\\s* ('*' | '/' | '%') \\s* Exponentiation)*
+Exponentiation -> Numeric (\\s* '**' \\s* Numeric)*
+Numeric -> Number | ParenGroup
+Number -> Float | Integer
+ParenGroup -> '(' \\s* BitwiseShift \\s* ')'
+"""
+
+# returned instead of an index when a rule doesn't match
+FAILED = -1
+
+SHIFT_MASK = source_lexer.LEFT_ANGLE_BRACKET | source_lexer.RIGHT_ANGLE_BRACKET
+ADDITION_MASK = source_lexer.PLUS | source_lexer.MINUS
+MULTIPLICATION_MASK = source_lexer.MULTIPLY | source_lexer.DIVIDE | source_lexer.PERCENT
+
+
+class CursorParser:
+    """
+    The character level grammar of source_parser, parsed by moving an integer cursor.
+
+    Each rule takes the index to start at and returns the index after its match, or FAILED.
+    The matched node is left in value, so no state or result objects are created per character;
+    only the AST nodes are allocated.
+    """
+
+    def __init__(self, state: Any) -> None:
+        # the source_parser.ParseState to read characters through
+        self.state = state
+        self.value: Any = None
+
+    def get_operator(self, index: int, mask: int) -> parser_node.Operator:
+        """
+        The operator whose character is at the index, out of the mask's
+        """
+        return parser_node.OPERATORS_BY_BIT[self.state.get_mask_at(index) & mask]
+
+    def parse_expresion(self, index: int) -> int:
+        index = self.state.get_whitespace_run_end(index)
+
+        if not self.state.get_mask_at(index) & source_lexer.EQUALS:
+            return FAILED
+
+        index = self.parse_bitwise_shift(
+            self.state.get_whitespace_run_end(index + 1))
+
+        # like the descent parser, trailing whitespace isn't part of the expression
+        if index == FAILED or not self.state.get_at(index).is_end():
+            return FAILED
+
+        self.value = parser_node.Expresion(self.value)
+        return index
+
+    def parse_bitwise_shift(self, index: int) -> int:
+        index = self.parse_addition_or_subtraction(index)
+
+        if index == FAILED:
+            return FAILED
+
+        start = self.value
+        rest: list[parser_node.BitwiseShiftPart] = []
+
+        while True:
+            operator_index = self.state.get_whitespace_run_end(index)
+            mask = self.state.get_mask_at(operator_index) & SHIFT_MASK
+
+            if not mask or not self.state.get_mask_at(operator_index + 1) & mask:
+                break
+
+            end = self.parse_addition_or_subtraction(
+                self.state.get_whitespace_run_end(operator_index + 2))
+
+            if end == FAILED:
+                break
+
+            rest.append(parser_node.BitwiseShiftPart(
+                self.get_operator(operator_index, SHIFT_MASK), operator_index, self.value))
+            index = end
+
+        self.value = parser_node.BitwiseShift(start, rest)
+        return index
+
+    def parse_addition_or_subtraction(self, index: int) -> int:
+        index = self.parse_multiplication_or_division(index)
+
+        if index == FAILED:
+            return FAILED
+
+        start = self.value
+        rest: list[parser_node.AdditionOrSubtractionPart] = []
+
+        while True:
+            operator_index = self.state.get_whitespace_run_end(index)
+
+            if not self.state.get_mask_at(operator_index) & ADDITION_MASK:
+                break
+
+            end = self.parse_multiplication_or_division(
+                self.state.get_whitespace_run_end(operator_index + 1))
+
+            if end == FAILED:
+                break
+
+            rest.append(parser_node.AdditionOrSubtractionPart(
+                self.get_operator(operator_index, ADDITION_MASK), operator_index, self.value))
+            index = end
+
+        self.value = parser_node.AdditionOrSubtraction(start, rest)
+        return index
+
+    def parse_multiplication_or_division(self, index: int) -> int:
+        index = self.parse_exponentiation(index)
+
+        if index == FAILED:
+            return FAILED
+
+        start = self.value
+        rest: list[parser_node.MultiplicationOrDivisionPart] = []
+
+        while True:
+            operator_index = self.state.get_whitespace_run_end(index)
+
+            if not self.state.get_mask_at(operator_index) & MULTIPLICATION_MASK:
+                break
+
+            end = self.parse_exponentiation(
+                self.state.get_whitespace_run_end(operator_index + 1))
+
+            if end == FAILED:
+                break
+
+            rest.append(parser_node.MultiplicationOrDivisionPart(
+                self.get_operator(operator_index, MULTIPLICATION_MASK), operator_index, self.value))
+            index = end
+
+        self.value = parser_node.MultiplicationOrDivision(start, rest)
+        return index
+
+    def parse_exponentiation(self, index: int) -> int:
+        index = self.parse_numeric(index)
+
+        if index == FAILED:
+            return FAILED
+
+        start = self.value
+        rest: list[parser_node.ExponentiationPart] = []
+
+        while True:
+            operator_index = self.state.get_whitespace_run_end(index)
+
+            if not (self.state.get_mask_at(operator_index) & source_lexer.MULTIPLY and
+                    self.state.get_mask_at(operator_index + 1) & source_lexer.MULTIPLY):
+                break
+
+            end = self.parse_numeric(
+                self.state.get_whitespace_run_end(operator_index + 2))
+
+            if end == FAILED:
+                break
+
+            rest.append(parser_node.ExponentiationPart(
+                self.get_operator(operator_index, source_lexer.MULTIPLY), operator_index, self.value))
+            index = end
+
+        self.value = parser_node.Exponentiation(start, rest)
+        return index
+
+    def parse_numeric(self, index: int) -> int:
+        end = self.parse_number(index)
+
+        if end == FAILED:
+            end = self.parse_paren_group(index)
+
+            if end == FAILED:
+                return FAILED
+
+        self.value = parser_node.Numeric(self.value)
+        return end
+
+    def parse_number(self, index: int) -> int:
+        integer_end = self.state.get_digit_run_end(index)
+
+        if integer_end == index:
+            return FAILED
+
+        if self.state.get_mask_at(integer_end) & source_lexer.DOT:
+            fraction_end = self.state.get_digit_run_end(integer_end + 1)
+
+            if fraction_end > integer_end + 1:
+                self.value = parser_node.Number(parser_node.Float(
+                    float(self.state.get_text(fraction_end, index))))
+                return fraction_end
+
+        self.value = parser_node.Number(parser_node.Integer(
+            int(self.state.get_text(integer_end, index))))
+        return integer_end
+
+    def parse_paren_group(self, index: int) -> int:
+        if not self.state.get_mask_at(index) & source_lexer.OPEN_PAREN:
+            return FAILED
+
+        index = self.parse_bitwise_shift(
+            self.state.get_whitespace_run_end(index + 1))
+
+        if index == FAILED:
+            return FAILED
+
+        index = self.state.get_whitespace_run_end(index)
+
+        if not self.state.get_mask_at(index) & source_lexer.CLOSE_PAREN:
+            return FAILED
+
+        self.value = parser_node.ParenGroup(self.value)
+        return index + 1
+
+
+def parse_cursor(state: Any) -> Optional[tuple[parser_node.Expresion, int]]:
+    """
+    Parse from the state with a cursor, giving the AST and the index after it, or None if it isn't a valid expression
+    """
+    parser = CursorParser(state)
+
+    try:
+        end = parser.parse_expresion(state.index)
+    except (IndexError, RecursionError):
+        return None
+
+    if end == FAILED:
+        return None
+
+    return (parser.value, end)
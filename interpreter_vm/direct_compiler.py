@@ -0,0 +1,226 @@
+from typing import Any, Optional
+
+import basic_interpreter.source_lexer as source_lexer
+import interpreter_vm.interpreter_operations as interpreter_operations
+import interpreter_vm.pratt_parser as pratt_parser
+from stack_executer.stack_executer import Operation
+
+FAILED = pratt_parser.FAILED
+LEVELS = pratt_parser.LEVELS
+# the exponentiation level, which emits its start operand last
+EXPONENTIATION = len(LEVELS) - 1
+
+# the operation for each operator character's bit, '**' being Multiply like ExponentiationPart makes it
+OPERATIONS: dict[int, type] = {
+    source_lexer.LEFT_ANGLE_BRACKET: interpreter_operations.LeftShift,
+    source_lexer.RIGHT_ANGLE_BRACKET: interpreter_operations.RightShift,
+    source_lexer.PLUS: interpreter_operations.Add,
+    source_lexer.MINUS: interpreter_operations.Subtract,
+    source_lexer.MULTIPLY: interpreter_operations.Multiply,
+    source_lexer.DIVIDE: interpreter_operations.Divide,
+    source_lexer.PERCENT: interpreter_operations.Modulus,
+}
+
+
+class CodeFrame:
+    """
+    An expression being compiled, the whole input's or a paren group's.
+
+    Each level's operation is emitted once the operand after its operator is complete, which gives the same
+    order as compile_node. An exponentiation's start operand is cut out of the code at its first '**' and
+    added back with the last Multiply when the exponentiation ends.
+    """
+
+    def __init__(self) -> None:
+        self.pending: list[Optional[type]] = [None] * len(LEVELS)
+        self.exponent_start: Optional[list[Operation]] = None
+        self.exponent_operands = 0
+        # where the code of the operand being parsed starts
+        self.operand_code_start = 0
+        self.has_operand = False
+        self.end = FAILED
+        # the operator waiting for its right operand
+        self.level_index: Optional[int] = None
+        self.operation: Optional[type] = None
+        self.operator_code_length = 0
+        self.cut_exponent_start = False
+
+    def close_level(self, level_index: int, output: list[Operation]):
+        if level_index == EXPONENTIATION:
+            if self.exponent_start is not None:
+                output.extend(self.exponent_start)
+                output.append(interpreter_operations.Multiply())
+                self.exponent_start = None
+                self.exponent_operands = 0
+        else:
+            operation = self.pending[level_index]
+
+            if operation is not None:
+                output.append(operation())
+                self.pending[level_index] = None
+
+    def start_operator(self, level_index: int, operation: type, output: list[Operation]):
+        # the levels that bind tighter than the operator are complete
+        for closed_index in range(len(LEVELS) - 1, level_index, -1):
+            self.close_level(closed_index, output)
+
+        self.cut_exponent_start = False
+
+        if level_index == EXPONENTIATION:
+            if self.exponent_start is None:
+                self.exponent_start = output[self.operand_code_start:]
+                del output[self.operand_code_start:]
+                self.cut_exponent_start = True
+        else:
+            self.close_level(level_index, output)
+
+        self.level_index = level_index
+        self.operation = operation
+        self.operator_code_length = len(output)
+
+    def add_operand(self, end: int, output: list[Operation]):
+        if self.level_index == EXPONENTIATION:
+            self.exponent_operands += 1
+
+            if self.exponent_operands > 1:
+                output.append(interpreter_operations.Multiply())
+        elif self.level_index is not None:
+            self.pending[self.level_index] = self.operation
+
+        self.level_index = None
+        self.has_operand = True
+        self.end = end
+
+    def abandon_operator(self, output: list[Operation]):
+        """
+        Drop the code of an operand that failed to parse and undo its operator
+        """
+        del output[self.operator_code_length:]
+
+        if self.cut_exponent_start and self.exponent_start is not None:
+            output.extend(self.exponent_start)
+            self.exponent_start = None
+
+        self.level_index = None
+
+    def close(self, output: list[Operation]):
+        for level_index in range(len(LEVELS) - 1, -1, -1):
+            self.close_level(level_index, output)
+
+
+class DirectCompiler(pratt_parser.PrattParser):
+    """
+    The precedence climbing parser, emitting opcodes as it parses instead of building the AST.
+
+    The code is the same as compile_node gives for the AST the other engines build.
+    """
+
+    def __init__(self, state: Any) -> None:
+        super().__init__(state)
+        self.output: list[Operation] = []
+
+    def parse_expresion(self, index: int) -> int:
+        index = self.state.get_whitespace_run_end(index)
+
+        if not self.state.get_mask_at(index) & source_lexer.EQUALS:
+            return FAILED
+
+        index = self.parse_bitwise_shift(
+            self.state.get_whitespace_run_end(index + 1))
+
+        # like the descent parser, trailing whitespace isn't part of the expression
+        if index == FAILED or not self.state.get_at(index).is_end():
+            return FAILED
+
+        self.output.append(interpreter_operations.Return())
+        return index
+
+    def parse_number(self, index: int) -> int:
+        integer_end = self.state.get_digit_run_end(index)
+
+        if integer_end == index:
+            return FAILED
+
+        if self.state.get_mask_at(integer_end) & source_lexer.DOT:
+            fraction_end = self.state.get_digit_run_end(integer_end + 1)
+
+            if fraction_end > integer_end + 1:
+                self.output.append(interpreter_operations.Float(
+                    float(self.state.get_text(fraction_end, index))))
+                return fraction_end
+
+        self.output.append(interpreter_operations.Integer(
+            int(self.state.get_text(integer_end, index))))
+        return integer_end
+
+    def parse_bitwise_shift(self, index: int) -> int:
+        output = self.output
+        parents: list[CodeFrame] = []
+        frame = CodeFrame()
+
+        while True:
+            # open a frame for each paren in front of the next operand
+            while self.state.get_mask_at(index) & source_lexer.OPEN_PAREN:
+                frame.operand_code_start = len(output)
+                parents.append(frame)
+                frame = CodeFrame()
+                index = self.state.get_whitespace_run_end(index + 1)
+
+            frame.operand_code_start = len(output)
+            end = self.parse_number(index)
+
+            while True:
+                if end != FAILED:
+                    frame.add_operand(end, output)
+                    operator_index = self.state.get_whitespace_run_end(end)
+                    level_index = self.get_operator_level(operator_index)
+
+                    if level_index is not None:
+                        frame.start_operator(level_index, OPERATIONS[self.state.get_mask_at(
+                            operator_index) & LEVELS[level_index].mask], output)
+                        index = self.state.get_whitespace_run_end(
+                            operator_index + LEVELS[level_index].width)
+                        break
+                elif not frame.has_operand:
+                    # without a first operand the frame's expression fails, and so does the operand it is part of
+                    if len(parents) == 0:
+                        return FAILED
+
+                    frame = parents.pop()
+                    continue
+                else:
+                    # like the descent parser, an operator without an operand ends the expression before it
+                    frame.abandon_operator(output)
+
+                frame.close(output)
+                end = frame.end
+
+                if len(parents) == 0:
+                    return end
+
+                close_index = self.state.get_whitespace_run_end(end)
+
+                if self.state.get_mask_at(close_index) & source_lexer.CLOSE_PAREN:
+                    end = close_index + 1
+                else:
+                    end = FAILED
+
+                frame = parents.pop()
+
+
+def compile_direct(state: Any) -> Optional[tuple[list[Operation], int]]:
+    """
+    Compile the expression from the state, giving its code and the index after it, or None if it isn't
+    a valid expression
+    """
+    compiler = DirectCompiler(state)
+
+    try:
+        end = compiler.parse_expresion(state.index)
+    except (IndexError, RecursionError):
+        return None
+
+    if end == FAILED:
+        return None
+
+    return (compiler.output, end)
@@ -1,3 +1,7 @@
+import operator
+from array import array
+from typing import Any, Callable
+
 from stack_executer.stack_executer import *
 
 
@@ -178,6 +182,51 @@ class Float(Operation):
         return f"Float {self.value}"
 
 
+class StoreTemporary(Operation):
+    """
+    Keep the value on top of the stack in a temporary slot, leaving it on the stack
+    """
+
+    def __init__(self, slot: int) -> None:
+        super().__init__()
+        self.slot = slot
+
+    def eval(self, state: State) -> None:
+        if state.callStack is None:
+            raise Exception("The code is not running")
+
+        if len(state.resultStack) == 0:
+            raise Exception("Stack index underflow")
+
+        temporaries = state.callStack.temporaries
+
+        while len(temporaries) <= self.slot:
+            temporaries.append(None)
+
+        temporaries[self.slot] = state.resultStack[-1]
+
+    def __str__(self) -> str:
+        return f"StoreTemporary {self.slot}"
+
+
+class LoadTemporary(Operation):
+    def __init__(self, slot: int) -> None:
+        super().__init__()
+        self.slot = slot
+
+    def eval(self, state: State) -> None:
+        if state.callStack is None:
+            raise Exception("The code is not running")
+
+        if self.slot >= len(state.callStack.temporaries):
+            raise Exception(f"Temporary {self.slot} is not set")
+
+        state.push_result(state.callStack.temporaries[self.slot])
+
+    def __str__(self) -> str:
+        return f"LoadTemporary {self.slot}"
+
+
 class Return(Operation):
     def __init__(self) -> None:
         super().__init__()
@@ -202,3 +251,186 @@ class Return(Operation):
 def code_to_string(code: list[Operation]):
     index_width = len(str(len(code)))
     return "\n".join([f"  {str(i).rjust(index_width, " ")}: {step}" for i, step in enumerate(code)])
+
+
+# opcodes of the bytecode form, after the ones the dispatch loop handles itself
+PUSH = 2
+ADD = 3
+SUBTRACT = 4
+MULTIPLY = 5
+DIVIDE = 6
+MODULUS = 7
+LEFT_SHIFT = 8
+RIGHT_SHIFT = 9
+STORE_TEMPORARY = 10
+LOAD_TEMPORARY = 11
+
+OPCODES: dict[type, int] = {
+    Return: RETURN,
+    Add: ADD,
+    Subtract: SUBTRACT,
+    Multiply: MULTIPLY,
+    Divide: DIVIDE,
+    Modulus: MODULUS,
+    LeftShift: LEFT_SHIFT,
+    RightShift: RIGHT_SHIFT,
+}
+OPERATIONS: dict[int, type] = {opcode: operation_type for (
+    operation_type, opcode) in OPCODES.items()}
+MAX_WORD = 0xFFFF
+
+
+def number_handler(name: str, function: Callable[[Any, Any], Any]) -> Handler:
+    def handler(stack: list[Any], constants: list[Any], temporaries: list[Any], operand: int) -> None:
+        right_value = stack.pop()
+
+        if not isinstance(right_value, int) and not isinstance(right_value, float):
+            raise Exception(f"Expected right operand of {name} to be a Number")
+
+        left_value = stack.pop()
+
+        if not isinstance(left_value, int) and not isinstance(left_value, float):
+            raise Exception(f"Expected left operand of {name} to be a Number")
+
+        stack.append(function(left_value, right_value))
+
+    return handler
+
+
+def integer_handler(name: str, function: Callable[[int, int], int]) -> Handler:
+    def handler(stack: list[Any], constants: list[Any], temporaries: list[Any], operand: int) -> None:
+        right_value = stack.pop()
+
+        if not isinstance(right_value, int):
+            raise Exception(
+                f"Expected right operand of {name} to be an Integer")
+
+        left_value = stack.pop()
+
+        if not isinstance(left_value, int):
+            raise Exception(
+                f"Expected left operand of {name} to be an Integer")
+
+        stack.append(function(left_value, right_value))
+
+    return handler
+
+
+def push_handler(stack: list[Any], constants: list[Any], temporaries: list[Any], operand: int) -> None:
+    stack.append(constants[operand])
+
+
+def store_temporary_handler(stack: list[Any], constants: list[Any], temporaries: list[Any], operand: int) -> None:
+    if len(stack) == 0:
+        raise Exception("Stack index underflow")
+
+    while len(temporaries) <= operand:
+        temporaries.append(None)
+
+    temporaries[operand] = stack[-1]
+
+
+def load_temporary_handler(stack: list[Any], constants: list[Any], temporaries: list[Any], operand: int) -> None:
+    if operand >= len(temporaries):
+        raise Exception(f"Temporary {operand} is not set")
+
+    stack.append(temporaries[operand])
+
+
+def reserved_handler(stack: list[Any], constants: list[Any], temporaries: list[Any], operand: int) -> None:
+    raise Exception("The dispatch loop handles this opcode itself")
+
+
+# indexed by opcode
+HANDLERS: list[Handler] = [
+    reserved_handler,
+    reserved_handler,
+    push_handler,
+    number_handler("Add", operator.add),
+    number_handler("Subtract", operator.sub),
+    number_handler("Multiply", operator.mul),
+    number_handler("Divide", operator.truediv),
+    number_handler("Modulus", operator.mod),
+    integer_handler("LeftShift", operator.lshift),
+    integer_handler("RightShift", operator.rshift),
+    store_temporary_handler,
+    load_temporary_handler,
+]
+
+
+def emit(codes: array, opcode: int, operand: int):
+    if operand > MAX_WORD:
+        emit(codes, EXTENDED_ARG, operand >> 16)
+
+    codes.append(opcode)
+    codes.append(operand & MAX_WORD)
+
+
+def get_constant_key(value: int | float) -> tuple:
+    # 0.0 and -0.0 are equal but aren't the same constant, and neither are 1 and 1.0
+    if isinstance(value, float):
+        return (float, value.hex())
+
+    return (type(value), value)
+
+
+def encode(code: list[Operation]) -> Bytecode:
+    """
+    The bytecode form of the code, for execute_bytecode to run with HANDLERS
+    """
+    bytecode = Bytecode()
+    # the index in the constant pool of each value
+    pool: dict[tuple, int] = {}
+
+    for operation in code:
+        if isinstance(operation, Integer) or isinstance(operation, Float):
+            key = get_constant_key(operation.value)
+            index = pool.get(key)
+
+            if index is None:
+                index = len(bytecode.constants)
+                pool[key] = index
+                bytecode.constants.append(operation.value)
+
+            emit(bytecode.codes, PUSH, index)
+        elif isinstance(operation, StoreTemporary):
+            emit(bytecode.codes, STORE_TEMPORARY, operation.slot)
+        elif isinstance(operation, LoadTemporary):
+            emit(bytecode.codes, LOAD_TEMPORARY, operation.slot)
+        elif type(operation) in OPCODES:
+            emit(bytecode.codes, OPCODES[type(operation)], 0)
+        else:
+            raise Exception(f"Unable to encode {operation}")
+
+    return bytecode
+
+
+def decode(bytecode: Bytecode) -> list[Operation]:
+    """
+    The operations the bytecode was encoded from
+    """
+    code: list[Operation] = []
+    codes = bytecode.codes
+    extended = 0
+
+    for index in range(0, len(codes), 2):
+        opcode = codes[index]
+        operand = extended | codes[index + 1]
+        extended = 0
+
+        if opcode == EXTENDED_ARG:
+            extended = operand << 16
+        elif opcode == PUSH:
+            value = bytecode.constants[operand]
+            code.append(Float(value) if isinstance(
+                value, float) else Integer(value))
+        elif opcode == STORE_TEMPORARY:
+            code.append(StoreTemporary(operand))
+        elif opcode == LOAD_TEMPORARY:
+            code.append(LoadTemporary(operand))
+        elif opcode in OPERATIONS:
+            code.append(OPERATIONS[opcode]())
+        else:
+            raise Exception(f"Unknown opcode {opcode} in the bytecode")
+
+    return code
@@ -0,0 +1,173 @@
+import ast
+from collections import OrderedDict
+from types import CodeType
+from typing import Any
+
+import interpreter_vm.interpreter_operations as interpreter_operations
+import interpreter_vm.parser_node as parser_node
+from stack_executer.stack_executer import Operation
+
+DEFAULT_CACHE_SIZE = 1 << 10
+# deeper expressions are split up, since the compiler recurses through the tree
+MAX_NATIVE_DEPTH = 100
+
+# the operations Python's own operators compute the same way, the operands always being numbers
+BINARY_OPERATORS: dict[type, type] = {
+    interpreter_operations.Add: ast.Add,
+    interpreter_operations.Subtract: ast.Sub,
+    interpreter_operations.Multiply: ast.Mult,
+    interpreter_operations.Divide: ast.Div,
+    interpreter_operations.Modulus: ast.Mod,
+}
+
+
+def left_shift(left: Any, right: Any) -> int:
+    if not isinstance(right, int):
+        raise Exception(
+            "Expected right operand of LeftShift to be an Integer")
+
+    if not isinstance(left, int):
+        raise Exception(
+            "Expected left operand of LeftShift to be an Integer")
+
+    return left << right
+
+
+def right_shift(left: Any, right: Any) -> int:
+    if not isinstance(right, int):
+        raise Exception(
+            "Expected right operand of RightShift to be an Integer")
+
+    if not isinstance(left, int):
+        raise Exception(
+            "Expected left operand of RightShift to be an Integer")
+
+    return left >> right
+
+
+# the shifts are calls, since Python's shifts raise TypeError where the VM raises its own errors
+SHIFT_FUNCTIONS: dict[type, str] = {
+    interpreter_operations.LeftShift: "left_shift",
+    interpreter_operations.RightShift: "right_shift",
+}
+NATIVE_GLOBALS: dict[str, Any] = {
+    "__builtins__": {},
+    "left_shift": left_shift,
+    "right_shift": right_shift,
+}
+
+
+def spill(stack: list[tuple[ast.expr, int]], spills: list[ast.expr]):
+    """
+    Move the expressions on the stack into named values computed ahead of the rest, oldest first so they
+    are computed in the same order
+    """
+    for (index, (expression, depth)) in enumerate(stack):
+        if depth > 1:
+            name = f"s{len(spills)}"
+            spills.append(ast.NamedExpr(
+                ast.Name(name, ast.Store()), expression))
+            stack[index] = (ast.Name(name, ast.Load()), 1)
+
+
+def lower_code(code: list[Operation]) -> ast.Expression:
+    """
+    Rebuild the expression the VM code computes as a Python expression, in the same order of evaluation.
+
+    Subexpressions nested deeper than MAX_NATIVE_DEPTH are assigned to names in a tuple whose last item is
+    the result, keeping every part shallow.
+    """
+    # each expression with its depth
+    stack: list[tuple[ast.expr, int]] = []
+    spills: list[ast.expr] = []
+
+    for operation in code:
+        if isinstance(operation, interpreter_operations.Integer) or isinstance(operation, interpreter_operations.Float):
+            stack.append((ast.Constant(operation.value), 1))
+        elif isinstance(operation, interpreter_operations.LoadTemporary):
+            stack.append((ast.Name(f"t{operation.slot}", ast.Load()), 1))
+        elif isinstance(operation, interpreter_operations.StoreTemporary):
+            (expression, depth) = stack.pop()
+            stack.append((ast.NamedExpr(
+                ast.Name(f"t{operation.slot}", ast.Store()), expression), depth + 1))
+        elif isinstance(operation, interpreter_operations.Return):
+            break
+        elif type(operation) in BINARY_OPERATORS or type(operation) in SHIFT_FUNCTIONS:
+            if len(stack) < 2:
+                raise Exception("Stack index underflow")
+
+            (right, right_depth) = stack.pop()
+            (left, left_depth) = stack.pop()
+
+            if type(operation) in SHIFT_FUNCTIONS:
+                expression = ast.Call(ast.Name(
+                    SHIFT_FUNCTIONS[type(operation)], ast.Load()), [left, right], [])
+            else:
+                expression = ast.BinOp(
+                    left, BINARY_OPERATORS[type(operation)](), right)
+
+            stack.append((expression, max(left_depth, right_depth) + 1))
+        else:
+            raise Exception(
+                f"Unable to compile {operation} to a native expression")
+
+        if stack[-1][1] > MAX_NATIVE_DEPTH:
+            spill(stack, spills)
+
+    if len(stack) != 1:
+        raise Exception("Expected the code to leave one result")
+
+    body = stack[0][0]
+
+    if len(spills) > 0:
+        body = ast.Subscript(ast.Tuple(
+            [*spills, body], ast.Load()), ast.Constant(-1), ast.Load())
+
+    return ast.fix_missing_locations(ast.Expression(body))
+
+
+class NativeCache:
+    """
+    Compiled code objects by the expression they were compiled from, evicting the least recently used
+    """
+
+    def __init__(self, max_size: int = DEFAULT_CACHE_SIZE) -> None:
+        self.max_size = max_size
+        self.code: OrderedDict[str, CodeType] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def compile(self, expression: ast.Expression) -> CodeType:
+        key = ast.dump(expression)
+        code = self.code.get(key)
+
+        if code is not None:
+            self.hits += 1
+            self.code.move_to_end(key)
+            return code
+
+        self.misses += 1
+        code = compile(expression, "<expression>", "eval")
+        self.code[key] = code
+
+        if len(self.code) > self.max_size:
+            self.code.popitem(last=False)
+
+        return code
+
+
+DEFAULT_CACHE = NativeCache()
+
+
+def compile_native(node: parser_node.ExecNode, cache: NativeCache = DEFAULT_CACHE) -> CodeType:
+    """
+    Compile the AST, or anything compile_node takes, to a CPython code object computing what the VM would.
+
+    Run it with run_native. An operation the VM would stop on raises the same exception instead.
+    """
+    return cache.compile(lower_code(parser_node.compile_node(node)))
+
+
+def run_native(code: CodeType) -> int | float:
+    # the temporaries and spills go in locals of their own, so runs don't share or keep them
+    return eval(code, NATIVE_GLOBALS, {})
@@ -0,0 +1,291 @@
+from array import array
+from enum import IntEnum
+from typing import Any, Iterator, Optional
+
+import basic_interpreter.source_lexer as source_lexer
+import interpreter_vm.interpreter_operations as interpreter_operations
+import interpreter_vm.parser_node as parser_node
+import interpreter_vm.pratt_parser as pratt_parser
+from stack_executer.stack_executer import Operation
+
+FAILED = pratt_parser.FAILED
+LEVELS = pratt_parser.LEVELS
+# the index of a missing node
+NO_NODE = -1
+# the integers a values column can hold, bigger ones go to the constants
+INTEGER_LIMIT = 1 << 63
+
+
+class NodeKind(IntEnum):
+    INTEGER = 0
+    # a float or an integer too big for the values column, its value is an index into constants
+    CONSTANT = 1
+    BINARY = 2
+    EXPRESSION = 3
+
+
+# the operators by their code in the operators column
+OPERATORS: tuple[parser_node.Operator, ...] = tuple(parser_node.Operator)
+OPERATOR_CODES: dict[parser_node.Operator, int] = {
+    operator: code for (code, operator) in enumerate(OPERATORS)}
+OPERATIONS: tuple[type, ...] = tuple({
+    parser_node.Operator.LEFT_ANGLE_BRACKET: interpreter_operations.LeftShift,
+    parser_node.Operator.RIGHT_ANGLE_BRACKET: interpreter_operations.RightShift,
+    parser_node.Operator.PLUS: interpreter_operations.Add,
+    parser_node.Operator.MINUS: interpreter_operations.Subtract,
+    parser_node.Operator.MULTIPLY: interpreter_operations.Multiply,
+    parser_node.Operator.DIVIDE: interpreter_operations.Divide,
+    parser_node.Operator.PERCENT: interpreter_operations.Modulus,
+}[operator] for operator in OPERATORS)
+
+
+class NodeArena:
+    """
+    An AST kept as parallel array columns, a node being an index into them.
+
+    Every operator is a binary node folding its level to the left, so the levels, numerics and paren groups
+    of parser_node have no nodes of their own. An exponentiation is folded from its first right operand
+    with its start last, which is the order ExponentiationPart emits them in. A node's children are added
+    before it, but walk is what gives the order the opcodes are emitted in.
+    """
+
+    def __init__(self) -> None:
+        self.kinds = array('B')
+        self.operators = array('B')
+        self.lefts = array('q')
+        self.rights = array('q')
+        self.values = array('q')
+        self.constants: list[Any] = []
+        self.root = NO_NODE
+
+    def __len__(self) -> int:
+        return len(self.kinds)
+
+    def add_node(self, kind: NodeKind, operator: int, left: int, right: int, value: int) -> int:
+        self.kinds.append(kind)
+        self.operators.append(operator)
+        self.lefts.append(left)
+        self.rights.append(right)
+        self.values.append(value)
+        return len(self.kinds) - 1
+
+    def add_integer(self, value: int) -> int:
+        if -INTEGER_LIMIT <= value < INTEGER_LIMIT:
+            return self.add_node(NodeKind.INTEGER, 0, NO_NODE, NO_NODE, value)
+
+        return self.add_constant(value)
+
+    def add_constant(self, value: Any) -> int:
+        self.constants.append(value)
+        return self.add_node(NodeKind.CONSTANT, 0, NO_NODE, NO_NODE, len(self.constants) - 1)
+
+    def add_binary(self, operator: parser_node.Operator, left: int, right: int) -> int:
+        return self.add_node(NodeKind.BINARY, OPERATOR_CODES[operator], left, right, 0)
+
+    def add_expression(self, value: int) -> int:
+        self.root = self.add_node(
+            NodeKind.EXPRESSION, 0, value, NO_NODE, 0)
+        return self.root
+
+    def get_value(self, index: int) -> Any:
+        """
+        The number of an integer or constant node
+        """
+        if self.kinds[index] == NodeKind.INTEGER:
+            return self.values[index]
+
+        return self.constants[self.values[index]]
+
+    def get_operator(self, index: int) -> parser_node.Operator:
+        return OPERATORS[self.operators[index]]
+
+    def walk(self, root: Optional[int] = None) -> Iterator[int]:
+        """
+        Yield the nodes under the root, the arena's root by default, children first and left to right
+        """
+        kinds = self.kinds
+        lefts = self.lefts
+        rights = self.rights
+        # a complemented index is a node whose children have been yielded
+        stack = [self.root if root is None else root]
+
+        while len(stack) > 0:
+            index = stack.pop()
+
+            if index < 0:
+                yield ~index
+                continue
+
+            kind = kinds[index]
+
+            if kind == NodeKind.BINARY:
+                stack.append(~index)
+                stack.append(rights[index])
+                stack.append(lefts[index])
+            elif kind == NodeKind.EXPRESSION:
+                stack.append(~index)
+                stack.append(lefts[index])
+            else:
+                yield index
+
+    def generate_opcodes(self, output: list[Operation]):
+        kinds = self.kinds
+
+        for index in self.walk():
+            kind = kinds[index]
+
+            if kind == NodeKind.BINARY:
+                output.append(OPERATIONS[self.operators[index]]())
+            elif kind == NodeKind.INTEGER:
+                output.append(interpreter_operations.Integer(self.values[index]))
+            elif kind == NodeKind.CONSTANT:
+                value = self.constants[self.values[index]]
+
+                if isinstance(value, float):
+                    output.append(interpreter_operations.Float(value))
+                else:
+                    output.append(interpreter_operations.Integer(value))
+            else:
+                output.append(interpreter_operations.Return())
+
+    def get_size(self) -> int:
+        """
+        The bytes held by the columns
+        """
+        return sum(column.itemsize * column.buffer_info()[1] for column in
+                   [self.kinds, self.operators, self.lefts, self.rights, self.values])
+
+
+class ArenaAccumulator:
+    """
+    Folds a level's operands into binary nodes as they arrive
+    """
+
+    def __init__(self, arena: NodeArena) -> None:
+        self.arena = arena
+        self.node = NO_NODE
+        self.operator: Optional[parser_node.Operator] = None
+        self.operator_offset = 0
+
+    def add(self, operand: int):
+        if self.node == NO_NODE:
+            self.node = operand
+        else:
+            self.node = self.arena.add_binary(self.operator, self.node, operand)
+
+    def close(self, operand: int) -> int:
+        self.add(operand)
+        node = self.node
+        self.node = NO_NODE
+        return node
+
+
+class ExponentAccumulator(ArenaAccumulator):
+    """
+    Folds the right operands of an exponentiation, and the start operand last
+    """
+
+    def __init__(self, arena: NodeArena) -> None:
+        super().__init__(arena)
+        self.start = NO_NODE
+        self.first_operator: Optional[parser_node.Operator] = None
+
+    def add(self, operand: int):
+        if self.start == NO_NODE:
+            self.start = operand
+        elif self.node == NO_NODE:
+            self.node = operand
+            self.first_operator = self.operator
+        else:
+            # every Multiply comes from the first operator, like get_reversed_order
+            self.node = self.arena.add_binary(
+                self.first_operator, self.node, operand)
+
+    def close(self, operand: int) -> int:
+        self.add(operand)
+        node = self.start
+
+        if self.node != NO_NODE:
+            node = self.arena.add_binary(self.first_operator, self.node, node)
+
+        self.start = NO_NODE
+        self.node = NO_NODE
+        return node
+
+
+class ArenaFrame(pratt_parser.PrattFrame):
+    def __init__(self, arena: NodeArena) -> None:
+        super().__init__()
+        self.accumulators = [ArenaAccumulator(arena) for _ in LEVELS[:-1]]
+        self.accumulators.append(ExponentAccumulator(arena))
+
+
+class ArenaParser(pratt_parser.PrattParser):
+    """
+    The precedence climbing parser, adding the nodes to a NodeArena instead of creating objects
+    """
+
+    def __init__(self, state: Any) -> None:
+        super().__init__(state)
+        self.arena = NodeArena()
+
+    def create_frame(self) -> pratt_parser.PrattFrame:
+        return ArenaFrame(self.arena)
+
+    def get_operand_value(self) -> Any:
+        return self.value
+
+    def get_paren_group_value(self, value: Any) -> Any:
+        return value
+
+    def parse_expresion(self, index: int) -> int:
+        index = self.state.get_whitespace_run_end(index)
+
+        if not self.state.get_mask_at(index) & source_lexer.EQUALS:
+            return FAILED
+
+        index = self.parse_bitwise_shift(
+            self.state.get_whitespace_run_end(index + 1))
+
+        # like the descent parser, trailing whitespace isn't part of the expression
+        if index == FAILED or not self.state.get_at(index).is_end():
+            return FAILED
+
+        self.arena.add_expression(self.value)
+        return index
+
+    def parse_number(self, index: int) -> int:
+        integer_end = self.state.get_digit_run_end(index)
+
+        if integer_end == index:
+            return FAILED
+
+        if self.state.get_mask_at(integer_end) & source_lexer.DOT:
+            fraction_end = self.state.get_digit_run_end(integer_end + 1)
+
+            if fraction_end > integer_end + 1:
+                self.value = self.arena.add_constant(
+                    float(self.state.get_text(fraction_end, index)))
+                return fraction_end
+
+        self.value = self.arena.add_integer(
+            int(self.state.get_text(integer_end, index)))
+        return integer_end
+
+
+def parse_arena(state: Any) -> Optional[tuple[NodeArena, int]]:
+    """
+    Parse from the state into a NodeArena, giving it and the index after the expression, or None if it isn't
+    a valid expression
+    """
+    parser = ArenaParser(state)
+
+    try:
+        end = parser.parse_expresion(state.index)
+    except (IndexError, RecursionError):
+        return None
+
+    if end == FAILED:
+        return None
+
+    return (parser.arena, end)
@@ -0,0 +1,174 @@
+from typing import Any
+
+import interpreter_vm.interpreter_operations as interpreter_operations
+import interpreter_vm.parser_node as parser_node
+from stack_executer.stack_executer import Operation, State
+
+# folded integers are kept below this many bits, bigger ones are left to be computed when the code runs
+MAX_FOLDED_BITS = 1 << 16
+
+
+class NoValue:
+    """
+    Marks a node whose value isn't known until the code runs
+    """
+    pass
+
+
+NO_VALUE = NoValue()
+
+LEVEL_NODES = (parser_node.BitwiseShift, parser_node.AdditionOrSubtraction,
+               parser_node.MultiplicationOrDivision)
+
+
+def make_constant(value: int | float) -> parser_node.Numeric:
+    if isinstance(value, float):
+        return parser_node.Numeric(parser_node.Number(parser_node.Float(value)))
+
+    return parser_node.Numeric(parser_node.Number(parser_node.Integer(value)))
+
+
+def evaluate(operation: Operation, left: Any, right: Any) -> Any:
+    """
+    The result of the operation on the operands, the way the VM computes it, or NO_VALUE if it raises or
+    would make an integer too big to fold
+    """
+    if isinstance(left, int) and isinstance(right, int):
+        if isinstance(operation, interpreter_operations.LeftShift) and right > 0 and \
+                left.bit_length() + right > MAX_FOLDED_BITS:
+            return NO_VALUE
+
+        if isinstance(operation, interpreter_operations.Multiply) and \
+                left.bit_length() + right.bit_length() > MAX_FOLDED_BITS:
+            return NO_VALUE
+
+    state = State([])
+    state.push_result(left)
+    state.push_result(right)
+
+    try:
+        operation.eval(state)
+    except Exception:
+        # the error is the VM's to report when the code runs
+        return NO_VALUE
+
+    return state.pop_result()
+
+
+def get_children(node: Any) -> list[Any]:
+    if isinstance(node, LEVEL_NODES) or isinstance(node, parser_node.Exponentiation):
+        return [node.start, *[part.right for part in node.rest]]
+    elif isinstance(node, parser_node.Expresion):
+        return [node.value]
+    elif isinstance(node, parser_node.Numeric):
+        return [node.number_or_paren_group]
+    elif isinstance(node, parser_node.Number):
+        return [node.integer_or_float]
+    elif isinstance(node, parser_node.ParenGroup):
+        return [node.content]
+
+    return []
+
+
+def fold_level(node: Any, folded: list[tuple[Any, Any]]) -> tuple[Any, Any]:
+    """
+    Fold the operands of a left associative level from the left, up to the first that can't be folded
+    """
+    (start, value) = folded[0]
+    rest: list[Any] = []
+
+    for (part, (right, right_value)) in zip(node.rest, folded[1:]):
+        if value is not NO_VALUE:
+            result = NO_VALUE if right_value is NO_VALUE else evaluate(
+                part.opcode_steps()[-1], value, right_value)
+
+            if result is not NO_VALUE:
+                value = result
+                continue
+
+            start = make_constant(value)
+            value = NO_VALUE
+
+        rest.append(type(part)(part.operator, part.offset, right))
+
+    if value is not NO_VALUE:
+        return (make_constant(value), value)
+
+    return (type(node)(start, rest), NO_VALUE)
+
+
+def fold_exponentiation(node: parser_node.Exponentiation, folded: list[tuple[Any, Any]]) -> tuple[Any, Any]:
+    """
+    Fold an exponentiation when all of its operands are constants, in the order get_reversed_order gives
+    """
+    if len(node.rest) > 0 and all(value is not NO_VALUE for (_, value) in folded):
+        operation = node.rest[0].opcode_steps()[-1]
+        value = folded[1][1]
+
+        for (_, operand) in folded[2:] + folded[:1]:
+            value = evaluate(operation, value, operand)
+
+            if value is NO_VALUE:
+                break
+        else:
+            return (make_constant(value), value)
+
+    if len(node.rest) == 0:
+        return folded[0]
+
+    rest = [parser_node.ExponentiationPart(part.operator, part.offset, right)
+            for (part, (right, _)) in zip(node.rest, folded[1:])]
+    return (parser_node.Exponentiation(folded[0][0], rest), NO_VALUE)
+
+
+def fold_node(node: Any, folded: list[tuple[Any, Any]]) -> tuple[Any, Any]:
+    """
+    The node rebuilt from its folded children, and its value if it is a constant
+    """
+    if isinstance(node, parser_node.Integer) or isinstance(node, parser_node.Float):
+        return (node, node.value)
+    elif isinstance(node, LEVEL_NODES):
+        return fold_level(node, folded)
+    elif isinstance(node, parser_node.Exponentiation):
+        return fold_exponentiation(node, folded)
+    elif isinstance(node, parser_node.Expresion):
+        return (parser_node.Expresion(folded[0][0]), NO_VALUE)
+
+    (child, value) = folded[0]
+
+    if value is not NO_VALUE:
+        return (make_constant(value), value)
+    elif isinstance(node, parser_node.Numeric):
+        return (parser_node.Numeric(child), NO_VALUE)
+    elif isinstance(node, parser_node.Number):
+        return (parser_node.Number(child), NO_VALUE)
+    elif isinstance(node, parser_node.ParenGroup):
+        return (parser_node.ParenGroup(child), NO_VALUE)
+
+    raise Exception(f"Unknown node {type(node).__name__} encountered while folding")
+
+
+def fold_constants(node: parser_node.ExecNode) -> parser_node.ExecNode:
+    """
+    Give a copy of the AST with the constant subtrees replaced by their values, walking the nodes with an
+    explicit stack. Operations the VM would raise on are kept, so their errors still happen at run time.
+    """
+    stack: list[tuple[Any, bool]] = [(node, False)]
+    # the folded nodes and their values, children before their parents
+    results: list[tuple[Any, Any]] = []
+
+    while len(stack) > 0:
+        (item, expanded) = stack.pop()
+        children = get_children(item)
+
+        if not expanded:
+            stack.append((item, True))
+            stack.extend((child, False) for child in reversed(children))
+            continue
+
+        first = len(results) - len(children)
+        folded = results[first:]
+        del results[first:]
+        results.append(fold_node(item, folded))
+
+    return results[0][0]
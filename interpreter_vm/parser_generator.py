@@ -0,0 +1,584 @@
+import ast
+import hashlib
+import importlib.util
+import os
+import re
+from types import ModuleType
+from typing import Any, Callable, Optional
+
+import interpreter_vm.parser_node as parser_node
+
+"""
+Generates a standalone Python parser module from a grammar, one rule per line:
+
+Name -> Item Item | Item ...
+
+An item is a quoted literal, Digit, \\s, $ for the end of the input, another rule's name, a parenthesized
+choice, or an item followed by *, + or ?. Choices are ordered and repetitions are greedy, like the
+hand-written parsers. The first rule is where parsing starts.
+
+A generated module's make_parser(actions) gives a parse(text) function, returning what the first rule's
+action built or None if the text doesn't match. Each rule's action is called with the text, the start and
+end of its match and its children, which are what the subrules' actions built and the literals matched.
+A rule without an action gives a (rule name, start, end, children) tuple, and the module's own parse has
+no actions, giving the syntax tree of those tuples.
+"""
+
+EXPRESSION_GRAMMAR = r"""
+Expresion -> \s* '=' \s* BitwiseShift $
+BitwiseShift -> AdditionOrSubtraction (\s* ShiftOperator \s* AdditionOrSubtraction)*
+AdditionOrSubtraction -> MultiplicationOrDivision (\s* AdditionOperator \s* MultiplicationOrDivision)*
+MultiplicationOrDivision -> Exponentiation (\s* MultiplicationOperator \s* Exponentiation)*
+Exponentiation -> Numeric (\s* ExponentiationOperator \s* Numeric)*
+Numeric -> Number | ParenGroup
+Number -> Float | Integer
+Integer -> Digit+
+Float -> Digit+ '.' Digit+
+ParenGroup -> '(' \s* BitwiseShift \s* ')'
+ShiftOperator -> '<<' | '>>'
+AdditionOperator -> '+' | '-'
+MultiplicationOperator -> '*' | '/' | '%'
+ExponentiationOperator -> '**'
+"""
+
+
+def get_operator(text: str, start: int, end: int, children: list[Any]) -> tuple[parser_node.Operator, int]:
+    return (parser_node.Operator(text[start]), start)
+
+
+def get_parts(part: type, children: list[Any]) -> list[Any]:
+    """
+    The parts for the operators and operands after the first child
+    """
+    return [part(children[i][0], children[i][1], children[i + 1]) for i in range(1, len(children), 2)]
+
+
+# build the same AST as the other engines of source_parser
+EXPRESSION_ACTIONS: dict[str, Callable[[str, int, int, list[Any]], Any]] = {
+    "Expresion": lambda text, start, end, children: parser_node.Expresion(children[1]),
+    "BitwiseShift": lambda text, start, end, children: parser_node.BitwiseShift(
+        children[0], get_parts(parser_node.BitwiseShiftPart, children)),
+    "AdditionOrSubtraction": lambda text, start, end, children: parser_node.AdditionOrSubtraction(
+        children[0], get_parts(parser_node.AdditionOrSubtractionPart, children)),
+    "MultiplicationOrDivision": lambda text, start, end, children: parser_node.MultiplicationOrDivision(
+        children[0], get_parts(parser_node.MultiplicationOrDivisionPart, children)),
+    "Exponentiation": lambda text, start, end, children: parser_node.Exponentiation(
+        children[0], get_parts(parser_node.ExponentiationPart, children)),
+    "Numeric": lambda text, start, end, children: parser_node.Numeric(children[0]),
+    "Number": lambda text, start, end, children: parser_node.Number(children[0]),
+    "Integer": lambda text, start, end, children: parser_node.Integer(int(text[start:end])),
+    "Float": lambda text, start, end, children: parser_node.Float(float(text[start:end])),
+    "ParenGroup": lambda text, start, end, children: parser_node.ParenGroup(children[1]),
+    "ShiftOperator": get_operator,
+    "AdditionOperator": get_operator,
+    "MultiplicationOperator": get_operator,
+    "ExponentiationOperator": get_operator,
+}
+
+# part of every grammar hash, so changing the generated code invalidates the cache
+GENERATOR_VERSION = 2
+
+
+def get_default_cache_dir() -> str:
+    """
+    A directory in the user's cache, since the modules in it are run when they are loaded
+    """
+    cache_home = os.environ.get("XDG_CACHE_HOME") or os.path.join(
+        os.path.expanduser("~"), ".cache")
+    return os.path.join(cache_home, "interpreter", "parser_cache")
+
+
+DEFAULT_CACHE_DIR = get_default_cache_dir()
+
+CHARACTER_SETS: dict[str, str] = {
+    "Digit": "0123456789",
+    "\\s": " \t\r\n",
+}
+
+
+class GrammarNode:
+    pass
+
+
+class Literal(GrammarNode):
+    def __init__(self, text: str) -> None:
+        self.text = text
+
+
+class CharacterSet(GrammarNode):
+    def __init__(self, characters: str) -> None:
+        self.characters = characters
+
+
+class End(GrammarNode):
+    pass
+
+
+class RuleCall(GrammarNode):
+    def __init__(self, name: str) -> None:
+        self.name = name
+
+
+class Sequence(GrammarNode):
+    def __init__(self, items: list[GrammarNode]) -> None:
+        self.items = items
+
+
+class Choice(GrammarNode):
+    def __init__(self, alternatives: list[GrammarNode]) -> None:
+        self.alternatives = alternatives
+
+
+class Repeat(GrammarNode):
+    def __init__(self, item: GrammarNode, minimum: int, maximum: Optional[int]) -> None:
+        self.item = item
+        self.minimum = minimum
+        self.maximum = maximum
+
+
+GRAMMAR_TOKEN_REGEX = re.compile(
+    r"""\s*(?:(?P<ARROW>->)|(?P<LITERAL>'(?:[^'\\]|\\.)*')|(?P<CLASS>\\s|Digit\b)|(?P<NAME>[A-Za-z_][A-Za-z0-9_]*)|(?P<SYMBOL>[()|*+?$]))""")
+
+
+class GrammarReader:
+    """
+    Recursive descent over the tokens of one grammar rule
+    """
+
+    def __init__(self, line: str) -> None:
+        self.tokens: list[tuple[str, str]] = []
+        position = 0
+        line = line.rstrip()
+
+        while position < len(line):
+            match = GRAMMAR_TOKEN_REGEX.match(line, position)
+
+            if match is None or match.lastgroup is None:
+                raise Exception(
+                    f"Unexpected grammar text '{line[position:].strip()}'")
+
+            self.tokens.append((match.lastgroup, match.group(match.lastgroup)))
+            position = match.end()
+
+        self.index = 0
+
+    def peek(self) -> Optional[str]:
+        return self.tokens[self.index][1] if self.index < len(self.tokens) else None
+
+    def take(self) -> tuple[str, str]:
+        if self.index >= len(self.tokens):
+            raise Exception("Unexpected end of grammar rule")
+
+        token = self.tokens[self.index]
+        self.index += 1
+        return token
+
+    def read_rule(self) -> tuple[str, GrammarNode]:
+        (kind, name) = self.take()
+
+        if kind != "NAME" or self.take()[0] != "ARROW":
+            raise Exception(f"Expected 'Name ->' at the start of a rule, found '{name}'")
+
+        body = self.read_choice()
+
+        if self.index < len(self.tokens):
+            raise Exception(f"Unexpected '{self.peek()}' in rule {name}")
+
+        return (name, body)
+
+    def read_choice(self) -> GrammarNode:
+        alternatives = [self.read_sequence()]
+
+        while self.peek() == "|":
+            self.take()
+            alternatives.append(self.read_sequence())
+
+        return alternatives[0] if len(alternatives) == 1 else Choice(alternatives)
+
+    def read_sequence(self) -> GrammarNode:
+        items: list[GrammarNode] = []
+
+        while self.peek() not in (None, "|", ")"):
+            items.append(self.read_postfix())
+
+        if len(items) == 0:
+            raise Exception("Empty sequence in grammar rule")
+
+        return items[0] if len(items) == 1 else Sequence(items)
+
+    def read_postfix(self) -> GrammarNode:
+        item = self.read_primary()
+
+        while self.peek() in ("*", "+", "?"):
+            operator = self.take()[1]
+
+            if operator == "*":
+                item = Repeat(item, 0, None)
+            elif operator == "+":
+                item = Repeat(item, 1, None)
+            else:
+                item = Repeat(item, 0, 1)
+
+        return item
+
+    def read_primary(self) -> GrammarNode:
+        (kind, text) = self.take()
+
+        if kind == "LITERAL":
+            return Literal(ast.literal_eval(text))
+        elif kind == "CLASS":
+            return CharacterSet(CHARACTER_SETS[text])
+        elif kind == "NAME":
+            return RuleCall(text)
+        elif text == "$":
+            return End()
+        elif text == "(":
+            item = self.read_choice()
+
+            if self.take()[1] != ")":
+                raise Exception("Expected ')' in grammar rule")
+
+            return item
+
+        raise Exception(f"Unexpected '{text}' in grammar rule")
+
+
+def read_grammar(grammar: str) -> dict[str, GrammarNode]:
+    """
+    Read the rules of the grammar, in order
+    """
+    rules: dict[str, GrammarNode] = {}
+
+    for line in grammar.splitlines():
+        if len(line.strip()) == 0:
+            continue
+
+        (name, body) = GrammarReader(line).read_rule()
+
+        if name in rules:
+            raise Exception(f"Rule {name} is defined twice")
+
+        rules[name] = body
+
+    if len(rules) == 0:
+        raise Exception("The grammar has no rules")
+
+    return rules
+
+
+class ParserGenerator:
+    """
+    Writes the Python source of a parser for the grammar's rules
+    """
+
+    def __init__(self, rules: dict[str, GrammarNode]) -> None:
+        self.rules = rules
+        self.lines: list[str] = []
+        # each constant's name by its value, so equal tests share one
+        self.constants: dict[str, str] = {}
+        self.counter = 0
+        self.firsts: dict[str, tuple[Optional[frozenset[str]], bool]] = {}
+
+        for name in rules:
+            self.get_rule_first(name, set())
+
+    def get_rule_first(self, name: str, visiting: set[str]) -> tuple[Optional[frozenset[str]], bool]:
+        if name not in self.rules:
+            raise Exception(f"Unknown rule {name}")
+
+        if name in self.firsts:
+            return self.firsts[name]
+
+        if name in visiting:
+            raise Exception(f"Rule {name} is left recursive")
+
+        visiting.add(name)
+        first = self.get_first(self.rules[name], visiting)
+        visiting.remove(name)
+        self.firsts[name] = first
+        return first
+
+    def get_first(self, node: GrammarNode, visiting: set[str]) -> tuple[Optional[frozenset[str]], bool]:
+        """
+        The characters the node can start with, None for any, and whether it can match nothing
+        """
+        if isinstance(node, Literal):
+            return (frozenset(node.text[:1]), len(node.text) == 0)
+        elif isinstance(node, CharacterSet):
+            return (frozenset(node.characters), False)
+        elif isinstance(node, End):
+            return (frozenset(), True)
+        elif isinstance(node, RuleCall):
+            return self.get_rule_first(node.name, visiting)
+        elif isinstance(node, Repeat):
+            (characters, nullable) = self.get_first(node.item, visiting)
+            return (characters, nullable or node.minimum == 0)
+
+        items = node.items if isinstance(node, Sequence) else node.alternatives if isinstance(
+            node, Choice) else []
+        characters: Optional[frozenset[str]] = frozenset()
+        nullable = isinstance(node, Sequence)
+
+        for item in items:
+            (item_characters, item_nullable) = self.get_first(item, visiting)
+            characters = None if characters is None or item_characters is None else characters | item_characters
+
+            if isinstance(node, Sequence):
+                if not item_nullable:
+                    nullable = False
+                    break
+            elif item_nullable:
+                nullable = True
+
+        return (characters, nullable)
+
+    def get_guard(self, node: GrammarNode) -> Optional[str]:
+        """
+        A test of the next character that must pass for the node to match, if there is one
+        """
+        (characters, nullable) = self.get_first(node, set())
+
+        if characters is None or nullable:
+            return None
+
+        return self.add_constant("FIRST", f"frozenset({''.join(sorted(characters))!r})")
+
+    def add_constant(self, prefix: str, value: str) -> str:
+        if value not in self.constants:
+            self.constants[value] = f"{prefix}_{len(self.constants) + 1}"
+
+        return self.constants[value]
+
+    def get_name(self, prefix: str) -> str:
+        self.counter += 1
+        return f"{prefix}{self.counter}"
+
+    def emit(self, depth: int, line: str):
+        self.lines.append("    " * depth + line)
+
+    def emit_all(self, depth: int, lines: list[str]):
+        for line in lines:
+            self.emit(depth, line)
+
+    def generate_node(self, node: GrammarNode, depth: int, fail: list[str]):
+        """
+        Emit the code matching the node at i, advancing i or running the fail lines
+        """
+        if isinstance(node, Literal):
+            if len(node.text) == 1:
+                self.emit(depth, f"if i < n and text[i] == {node.text!r}:")
+            else:
+                self.emit(depth, f"if text.startswith({node.text!r}, i):")
+
+            self.emit(depth + 1, f"i += {len(node.text)}")
+            self.emit(depth + 1, f"children.append({node.text!r})")
+            self.emit(depth, "else:")
+            self.emit_all(depth + 1, fail)
+        elif isinstance(node, CharacterSet):
+            self.emit(depth, f"if i < n and text[i] in {node.characters!r}:")
+            self.emit(depth + 1, "i += 1")
+            self.emit(depth, "else:")
+            self.emit_all(depth + 1, fail)
+        elif isinstance(node, End):
+            self.emit(depth, "if i != n:")
+            self.emit_all(depth + 1, fail)
+        elif isinstance(node, RuleCall):
+            if node.name not in self.rules:
+                raise Exception(f"Unknown rule {node.name}")
+
+            self.emit(depth, f"end = parse_{node.name}(text, i, n, children)")
+            self.emit(depth, "if end < 0:")
+            self.emit_all(depth + 1, fail)
+            self.emit(depth, "i = end")
+        elif isinstance(node, Sequence):
+            for item in node.items:
+                self.generate_node(item, depth, fail)
+        elif isinstance(node, Choice):
+            self.generate_choice(node, depth, fail)
+        elif isinstance(node, Repeat):
+            self.generate_repeat(node, depth, fail)
+        else:
+            raise Exception("Unknown grammar node")
+
+    def generate_choice(self, node: Choice, depth: int, fail: list[str]):
+        start = self.get_name("start")
+        mark = self.get_name("mark")
+        matched = self.get_name("matched")
+        self.emit(depth, f"{start} = i")
+        self.emit(depth, f"{mark} = len(children)")
+        self.emit(depth, f"{matched} = False")
+
+        for (alternative_index, alternative) in enumerate(node.alternatives):
+            # only the alternatives that can start with the next character are tried
+            tests = [] if alternative_index == 0 else [f"not {matched}"]
+            guard = self.get_guard(alternative)
+
+            if guard is not None:
+                tests.append(f"i < n and text[i] in {guard}")
+
+            self.emit(depth, f"if {' and '.join(tests)}:" if len(
+                tests) > 0 else "if True:")
+            self.emit(depth + 1, "while True:")
+            self.generate_node(alternative, depth + 2,
+                               [f"i = {start}", f"del children[{mark}:]", "break"])
+            self.emit(depth + 2, f"{matched} = True")
+            self.emit(depth + 2, "break")
+
+        self.emit(depth, f"if not {matched}:")
+        self.emit_all(depth + 1, fail)
+
+    def generate_repeat(self, node: Repeat, depth: int, fail: list[str]):
+        if isinstance(node.item, CharacterSet) and node.maximum is None:
+            # a run of characters is one regex match
+            pattern = f"[{re.escape(node.item.characters)}]" + \
+                ("+" if node.minimum > 0 else "*")
+            run = self.add_constant("RUN", f"re.compile({pattern!r})")
+
+            if node.minimum == 0:
+                self.emit(depth, f"i = {run}.match(text, i).end()")
+            else:
+                match = self.get_name("match")
+                self.emit(depth, f"{match} = {run}.match(text, i)")
+                self.emit(depth, f"if {match} is None:")
+                self.emit_all(depth + 1, fail)
+                self.emit(depth, f"i = {match}.end()")
+
+            return
+
+        for _ in range(node.minimum):
+            self.generate_node(node.item, depth, fail)
+
+        start = self.get_name("start")
+        mark = self.get_name("mark")
+        guard = self.get_guard(node.item)
+        (_, nullable) = self.get_first(node.item, set())
+        self.emit(depth, "while True:")
+
+        if guard is not None:
+            self.emit(depth + 1, f"if i >= n or text[i] not in {guard}:")
+            self.emit(depth + 2, "break")
+
+        self.emit(depth + 1, f"{start} = i")
+        self.emit(depth + 1, f"{mark} = len(children)")
+        self.generate_node(node.item, depth + 1,
+                           [f"i = {start}", f"del children[{mark}:]", "break"])
+
+        if node.maximum is not None or nullable:
+            self.emit(depth + 1, "break" if node.maximum is not None else f"if i == {start}: break")
+
+    def generate_rule(self, name: str, body: GrammarNode):
+        # the rules are closures of make_parser, so each one calls its action without a lookup
+        self.emit(1, f"def parse_{name}(text, i, n, out):")
+        self.emit(2, "start = i")
+        self.emit(2, "children = []")
+        self.generate_node(body, 2, ["return -1"])
+        self.emit(2, f"out.append(action_{name}(text, start, i, children))")
+        self.emit(2, "return i")
+        self.emit(0, "")
+
+    def generate(self, grammar_hash: str) -> str:
+        self.emit(0, "def make_parser(actions):")
+
+        for name in self.rules:
+            self.emit(1, f"action_{name} = actions.get({name!r}) or make_tree({name!r})")
+
+        self.emit(0, "")
+
+        for (name, body) in self.rules.items():
+            self.generate_rule(name, body)
+
+        start_rule = next(iter(self.rules))
+        self.emit_all(1, [
+            "def parse(text):",
+            "    out = []",
+            f"    end = parse_{start_rule}(text, 0, len(text), out)",
+            "    return out[0] if end >= 0 else None",
+        ])
+        self.emit(0, "")
+        self.emit(1, "return parse")
+        header = [
+            f"# Generated by interpreter_vm.parser_generator from grammar {grammar_hash}, do not edit",
+            "import re",
+            "",
+            f"GRAMMAR_HASH = {grammar_hash!r}",
+            *[f"{name} = {value}" for (value, name) in self.constants.items()],
+            "",
+            "",
+            "def make_tree(name):",
+            "    return lambda text, start, end, children: (name, start, end, children)",
+            "",
+            "",
+        ]
+        footer = [
+            "",
+            "",
+            "parse = make_parser({})",
+        ]
+        return "\n".join(header + self.lines + footer) + "\n"
+
+
+def get_grammar_hash(grammar: str) -> str:
+    return hashlib.sha256(f"{GENERATOR_VERSION}\n{grammar}".encode()).hexdigest()[:16]
+
+
+def generate_parser(grammar: str) -> str:
+    """
+    Generate the source of a parser module for the grammar
+    """
+    return ParserGenerator(read_grammar(grammar)).generate(get_grammar_hash(grammar))
+
+
+LOADED_PARSERS: dict[tuple[str, str], ModuleType] = {}
+
+
+def load_parser(grammar: str = EXPRESSION_GRAMMAR, cache_dir: str = DEFAULT_CACHE_DIR) -> ModuleType:
+    """
+    Load the parser module for the grammar, generating it into the cache directory only when the grammar
+    has no module there yet
+    """
+    grammar_hash = get_grammar_hash(grammar)
+    key = (cache_dir, grammar_hash)
+
+    if key in LOADED_PARSERS:
+        return LOADED_PARSERS[key]
+
+    path = os.path.join(cache_dir, f"grammar_{grammar_hash}.py")
+
+    if not os.path.exists(path):
+        os.makedirs(cache_dir, exist_ok=True)
+        temporary_path = f"{path}.{os.getpid()}.tmp"
+
+        with open(temporary_path, "w") as file:
+            file.write(generate_parser(grammar))
+
+        # another process generating the same grammar writes the same source
+        os.replace(temporary_path, path)
+
+    spec = importlib.util.spec_from_file_location(
+        f"generated_grammar_{grammar_hash}", path)
+
+    if spec is None or spec.loader is None:
+        raise Exception(f"Unable to load the generated parser {path}")
+
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    LOADED_PARSERS[key] = module
+    return module
+
+
+EXPRESSION_PARSERS: dict[str, Callable[[str], Any]] = {}
+
+
+def parse_generated(source: str, cache_dir: str = DEFAULT_CACHE_DIR) -> Optional[parser_node.Expresion]:
+    """
+    Parse the source into an AST with the parser generated from EXPRESSION_GRAMMAR, or None if it isn't
+    a valid expression
+    """
+    if cache_dir not in EXPRESSION_PARSERS:
+        EXPRESSION_PARSERS[cache_dir] = load_parser(
+            EXPRESSION_GRAMMAR, cache_dir).make_parser(EXPRESSION_ACTIONS)
+
+    try:
+        return EXPRESSION_PARSERS[cache_dir](source)
+    except RecursionError:
+        return None
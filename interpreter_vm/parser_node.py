@@ -1,3 +1,4 @@
+from enum import Enum
 from typing import Union
 
 import basic_interpreter.source_lexer as source_lexer
@@ -18,179 +19,286 @@ ParenGroup -> '(' BitwiseShift ')'
 """
 
 
+class Operator(Enum):
+    """
+    An operator character, which the parts keep instead of its token; '<<', '>>' and '**' are their first
+    character's
+    """
+    LEFT_ANGLE_BRACKET = '<'
+    RIGHT_ANGLE_BRACKET = '>'
+    PLUS = '+'
+    MINUS = '-'
+    MULTIPLY = '*'
+    DIVIDE = '/'
+    PERCENT = '%'
+
+    @staticmethod
+    def of(token: source_lexer.LexerToken) -> 'Operator':
+        return Operator(token.token.c)
+
+
+# the operator of each operator character's bit
+OPERATORS_BY_BIT: dict[int, Operator] = {
+    source_lexer.CHARACTER_BITS[operator.value]: operator for operator in Operator}
+
+
+def emit_opcodes(node: 'ExecNode | BitwiseShiftPart | AdditionOrSubtractionPart | MultiplicationOrDivisionPart | ExponentiationPart', output: list[Operation]):
+    """
+    Append the node's opcodes to the output, walking the nodes with an explicit stack instead of recursing
+    """
+    stack: list = [node]
+
+    while len(stack) > 0:
+        item = stack.pop()
+
+        if isinstance(item, Operation):
+            output.append(item)
+        else:
+            steps = item.opcode_steps()
+            steps.reverse()
+            stack.extend(steps)
+
+
+def node_to_string(node: 'ExecNode | BitwiseShiftPart | AdditionOrSubtractionPart | MultiplicationOrDivisionPart | ExponentiationPart') -> str:
+    """
+    Print the node, walking the nodes with an explicit stack instead of recursing
+    """
+    stack: list = [node]
+    pieces: list[str] = []
+
+    while len(stack) > 0:
+        item = stack.pop()
+
+        if isinstance(item, str):
+            pieces.append(item)
+        else:
+            parts = item.string_parts()
+            parts.reverse()
+            stack.extend(parts)
+
+    return ''.join(pieces)
+
+
+def get_rest_string_parts(name: str, start, rest: list) -> list:
+    parts: list = [f"{name}(", start]
+
+    for part in rest:
+        parts.append(',')
+        parts.append(part)
+
+    parts.append(')')
+    return parts
+
+
 class ExecNode:
+    __slots__ = ()
+
     def __init__(self) -> None:
         pass
 
+    def opcode_steps(self) -> list:
+        """
+        The child nodes and operations making up this node's opcodes, in order
+        """
+        return []
+
     def generate_opcodes(self, output: list[Operation]):
-        pass
+        emit_opcodes(self, output)
+
+    def string_parts(self) -> list:
+        """
+        The strings and child nodes making up this node's string, in order
+        """
+        return ["exec()"]
 
     def __str__(self) -> str:
-        return f"exec()"
+        return node_to_string(self)
 
 
 class Expresion(ExecNode):
+    __slots__ = ("value",)
+
     def __init__(self, value: 'BitwiseShift') -> None:
         super().__init__()
         self.value = value
 
-    def generate_opcodes(self, output: list[Operation]):
-        self.value.generate_opcodes(output)
-        output.append(interpreter_operations.Return())
+    def opcode_steps(self) -> list:
+        return [self.value, interpreter_operations.Return()]
 
-    def __str__(self) -> str:
-        return f"Expresion({self.value})"
+    def string_parts(self) -> list:
+        return ["Expresion(", self.value, ")"]
 
 
 class BitwiseShiftPart:
-    def __init__(self, operator: source_lexer.LexerToken, right: 'AdditionOrSubtraction') -> None:
-        super().__init__()
+    __slots__ = ("operator", "offset", "right")
+
+    def __init__(self, operator: Operator, offset: int, right: 'AdditionOrSubtraction') -> None:
         self.operator = operator
+        # the source offset of the operator's first character
+        self.offset = offset
         self.right = right
 
-    def generate_opcodes(self, output: list[Operation]):
-        self.right.generate_opcodes(output)
-
-        if self.operator.left_angle_bracket:
-            output.append(interpreter_operations.LeftShift())
-        elif self.operator.right_angle_bracket:
-            output.append(interpreter_operations.RightShift())
+    def opcode_steps(self) -> list:
+        if self.operator is Operator.LEFT_ANGLE_BRACKET:
+            return [self.right, interpreter_operations.LeftShift()]
+        elif self.operator is Operator.RIGHT_ANGLE_BRACKET:
+            return [self.right, interpreter_operations.RightShift()]
         else:
             raise Exception("Unknown operator encountered in BitwiseShiftPart")
 
+    def generate_opcodes(self, output: list[Operation]):
+        emit_opcodes(self, output)
+
+    def string_parts(self) -> list:
+        return [f"token({self.offset}:{self.operator.value})(", self.right, ")"]
+
     def __str__(self) -> str:
-        return f"{self.operator}({self.right})"
+        return node_to_string(self)
 
 
 class BitwiseShift(ExecNode):
+    __slots__ = ("start", "rest")
+
     def __init__(self, start: 'AdditionOrSubtraction', rest: list[BitwiseShiftPart]) -> None:
         super().__init__()
         self.start = start
         self.rest = rest
 
-    def generate_opcodes(self, output: list[Operation]):
-        self.start.generate_opcodes(output)
-
-        for part in self.rest:
-            part.generate_opcodes(output)
+    def opcode_steps(self) -> list:
+        return [self.start, *self.rest]
 
-    def __str__(self) -> str:
-        return f"BitwiseShift({self.start}{',' if len(self.rest) > 0 else ''}{','.join([str(part) for part in self.rest])})"
+    def string_parts(self) -> list:
+        return get_rest_string_parts("BitwiseShift", self.start, self.rest)
 
 
 class AdditionOrSubtractionPart:
-    def __init__(self, operator: source_lexer.LexerToken, right: 'MultiplicationOrDivision') -> None:
-        super().__init__()
+    __slots__ = ("operator", "offset", "right")
+
+    def __init__(self, operator: Operator, offset: int, right: 'MultiplicationOrDivision') -> None:
         self.operator = operator
+        self.offset = offset
         self.right = right
 
-    def generate_opcodes(self, output: list[Operation]):
-        self.right.generate_opcodes(output)
-
-        if self.operator.plus:
-            output.append(interpreter_operations.Add())
-        elif self.operator.minus:
-            output.append(interpreter_operations.Subtract())
+    def opcode_steps(self) -> list:
+        if self.operator is Operator.PLUS:
+            return [self.right, interpreter_operations.Add()]
+        elif self.operator is Operator.MINUS:
+            return [self.right, interpreter_operations.Subtract()]
         else:
             raise Exception(
                 "Unknown operator encountered in AdditionOrSubtractionPart")
 
+    def generate_opcodes(self, output: list[Operation]):
+        emit_opcodes(self, output)
+
+    def string_parts(self) -> list:
+        return [f"token({self.offset}:{self.operator.value})(", self.right, ")"]
+
     def __str__(self) -> str:
-        return f"{self.operator}({self.right})"
+        return node_to_string(self)
 
 
 class AdditionOrSubtraction(ExecNode):
+    __slots__ = ("start", "rest")
+
     def __init__(self, start: 'MultiplicationOrDivision', rest: list[AdditionOrSubtractionPart]) -> None:
         super().__init__()
         self.start = start
         self.rest = rest
 
-    def generate_opcodes(self, output: list[Operation]):
-        self.start.generate_opcodes(output)
+    def opcode_steps(self) -> list:
+        return [self.start, *self.rest]
 
-        for part in self.rest:
-            part.generate_opcodes(output)
-
-    def __str__(self) -> str:
-        return f"AdditionOrSubtraction({self.start}{',' if len(self.rest) > 0 else ''}{','.join([str(part) for part in self.rest])})"
+    def string_parts(self) -> list:
+        return get_rest_string_parts("AdditionOrSubtraction", self.start, self.rest)
 
 
 class MultiplicationOrDivisionPart:
-    def __init__(self, operator: source_lexer.LexerToken, right: 'Exponentiation') -> None:
-        super().__init__()
+    __slots__ = ("operator", "offset", "right")
+
+    def __init__(self, operator: Operator, offset: int, right: 'Exponentiation') -> None:
         self.operator = operator
+        self.offset = offset
         self.right = right
 
-    def generate_opcodes(self, output: list[Operation]):
-        self.right.generate_opcodes(output)
-
-        if self.operator.multiply:
-            output.append(interpreter_operations.Multiply())
-        elif self.operator.divide:
-            output.append(interpreter_operations.Divide())
-        elif self.operator.percent:
-            output.append(interpreter_operations.Modulus())
+    def opcode_steps(self) -> list:
+        if self.operator is Operator.MULTIPLY:
+            return [self.right, interpreter_operations.Multiply()]
+        elif self.operator is Operator.DIVIDE:
+            return [self.right, interpreter_operations.Divide()]
+        elif self.operator is Operator.PERCENT:
+            return [self.right, interpreter_operations.Modulus()]
         else:
             raise Exception(
                 "Unknown operator encountered in MultiplicationOrDivisionPart")
 
+    def generate_opcodes(self, output: list[Operation]):
+        emit_opcodes(self, output)
+
+    def string_parts(self) -> list:
+        return [f"token({self.offset}:{self.operator.value})(", self.right, ")"]
+
     def __str__(self) -> str:
-        return f"{self.operator}({self.right})"
+        return node_to_string(self)
 
 
 class MultiplicationOrDivision(ExecNode):
+    __slots__ = ("start", "rest")
+
     def __init__(self, start: 'Exponentiation', rest: list[MultiplicationOrDivisionPart]) -> None:
         super().__init__()
         self.start = start
         self.rest = rest
 
-    def generate_opcodes(self, output: list[Operation]):
-        self.start.generate_opcodes(output)
-
-        for part in self.rest:
-            part.generate_opcodes(output)
+    def opcode_steps(self) -> list:
+        return [self.start, *self.rest]
 
-    def __str__(self) -> str:
-        return f"MultiplicationOrDivision({self.start}{',' if len(self.rest) > 0 else ''}{','.join([str(part) for part in self.rest])})"
+    def string_parts(self) -> list:
+        return get_rest_string_parts("MultiplicationOrDivision", self.start, self.rest)
 
 
 class ExponentiationPart:
-    def __init__(self, operator: source_lexer.LexerToken, right: 'Numeric') -> None:
-        super().__init__()
+    __slots__ = ("operator", "offset", "right")
+
+    def __init__(self, operator: Operator, offset: int, right: 'Numeric') -> None:
         self.operator = operator
+        self.offset = offset
         self.right = right
 
-    def generate_opcodes(self, output: list[Operation]):
+    def opcode_steps(self) -> list:
         # Right to left
-        self.right.generate_opcodes(output)
-
-        if self.operator.multiply:
-            output.append(interpreter_operations.Multiply())
-        elif self.operator.divide:
-            output.append(interpreter_operations.Divide())
-        elif self.operator.percent:
-            output.append(interpreter_operations.Modulus())
+        if self.operator is Operator.MULTIPLY:
+            return [self.right, interpreter_operations.Multiply()]
+        elif self.operator is Operator.DIVIDE:
+            return [self.right, interpreter_operations.Divide()]
+        elif self.operator is Operator.PERCENT:
+            return [self.right, interpreter_operations.Modulus()]
         else:
             raise Exception(
                 "Unknown operator encountered in ExponentiationPart")
 
+    def generate_opcodes(self, output: list[Operation]):
+        emit_opcodes(self, output)
+
+    def string_parts(self) -> list:
+        return [f"token({self.offset}:{self.operator.value})(", self.right, ")"]
+
     def __str__(self) -> str:
-        return f"{self.operator}({self.right})"
+        return node_to_string(self)
 
 
 class Exponentiation(ExecNode):
+    __slots__ = ("start", "rest")
+
     def __init__(self, start: 'Numeric', rest: list[ExponentiationPart]) -> None:
         super().__init__()
         self.start = start
         self.rest = rest
 
-    def generate_opcodes(self, output: list[Operation]):
+    def opcode_steps(self) -> list:
         # Right to left
         (reversed_start, reversed_rest) = self.get_reversed_order()
-        reversed_start.generate_opcodes(output)
-
-        for part in reversed_rest:
-            part.generate_opcodes(output)
+        return [reversed_start, *reversed_rest]
 
     def get_reversed_order(self) -> tuple['Numeric', list[ExponentiationPart]]:
         if len(self.rest) == 0:
@@ -198,84 +306,99 @@ class Exponentiation(ExecNode):
 
         start: Numeric = self.rest[-1].right
         rest: list[ExponentiationPart] = []
-        previous_operator: source_lexer.LexerToken = self.rest[-1].operator
+        previous = self.rest[-1]
 
         for i, item in enumerate(self.rest):
             if i == 0:
                 start = item.right
-                previous_operator = item.operator
+                previous = item
             else:
-                rest.append(ExponentiationPart(previous_operator, item.right))
+                rest.append(ExponentiationPart(
+                    previous.operator, previous.offset, item.right))
 
-        rest.append(ExponentiationPart(previous_operator, self.start))
+        rest.append(ExponentiationPart(
+            previous.operator, previous.offset, self.start))
 
         return (start, rest)
 
-    def __str__(self) -> str:
-        return f"Exponentiation({self.start}{',' if len(self.rest) > 0 else ''}{','.join([str(part) for part in self.rest])})"
+    def string_parts(self) -> list:
+        return get_rest_string_parts("Exponentiation", self.start, self.rest)
 
 
 class Numeric(ExecNode):
+    __slots__ = ("number_or_paren_group",)
+
     def __init__(self, number_or_paren_group: Union['Number', 'ParenGroup']) -> None:
         super().__init__()
         self.number_or_paren_group = number_or_paren_group
 
-    def generate_opcodes(self, output: list[Operation]):
-        self.number_or_paren_group.generate_opcodes(output)
+    def opcode_steps(self) -> list:
+        return [self.number_or_paren_group]
 
-    def __str__(self) -> str:
-        return f"Numeric({self.number_or_paren_group})"
+    def string_parts(self) -> list:
+        return ["Numeric(", self.number_or_paren_group, ")"]
 
 
 class Number(ExecNode):
+    __slots__ = ("integer_or_float",)
+
     def __init__(self, integer_or_float: Union['Integer', 'Float']) -> None:
         super().__init__()
         self.integer_or_float = integer_or_float
 
-    def generate_opcodes(self, output: list[Operation]):
-        self.integer_or_float.generate_opcodes(output)
+    def opcode_steps(self) -> list:
+        return [self.integer_or_float]
 
-    def __str__(self) -> str:
-        return f"Number({self.integer_or_float})"
+    def string_parts(self) -> list:
+        return ["Number(", self.integer_or_float, ")"]
 
 
 class Integer(ExecNode):
+    __slots__ = ("value",)
+
     def __init__(self, value: int) -> None:
         super().__init__()
         self.value = value
 
-    def generate_opcodes(self, output: list[Operation]):
-        output.append(interpreter_operations.Integer(self.value))
+    def opcode_steps(self) -> list:
+        return [interpreter_operations.Integer(self.value)]
 
-    def __str__(self) -> str:
-        return f"Integer({self.value})"
+    def string_parts(self) -> list:
+        return [f"Integer({self.value})"]
 
 
 class Float(ExecNode):
+    __slots__ = ("value",)
+
     def __init__(self, value: float) -> None:
         super().__init__()
         self.value = value
 
-    def generate_opcodes(self, output: list[Operation]):
-        output.append(interpreter_operations.Float(self.value))
+    def opcode_steps(self) -> list:
+        return [interpreter_operations.Float(self.value)]
 
-    def __str__(self) -> str:
-        return f"Float({self.value})"
+    def string_parts(self) -> list:
+        return [f"Float({self.value})"]
 
 
 class ParenGroup(ExecNode):
+    __slots__ = ("content",)
+
     def __init__(self, content: BitwiseShift) -> None:
         super().__init__()
         self.content = content
 
-    def generate_opcodes(self, output: list[Operation]):
-        self.content.generate_opcodes(output)
+    def opcode_steps(self) -> list:
+        return [self.content]
 
-    def __str__(self) -> str:
-        return f"({self.content})"
+    def string_parts(self) -> list:
+        return ["(", self.content, ")"]
 
 
 def compile_node(node: ExecNode):
+    """
+    Generate the node's opcodes; a node_arena.NodeArena compiles the same way
+    """
     output: list[Operation] = []
     node.generate_opcodes(output)
     return output
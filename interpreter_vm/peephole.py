@@ -0,0 +1,286 @@
+import math
+from typing import Any, Optional
+
+import interpreter_vm.interpreter_operations as interpreter_operations
+import interpreter_vm.optimizer as optimizer
+from stack_executer.stack_executer import Operation
+
+# the passes run again while a round of them removes something, up to this many rounds
+MAX_ROUNDS = 8
+
+NUMBER_OPERATIONS = (interpreter_operations.Add, interpreter_operations.Subtract,
+                     interpreter_operations.Multiply, interpreter_operations.Modulus)
+SHIFT_OPERATIONS = (interpreter_operations.LeftShift,
+                    interpreter_operations.RightShift)
+BINARY_OPERATIONS = (*NUMBER_OPERATIONS,
+                     interpreter_operations.Divide, *SHIFT_OPERATIONS)
+ADDITIVE_OPERATIONS = (interpreter_operations.Add,
+                       interpreter_operations.Subtract)
+
+# what is known of a value before the code runs: int, float, or None if nothing is
+ValueType = Optional[type]
+
+
+def is_push(operation: Operation) -> bool:
+    return isinstance(operation, interpreter_operations.Integer) or isinstance(operation, interpreter_operations.Float)
+
+
+def make_push(value: int | float) -> Operation:
+    if isinstance(value, float):
+        return interpreter_operations.Float(value)
+
+    return interpreter_operations.Integer(value)
+
+
+def get_result_type(operation: Operation, left: ValueType, right: ValueType) -> ValueType:
+    if left is None or right is None:
+        return None
+    elif isinstance(operation, SHIFT_OPERATIONS):
+        # a float operand stops the code
+        return int if left is int and right is int else None
+    elif isinstance(operation, interpreter_operations.Divide):
+        return float
+
+    return int if left is int and right is int else float
+
+
+class TypeTracker:
+    """
+    The types of the values on the stack after the code seen so far, as far as they can be known before it
+    runs. An operation it doesn't know the effect of ends the tracking.
+    """
+
+    def __init__(self) -> None:
+        self.types: list[ValueType] = []
+        self.temporaries: dict[int, ValueType] = {}
+        self.known = True
+
+    def apply(self, operation: Operation):
+        if not self.known:
+            return
+
+        if is_push(operation):
+            self.types.append(type(operation.value))
+        elif isinstance(operation, BINARY_OPERATIONS):
+            if len(self.types) < 2:
+                # the code stops here
+                self.known = False
+                return
+
+            right = self.types.pop()
+            left = self.types.pop()
+            self.types.append(get_result_type(operation, left, right))
+        elif isinstance(operation, interpreter_operations.StoreTemporary):
+            if len(self.types) == 0:
+                self.known = False
+                return
+
+            self.temporaries[operation.slot] = self.types[-1]
+        elif isinstance(operation, interpreter_operations.LoadTemporary):
+            self.types.append(self.temporaries.get(operation.slot))
+        elif not isinstance(operation, interpreter_operations.Return):
+            self.known = False
+
+    def pop(self):
+        self.types.pop()
+
+    def get(self, depth: int) -> ValueType:
+        """
+        The type of the value this far down the stack, the top being 1
+        """
+        if not self.known or len(self.types) < depth:
+            return None
+
+        return self.types[-depth]
+
+
+class PeepholePass:
+    """
+    A rewrite of the code, looking at the end of what it has output so far as each operation comes in.
+    Rewrites have to leave the result, and any error the VM stops on, as they were.
+    """
+    name = "pass"
+
+    def run(self, code: list[Operation]) -> list[Operation]:
+        output: list[Operation] = []
+        tracker = TypeTracker()
+
+        for operation in code:
+            if not tracker.known or not self.rewrite(output, tracker, operation):
+                emit(output, tracker, operation)
+
+        return output
+
+    def rewrite(self, output: list[Operation], tracker: TypeTracker, operation: Operation) -> bool:
+        """
+        Output the operation in a cheaper form, giving whether it did
+        """
+        return False
+
+
+def emit(output: list[Operation], tracker: TypeTracker, operation: Operation):
+    output.append(operation)
+    tracker.apply(operation)
+
+
+class ConstantFolding(PeepholePass):
+    """
+    Two pushes followed by an operation become a push of its result, unless the VM would raise on it
+    """
+    name = "constant folding"
+
+    def rewrite(self, output: list[Operation], tracker: TypeTracker, operation: Operation) -> bool:
+        if not isinstance(operation, BINARY_OPERATIONS) or len(output) < 2 or \
+                not is_push(output[-2]) or not is_push(output[-1]):
+            return False
+
+        value = optimizer.evaluate(operation, output[-2].value, output[-1].value)
+
+        if value is optimizer.NO_VALUE:
+            return False
+
+        for _ in range(2):
+            output.pop()
+            tracker.pop()
+
+        emit(output, tracker, make_push(value))
+        return True
+
+
+def is_identity(operation: Operation, left: ValueType, right: Any) -> bool:
+    """
+    Whether the operation gives back its left operand, of the type given, when the right one is the value
+    """
+    if left is int:
+        # with a float the result would be a float
+        if type(right) is not int:
+            return False
+        elif isinstance(operation, ADDITIVE_OPERATIONS) or isinstance(operation, SHIFT_OPERATIONS):
+            return right == 0
+        elif isinstance(operation, interpreter_operations.Multiply):
+            return right == 1
+    elif left is float:
+        # -0.0 + 0 is 0.0, so adding isn't one, and a shift would raise
+        if isinstance(operation, interpreter_operations.Subtract):
+            return right == 0 and math.copysign(1, right) > 0
+        elif isinstance(operation, interpreter_operations.Multiply) or isinstance(operation, interpreter_operations.Divide):
+            return right == 1
+
+    return False
+
+
+class IdentityElimination(PeepholePass):
+    """
+    Drops a push and the operation after it when they leave the value below unchanged, like + 0 on an
+    integer or * 1
+    """
+    name = "identity elimination"
+
+    def rewrite(self, output: list[Operation], tracker: TypeTracker, operation: Operation) -> bool:
+        if not isinstance(operation, BINARY_OPERATIONS) or len(output) < 1 or not is_push(output[-1]) or \
+                not is_identity(operation, tracker.get(2), output[-1].value):
+            return False
+
+        output.pop()
+        tracker.pop()
+        return True
+
+
+def combine(first: Operation, first_value: int, second: Operation, second_value: int) -> Optional[tuple[Operation, int]]:
+    """
+    The one integer operation, followed by its operand, doing what the two do one after the other to an
+    integer, if there is one
+    """
+    if isinstance(first, ADDITIVE_OPERATIONS) and isinstance(second, ADDITIVE_OPERATIONS):
+        value = (first_value if isinstance(first, interpreter_operations.Add) else -first_value) + \
+            (second_value if isinstance(second, interpreter_operations.Add) else -second_value)
+
+        if value < 0:
+            return interpreter_operations.Subtract(), -value
+
+        return interpreter_operations.Add(), value
+    elif isinstance(first, interpreter_operations.Multiply) and isinstance(second, interpreter_operations.Multiply):
+        value = optimizer.evaluate(second, first_value, second_value)
+
+        if value is not optimizer.NO_VALUE:
+            return interpreter_operations.Multiply(), value
+    elif type(first) is type(second) and isinstance(first, SHIFT_OPERATIONS) and first_value >= 0 and second_value >= 0:
+        # a negative count would raise
+        return type(first)(), first_value + second_value
+
+    return None
+
+
+class ChainCombining(PeepholePass):
+    """
+    Two integer operations with constant operands in a row, like + 2 - 5 or << 1 << 3, become one
+    """
+    name = "chain combining"
+
+    def rewrite(self, output: list[Operation], tracker: TypeTracker, operation: Operation) -> bool:
+        if not isinstance(operation, BINARY_OPERATIONS) or len(output) < 3:
+            return False
+
+        (first_push, first, second_push) = output[-3:]
+
+        # an integer result means the value they apply to is one too
+        if not is_push(first_push) or not is_push(second_push) or type(first_push.value) is not int or \
+                type(second_push.value) is not int or tracker.get(2) is not int:
+            return False
+
+        combined = combine(first, first_push.value,
+                           operation, second_push.value)
+
+        if combined is None:
+            return False
+
+        for _ in range(3):
+            output.pop()
+
+        tracker.pop()
+        tracker.pop()
+        tracker.types.append(int)
+
+        (combined_operation, value) = combined
+        emit(output, tracker, make_push(value))
+        emit(output, tracker, combined_operation)
+        return True
+
+
+def get_default_passes() -> list[PeepholePass]:
+    return [ConstantFolding(), IdentityElimination(), ChainCombining()]
+
+
+class PeepholeOptimizer:
+    """
+    Runs its passes over compiled code in turn, until a round of them removes nothing, counting the
+    instructions each one removed
+    """
+
+    def __init__(self, passes: Optional[list[PeepholePass]] = None, max_rounds: int = MAX_ROUNDS) -> None:
+        self.passes = passes if passes is not None else get_default_passes()
+        self.max_rounds = max_rounds
+        self.removed: dict[str, int] = {
+            peephole_pass.name: 0 for peephole_pass in self.passes}
+        self.rounds = 0
+
+    def optimize(self, code: list[Operation]) -> list[Operation]:
+        for _ in range(self.max_rounds):
+            self.rounds += 1
+            start = len(code)
+
+            for peephole_pass in self.passes:
+                before = len(code)
+                code = peephole_pass.run(code)
+                self.removed[peephole_pass.name] += before - len(code)
+
+            if len(code) == start:
+                break
+
+        return code
+
+    def report(self) -> str:
+        lines = [f"  {name:<24} {removed} removed" for (
+            name, removed) in self.removed.items()]
+        lines.append(f"  {'rounds':<24} {self.rounds}")
+        return "\n".join(lines)
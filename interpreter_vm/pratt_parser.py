@@ -0,0 +1,289 @@
+from typing import Any, NamedTuple, Optional
+
+import basic_interpreter.source_lexer as source_lexer
+import interpreter_vm.cursor_parser as cursor_parser
+import interpreter_vm.parser_node as parser_node
+
+FAILED = cursor_parser.FAILED
+
+
+class Level(NamedTuple):
+    """
+    A precedence level: the bits of its operator characters, how many times the character is repeated
+    in the operator, and the nodes it builds
+    """
+    mask: int
+    width: int
+    node: type
+    part: type
+
+
+# lowest precedence first, every level is left associative
+LEVELS: tuple[Level, ...] = (
+    Level(cursor_parser.SHIFT_MASK, 2,
+          parser_node.BitwiseShift, parser_node.BitwiseShiftPart),
+    Level(cursor_parser.ADDITION_MASK, 1,
+          parser_node.AdditionOrSubtraction, parser_node.AdditionOrSubtractionPart),
+    Level(cursor_parser.MULTIPLICATION_MASK, 1,
+          parser_node.MultiplicationOrDivision, parser_node.MultiplicationOrDivisionPart),
+    Level(source_lexer.MULTIPLY, 2,
+          parser_node.Exponentiation, parser_node.ExponentiationPart),
+)
+
+
+def get_operator_levels() -> dict[int, tuple[int, ...]]:
+    """
+    For each operator character's bit, the levels it can start an operator of, tightest binding first
+    """
+    operator_levels: dict[int, tuple[int, ...]] = {}
+
+    for level_index in range(len(LEVELS) - 1, -1, -1):
+        for bit in source_lexer.CHARACTER_BITS.values():
+            if bit & LEVELS[level_index].mask:
+                operator_levels[bit] = operator_levels.get(
+                    bit, ()) + (level_index,)
+
+    return operator_levels
+
+
+OPERATOR_LEVELS = get_operator_levels()
+# the keys are distinct bits, so their sum is the mask of every operator character
+OPERATOR_MASK = sum(OPERATOR_LEVELS)
+# what each level expected where no operator follows an operand, worded like the descent parser's issues
+OPERATOR_ISSUES = ("Expected '<' or >'", "Expected '+' or '-'",
+                   "Expected '*' or '/' or '%'", "Expected '**'")
+
+
+class LevelAccumulator:
+    """
+    The operands and operators collected so far for one level's node
+    """
+
+    def __init__(self, level: Level) -> None:
+        self.level = level
+        self.start: Any = None
+        self.rest: list[Any] = []
+        self.operator: Optional[parser_node.Operator] = None
+        self.operator_offset = 0
+
+    def add(self, operand: Any):
+        if self.start is None:
+            self.start = operand
+        else:
+            self.rest.append(self.level.part(
+                self.operator, self.operator_offset, operand))
+
+    def close(self, operand: Any) -> Any:
+        """
+        Add the last operand and build the level's node
+        """
+        self.add(operand)
+        node = self.level.node(self.start, self.rest)
+        self.start = None
+        self.rest = []
+        return node
+
+
+class PrattFrame:
+    """
+    An expression being parsed, the whole input's or a paren group's
+    """
+
+    def __init__(self) -> None:
+        self.accumulators = [LevelAccumulator(level) for level in LEVELS]
+        # the last operand, not yet added to a level, and the index after it
+        self.value: Any = None
+        self.end = FAILED
+        # the operator waiting for its right operand
+        self.level_index: Optional[int] = None
+        self.operator: Optional[parser_node.Operator] = None
+        self.operator_offset = 0
+
+    def add_operand(self, value: Any, end: int):
+        if self.level_index is not None:
+            # the levels that bind tighter than the operator are complete
+            for closed_index in range(len(LEVELS) - 1, self.level_index, -1):
+                self.value = self.accumulators[closed_index].close(self.value)
+
+            self.accumulators[self.level_index].add(self.value)
+            self.accumulators[self.level_index].operator = self.operator
+            self.accumulators[self.level_index].operator_offset = self.operator_offset
+            self.level_index = None
+            self.operator = None
+
+        self.value = value
+        self.end = end
+
+    def close(self) -> Any:
+        value = self.value
+
+        for accumulator in reversed(self.accumulators):
+            value = accumulator.close(value)
+
+        return value
+
+
+class PrattParser(cursor_parser.CursorParser):
+    """
+    The cursor parser with the operator levels parsed by precedence climbing over the LEVELS table.
+
+    A number goes through one loop instead of a call per level, and adding a level is adding a row to the table.
+    The same n-ary nodes are built by keeping an accumulator per level. Paren groups push a frame on an
+    explicit stack instead of recursing, so nesting is only limited by memory.
+
+    With diagnostics True, what was expected where the parse stopped is recorded in the state's issues.
+    """
+
+    def __init__(self, state: Any, diagnostics: bool = False) -> None:
+        super().__init__(state)
+        self.diagnostics = diagnostics
+
+    def raise_issue(self, index: int, issue: str):
+        self.state.get_at(index).raise_issue(issue)
+
+    def expect_operator(self, index: int, in_paren_group: bool):
+        """
+        Record the issues for an operand not followed by an operator at the index
+        """
+        mask = self.state.get_mask_at(index)
+
+        if mask & OPERATOR_MASK:
+            # the first character of a two character operator
+            self.raise_issue(
+                index + 1, f"Expected '{self.state.get_text(index + 1, index)}'")
+            return
+
+        for issue in reversed(OPERATOR_ISSUES):
+            self.raise_issue(index, issue)
+
+        if in_paren_group:
+            self.raise_issue(index, "Expected ')'")
+
+    def get_operator_level(self, index: int) -> Optional[int]:
+        """
+        The level of the operator at the index, trying the tightest binding levels first so '**' wins over '*'
+        """
+        bit = self.state.get_mask_at(index) & OPERATOR_MASK
+
+        if not bit:
+            return None
+
+        for level_index in OPERATOR_LEVELS[bit]:
+            if LEVELS[level_index].width == 1 or self.state.get_mask_at(index + 1) & bit:
+                return level_index
+
+        return None
+
+    def create_frame(self) -> PrattFrame:
+        return PrattFrame()
+
+    def get_operand_value(self) -> Any:
+        """
+        The operand for the number parse_number left in value
+        """
+        return parser_node.Numeric(self.value)
+
+    def get_paren_group_value(self, value: Any) -> Any:
+        return parser_node.Numeric(parser_node.ParenGroup(value))
+
+    def parse_expresion(self, index: int) -> int:
+        index = self.state.get_whitespace_run_end(index)
+
+        if not self.state.get_mask_at(index) & source_lexer.EQUALS:
+            if self.diagnostics:
+                self.raise_issue(index, "Expected '='")
+
+            return FAILED
+
+        index = self.parse_bitwise_shift(
+            self.state.get_whitespace_run_end(index + 1))
+
+        if index == FAILED:
+            return FAILED
+
+        # like the descent parser, trailing whitespace isn't part of the expression
+        if not self.state.get_at(index).is_end():
+            if self.diagnostics:
+                self.raise_issue(index, "Expected end of file")
+
+            return FAILED
+
+        self.value = parser_node.Expresion(self.value)
+        return index
+
+    def parse_bitwise_shift(self, index: int) -> int:
+        parents: list[PrattFrame] = []
+        frame = self.create_frame()
+
+        while True:
+            # open a frame for each paren in front of the next operand
+            while self.state.get_mask_at(index) & source_lexer.OPEN_PAREN:
+                parents.append(frame)
+                frame = self.create_frame()
+                index = self.state.get_whitespace_run_end(index + 1)
+
+            end = self.parse_number(index)
+            value = self.get_operand_value() if end != FAILED else None
+
+            if end == FAILED and self.diagnostics:
+                self.raise_issue(index, "Expected number or paren group")
+
+            while True:
+                if end != FAILED:
+                    frame.add_operand(value, end)
+                    operator_index = self.state.get_whitespace_run_end(end)
+                    level_index = self.get_operator_level(operator_index)
+
+                    if level_index is not None:
+                        frame.level_index = level_index
+                        frame.operator = self.get_operator(
+                            operator_index, LEVELS[level_index].mask)
+                        frame.operator_offset = operator_index
+                        index = self.state.get_whitespace_run_end(
+                            operator_index + LEVELS[level_index].width)
+                        break
+
+                    if self.diagnostics:
+                        self.expect_operator(operator_index, len(parents) > 0)
+                elif frame.value is None:
+                    # without a first operand the frame's expression fails, and so does the operand it is part of
+                    if len(parents) == 0:
+                        return FAILED
+
+                    frame = parents.pop()
+                    continue
+
+                # like the descent parser, an operator without an operand ends the expression before it
+                (value, end) = (frame.close(), frame.end)
+
+                if len(parents) == 0:
+                    self.value = value
+                    return end
+
+                close_index = self.state.get_whitespace_run_end(end)
+
+                if self.state.get_mask_at(close_index) & source_lexer.CLOSE_PAREN:
+                    value = self.get_paren_group_value(value)
+                    end = close_index + 1
+                else:
+                    end = FAILED
+
+                frame = parents.pop()
+
+
+def parse_pratt(state: Any, diagnostics: bool = False) -> Optional[tuple[parser_node.Expresion, int]]:
+    """
+    Parse from the state by precedence climbing, giving the AST and the index after it, or None if it isn't
+    a valid expression. With diagnostics True the issues of a failure are recorded in the state's.
+    """
+    parser = PrattParser(state, diagnostics)
+
+    try:
+        end = parser.parse_expresion(state.index)
+    except (IndexError, RecursionError):
+        return None
+
+    if end == FAILED:
+        return None
+
+    return (parser.value, end)
@@ -1,9 +1,18 @@
-from typing import TypeVar, Generic, Callable, Optional
+from typing import Any, TypeVar, Generic, Callable, Iterable, Iterator, Optional
 from enum import Enum
 
 import basic_interpreter.input_tokens as input_tokens
+import basic_interpreter.bulk_lexer as bulk_lexer
+import basic_interpreter.line_index as line_index
 import basic_interpreter.source_lexer as source_lexer
+import interpreter_vm.common_subexpressions as common_subexpressions
+import interpreter_vm.cursor_parser as cursor_parser
+import interpreter_vm.direct_compiler as direct_compiler
+import interpreter_vm.node_arena as node_arena
+import interpreter_vm.parser_generator as parser_generator
 import interpreter_vm.parser_node as parser_node
+import interpreter_vm.pratt_parser as pratt_parser
+import interpreter_vm.token_parser as token_parser
 
 """
 Expresion -> '=' BitwiseShift $
@@ -43,7 +52,7 @@ class ParseResult(Generic[T]):
 
 
 class ParseIssue:
-    def __init__(self, start: 'ParseState', issue: Exception, next: Optional['ParseState'] = None) -> None:
+    def __init__(self, start: 'ParseState', issue: Exception | str, next: Optional['ParseState'] = None) -> None:
         super().__init__()
         self.start = start
         self.issue = issue
@@ -54,34 +63,108 @@ class ParseIssue:
 
 
 class ParseIssues:
-    def __init__(self) -> None:
+    """
+    The issues of one parse. Only the issues at the farthest index reached are kept, since those are the ones
+    reported; when enabled is False nothing is recorded at all.
+    """
+
+    def __init__(self, enabled: bool = True) -> None:
         super().__init__()
+        self.enabled = enabled
+        self.index = -1
         self.issues: list[ParseIssue] = []
 
-    def add_issue(self, start: 'ParseState', issue: Exception, next: Optional['ParseState'] = None):
+    def add_issue(self, start: 'ParseState', issue: Exception | str, next: Optional['ParseState'] = None):
+        if not self.enabled or start.index < self.index:
+            return
+
+        if start.index > self.index:
+            self.index = start.index
+            self.issues = []
+
         self.issues.append(ParseIssue(start, issue, next))
 
 
+LexerTokens = list[source_lexer.LexerToken] | source_lexer.LexerTokenStream | source_lexer.LookaheadTokens
+
+
+class ParseContext:
+    """
+    Data shared by every state of a parse
+    """
+
+    def __init__(self, bulk: Optional[bulk_lexer.BulkLexResult] = None, line_number: int = 1) -> None:
+        self.bulk = bulk
+        self.line_index: Optional[line_index.LineIndex] = None
+        self.whitespace_runs: Optional[source_lexer.WhitespaceRuns] = None
+        # the line the tokens start on, when they are one statement of a larger source
+        self.line_number = line_number
+
+
 class ParseState:
-    def __init__(self, lexer_tokens: list[source_lexer.LexerToken], index: int = 0, issues: ParseIssues = ParseIssues()) -> None:
+    def __init__(self, lexer_tokens: LexerTokens | input_tokens.TokenStream, index: int = 0, issues: Optional[ParseIssues] = None, context: Optional[ParseContext] = None) -> None:
+        if isinstance(lexer_tokens, input_tokens.TokenStream):
+            lexer_tokens = source_lexer.LexerTokenStream(lexer_tokens)
+
         self.lexer_tokens = lexer_tokens
         self.index = index
-        self.issues = issues
+        self.issues = issues if issues is not None else ParseIssues()
+        self.context = context if context is not None else ParseContext()
 
     def get_token(self):
         return self.lexer_tokens[self.index]
 
+    def get_c(self) -> str:
+        """
+        Get the current character, reading a token stream's source directly
+        """
+        if isinstance(self.lexer_tokens, source_lexer.LexerTokenStream):
+            return self.lexer_tokens.tokens.char_at(self.index)
+
+        return self.get_token().token.c
+
+    def get_mask(self) -> int:
+        """
+        Get the character class bitmask of the current character
+        """
+        return self.get_mask_at(self.index)
+
+    def get_mask_at(self, index: int) -> int:
+        if isinstance(self.lexer_tokens, source_lexer.LexerTokenStream):
+            return source_lexer.get_character_class(self.lexer_tokens.tokens.char_at(index)).mask
+
+        return self.lexer_tokens[index].character_class.mask
+
     def is_char(self, c: str):
-        return self.get_token().token.c == c
+        return self.get_c() == c
 
     def is_one_of_chars(self, options: list[str]):
+        mask = source_lexer.get_options_mask(tuple(options))
+
+        if mask is not None:
+            return self.get_c() if self.get_mask() & mask else None
+
         return next((c for c in options if self.is_char(c)), None)
 
     def is_end(self):
         return isinstance(self.get_token().token, input_tokens.EndOfStream)
 
     def get_next(self):
-        return ParseState(self.lexer_tokens, self.index + 1, self.issues)
+        return ParseState(self.lexer_tokens, self.index + 1, self.issues, self.context)
+
+    def get_at(self, index: int):
+        return ParseState(self.lexer_tokens, index, self.issues, self.context)
+
+    def get_text(self, end: int, start: Optional[int] = None) -> str:
+        """
+        Get the source text from this state, or from the start index, up to the end index
+        """
+        start = self.index if start is None else start
+
+        if isinstance(self.lexer_tokens, source_lexer.LexerTokenStream):
+            return self.lexer_tokens.tokens.text(start, end)
+
+        return ''.join([token.token.c for token in self.lexer_tokens[start:end]])
 
     def get_success(self):
         return ParseResult(self, ParseResultType.SUCCESS, self.get_token(), self.get_next())
@@ -96,13 +179,13 @@ class ParseState:
             return self.get_failure()
 
     def get_digit(self):
-        if self.get_token().digit:
+        if self.get_mask() & source_lexer.DIGIT:
             return self.get_success()
         else:
             return self.get_failure()
 
     def get_whitespace(self):
-        if self.get_token().whitespace:
+        if self.get_mask() & source_lexer.WHITESPACE:
             return self.get_success()
         else:
             return self.get_failure()
@@ -113,26 +196,95 @@ class ParseState:
         else:
             return self.get_failure()
 
-    def raise_issue(self, issue: Exception, next: Optional['ParseState'] = None):
+    def get_digit_run_end(self, start: Optional[int] = None) -> int:
+        """
+        Find where the run of digits starting here, or at the start index, ends
+        """
+        index = self.index if start is None else start
+        bulk = self.context.bulk
+
+        if bulk is not None:
+            return bulk.get_digit_run_end(index)
+
+        while self.get_mask_at(index) & source_lexer.DIGIT:
+            index += 1
+
+        return index
+
+    def get_whitespace_runs(self) -> Optional[source_lexer.WhitespaceRuns]:
+        """
+        Get the source's whitespace runs, found once and shared by every state.
+        There are none when only a lookahead window of the source is available.
+        """
+        if self.context.whitespace_runs is None and not isinstance(self.lexer_tokens, source_lexer.LookaheadTokens):
+            self.context.whitespace_runs = source_lexer.index_whitespace_runs(
+                get_source(self.lexer_tokens))
+
+        return self.context.whitespace_runs
+
+    def get_whitespace_run_end(self, start: Optional[int] = None) -> int:
+        """
+        Find where the run of whitespace starting here, or at the start index, ends
+        """
+        index = self.index if start is None else start
+        bulk = self.context.bulk
+
+        if bulk is not None:
+            return bulk.get_whitespace_run_end(index)
+
+        if not self.get_mask_at(index) & source_lexer.WHITESPACE:
+            return index
+
+        runs = self.get_whitespace_runs()
+
+        if runs is not None:
+            run_end = runs.get_run_end(index)
+
+            if run_end is not None:
+                return run_end
+
+        while self.get_mask_at(index) & source_lexer.WHITESPACE:
+            index += 1
+
+        return index
+
+    def get_whitespace_run(self) -> 'ParseResult[None]':
+        """
+        Skip zero or more whitespace characters in one step
+        """
+        end = self.get_whitespace_run_end()
+
+        if end == self.index:
+            return ParseResult(self, ParseResultType.SUCCESS, None, self)
+
+        return ParseResult(self, ParseResultType.SUCCESS, None, self.get_at(end))
+
+    def raise_issue(self, issue: Exception | str, next: Optional['ParseState'] = None):
         self.issues.add_issue(self, issue, next)
 
+    def get_line_index(self) -> line_index.LineIndex:
+        """
+        Get the line index of the source, built once and shared by every state
+        """
+        if self.context.line_index is None:
+            if isinstance(self.lexer_tokens, source_lexer.LexerTokenStream):
+                self.context.line_index = self.lexer_tokens.tokens.get_line_index()
+            elif isinstance(self.lexer_tokens, source_lexer.LookaheadTokens):
+                self.context.line_index = self.lexer_tokens.line_index
+            else:
+                self.context.line_index = line_index.index_tokens(
+                    token.token for token in self.lexer_tokens)
+
+        return self.context.line_index
+
     def get_line_number(self):
-        return len([token for token in self.lexer_tokens[:self.index] if token.token.c == '\n']) + 1
+        return self.get_line_index().get_line_number(self.index) + self.context.line_number - 1
 
     def get_column_number(self):
-        for i, token in enumerate(reversed(self.lexer_tokens[:self.index])):
-            if token.token.c == '\n':
-                return i + 1
-
-        return self.index + 1
+        return self.get_line_index().get_column_number(self.index)
 
     def get_last_issues(self) -> list[ParseIssue]:
-        if len(self.issues.issues) == 0:
-            return []
-
-        issue_index = sorted(
-            (issue.start.index for issue in self.issues.issues), reverse=True)[0]
-        return [issue for issue in self.issues.issues if issue.start.index == issue_index]
+        return self.issues.issues
 
 
 def get_not(parse_result: ParseResult[T]):
@@ -224,6 +376,9 @@ def debug_wrapper(func: Callable[[ParseState], ParseResult[None] | ParseResult[T
     def wrapper(state: ParseState) -> ParseResult[None] | ParseResult[T]:
         try:
             return func(state)
+        except RecursionError:
+            # the whole parse is redone without recursing, see parse_state
+            raise
         except Exception as e:
             state.raise_issue(e)
             return ParseResult(state, ParseResultType.FAILURE, None, state)
@@ -236,8 +391,7 @@ def parse_expresion(state: ParseState):
     """
     Expresion -> \\s* '=' \\s* BitwiseShift $
     """
-    leading_whitespace_part = get_zero_or_more(
-        state, lambda x: x.get_whitespace())
+    leading_whitespace_part = state.get_whitespace_run()
 
     # did it match?
     if leading_whitespace_part.type == ParseResultType.FAILURE:
@@ -248,11 +402,10 @@ def parse_expresion(state: ParseState):
     # did it match?
     if operator_part.type == ParseResultType.FAILURE:
         leading_whitespace_part.next.raise_issue(
-            Exception("Expected '='"), state)
+            "Expected '='", state)
         return ParseResult(state, ParseResultType.FAILURE, None, state)
 
-    whitespace_part = get_zero_or_more(
-        operator_part.next, lambda x: x.get_whitespace())
+    whitespace_part = operator_part.next.get_whitespace_run()
 
     # did it match?
     if whitespace_part.type == ParseResultType.FAILURE:
@@ -263,21 +416,20 @@ def parse_expresion(state: ParseState):
     # did it match?
     if value_part.type == ParseResultType.FAILURE or value_part.value is None:
         whitespace_part.next.raise_issue(
-            Exception("Expected bitwise shift"), state)
+            "Expected bitwise shift", state)
         return ParseResult(state, ParseResultType.FAILURE, None, state)
 
     if value_part.next.is_end():
         return ParseResult(state, ParseResultType.SUCCESS, parser_node.Expresion(value_part.value), value_part.next)
     else:
-        value_part.next.raise_issue(Exception("Expected end of file"), state)
+        value_part.next.raise_issue("Expected end of file", state)
         return ParseResult(state, ParseResultType.FAILURE, None, state)
         # raise Exception("Expected end of file!")
 
 
 @debug_wrapper
 def parse_bitwise_shift_part(state: ParseState):
-    leading_whitespace_part = get_zero_or_more(
-        state, lambda x: x.get_whitespace())
+    leading_whitespace_part = state.get_whitespace_run()
 
     # did it match?
     if leading_whitespace_part.type == ParseResultType.FAILURE:
@@ -288,7 +440,7 @@ def parse_bitwise_shift_part(state: ParseState):
     # did it match?
     if operator_part.type == ParseResultType.FAILURE:
         leading_whitespace_part.next.raise_issue(
-            Exception("Expected '<' or >'"), state)
+            "Expected '<' or >'", state)
         return ParseResult(state, ParseResultType.FAILURE, None, state)
 
     operator_part2 = operator_part.next.get_char(operator_part.value.token.c)
@@ -296,11 +448,10 @@ def parse_bitwise_shift_part(state: ParseState):
     # did it match?
     if operator_part2.type == ParseResultType.FAILURE:
         operator_part.next.raise_issue(
-            Exception(f"Expected '{operator_part.value.token.c}'"), state)
+            f"Expected '{operator_part.value.token.c}'", state)
         return ParseResult(state, ParseResultType.FAILURE, None, state)
 
-    whitespace_part = get_zero_or_more(
-        operator_part2.next, lambda x: x.get_whitespace())
+    whitespace_part = operator_part2.next.get_whitespace_run()
 
     # did it match?
     if whitespace_part.type == ParseResultType.FAILURE:
@@ -311,10 +462,10 @@ def parse_bitwise_shift_part(state: ParseState):
     # did it match?
     if right_part.type == ParseResultType.FAILURE or right_part.value is None:
         whitespace_part.next.raise_issue(
-            Exception("Expected addition or subtraction"), state)
+            "Expected addition or subtraction", state)
         return ParseResult(state, ParseResultType.FAILURE, None, state)
 
-    return ParseResult(state, ParseResultType.SUCCESS, parser_node.BitwiseShiftPart(operator_part.value, right_part.value), right_part.next)
+    return ParseResult(state, ParseResultType.SUCCESS, parser_node.BitwiseShiftPart(parser_node.Operator.of(operator_part.value), operator_part.value.token.offset, right_part.value), right_part.next)
 
 
 @debug_wrapper
@@ -326,7 +477,7 @@ def parse_bitwise_shift(state: ParseState) -> ParseResult[None] | ParseResult[pa
 
     if start_part.type == ParseResultType.FAILURE or start_part.value is None:
         state.raise_issue(
-            Exception("Expected addition or subtraction"), state)
+            "Expected addition or subtraction", state)
         return ParseResult(state, ParseResultType.FAILURE, None, state)
 
     rest_part = get_zero_or_more(
@@ -346,8 +497,7 @@ def parse_bitwise_shift(state: ParseState) -> ParseResult[None] | ParseResult[pa
 
 @debug_wrapper
 def parse_addition_or_subtraction_part(state: ParseState):
-    leading_whitespace_part = get_zero_or_more(
-        state, lambda x: x.get_whitespace())
+    leading_whitespace_part = state.get_whitespace_run()
 
     # did it match?
     if leading_whitespace_part.type == ParseResultType.FAILURE:
@@ -358,11 +508,10 @@ def parse_addition_or_subtraction_part(state: ParseState):
     # did it match?
     if operator_part.type == ParseResultType.FAILURE:
         leading_whitespace_part.next.raise_issue(
-            Exception("Expected '+' or '-'"), state)
+            "Expected '+' or '-'", state)
         return ParseResult(state, ParseResultType.FAILURE, None, state)
 
-    whitespace_part = get_zero_or_more(
-        operator_part.next, lambda x: x.get_whitespace())
+    whitespace_part = operator_part.next.get_whitespace_run()
 
     # did it match?
     if whitespace_part.type == ParseResultType.FAILURE:
@@ -373,10 +522,10 @@ def parse_addition_or_subtraction_part(state: ParseState):
     # did it match?
     if right_part.type == ParseResultType.FAILURE or right_part.value is None:
         whitespace_part.next.raise_issue(
-            Exception("Expected multiplication or division"), state)
+            "Expected multiplication or division", state)
         return ParseResult(state, ParseResultType.FAILURE, None, state)
 
-    return ParseResult(state, ParseResultType.SUCCESS, parser_node.AdditionOrSubtractionPart(operator_part.value, right_part.value), right_part.next)
+    return ParseResult(state, ParseResultType.SUCCESS, parser_node.AdditionOrSubtractionPart(parser_node.Operator.of(operator_part.value), operator_part.value.token.offset, right_part.value), right_part.next)
 
 
 @debug_wrapper
@@ -388,7 +537,7 @@ def parse_addition_or_subtraction(state: ParseState) -> ParseResult[None] | Pars
 
     if start_part.type == ParseResultType.FAILURE or start_part.value is None:
         state.raise_issue(
-            Exception("Expected multiplication or division"), state)
+            "Expected multiplication or division", state)
         return ParseResult(state, ParseResultType.FAILURE, None, state)
 
     rest_part = get_zero_or_more(
@@ -408,8 +557,7 @@ def parse_addition_or_subtraction(state: ParseState) -> ParseResult[None] | Pars
 
 @debug_wrapper
 def parse_multiplication_or_division_part(state: ParseState):
-    leading_whitespace_part = get_zero_or_more(
-        state, lambda x: x.get_whitespace())
+    leading_whitespace_part = state.get_whitespace_run()
 
     # did it match?
     if leading_whitespace_part.type == ParseResultType.FAILURE:
@@ -421,11 +569,10 @@ def parse_multiplication_or_division_part(state: ParseState):
     # did it match?
     if operator_part.type == ParseResultType.FAILURE:
         leading_whitespace_part.next.raise_issue(
-            Exception("Expected '*' or '/' or '%'"), state)
+            "Expected '*' or '/' or '%'", state)
         return ParseResult(state, ParseResultType.FAILURE, None, state)
 
-    whitespace_part = get_zero_or_more(
-        operator_part.next, lambda x: x.get_whitespace())
+    whitespace_part = operator_part.next.get_whitespace_run()
 
     # did it match?
     if whitespace_part.type == ParseResultType.FAILURE:
@@ -436,10 +583,10 @@ def parse_multiplication_or_division_part(state: ParseState):
     # did it match?
     if right_part.type == ParseResultType.FAILURE or right_part.value is None:
         whitespace_part.next.raise_issue(
-            Exception("Expected exponentiation"), state)
+            "Expected exponentiation", state)
         return ParseResult(state, ParseResultType.FAILURE, None, state)
 
-    return ParseResult(state, ParseResultType.SUCCESS, parser_node.MultiplicationOrDivisionPart(operator_part.value, right_part.value), right_part.next)
+    return ParseResult(state, ParseResultType.SUCCESS, parser_node.MultiplicationOrDivisionPart(parser_node.Operator.of(operator_part.value), operator_part.value.token.offset, right_part.value), right_part.next)
 
 
 @debug_wrapper
@@ -450,7 +597,7 @@ def parse_multiplication_or_division(state: ParseState) -> ParseResult[None] | P
     start_part = parse_exponentiation(state)
 
     if start_part.type == ParseResultType.FAILURE or start_part.value is None:
-        state.raise_issue(Exception("Expected exponentiation"), state)
+        state.raise_issue("Expected exponentiation", state)
         return ParseResult(state, ParseResultType.FAILURE, None, state)
 
     rest_part = get_zero_or_more(
@@ -469,8 +616,7 @@ def parse_multiplication_or_division(state: ParseState) -> ParseResult[None] | P
 
 
 def parse_exponentiation_part(state: ParseState):
-    leading_whitespace_part = get_zero_or_more(
-        state, lambda x: x.get_whitespace())
+    leading_whitespace_part = state.get_whitespace_run()
 
     # did it match?
     if leading_whitespace_part.type == ParseResultType.FAILURE:
@@ -481,7 +627,7 @@ def parse_exponentiation_part(state: ParseState):
     # did it match?
     if operator_part.type == ParseResultType.FAILURE:
         leading_whitespace_part.next.raise_issue(
-            Exception("Expected '**'"), state)
+            "Expected '**'", state)
         return ParseResult(state, ParseResultType.FAILURE, None, state)
 
     operator_part2 = operator_part.next.get_char('*')
@@ -489,11 +635,10 @@ def parse_exponentiation_part(state: ParseState):
     # did it match?
     if operator_part2.type == ParseResultType.FAILURE:
         operator_part.next.raise_issue(
-            Exception("Expected '*'"), state)
+            "Expected '*'", state)
         return ParseResult(state, ParseResultType.FAILURE, None, state)
 
-    whitespace_part = get_zero_or_more(
-        operator_part2.next, lambda x: x.get_whitespace())
+    whitespace_part = operator_part2.next.get_whitespace_run()
 
     # did it match?
     if whitespace_part.type == ParseResultType.FAILURE:
@@ -503,10 +648,10 @@ def parse_exponentiation_part(state: ParseState):
 
     # did it match?
     if right_part.type == ParseResultType.FAILURE or right_part.value is None:
-        whitespace_part.next.raise_issue(Exception("Expected numeric"), state)
+        whitespace_part.next.raise_issue("Expected numeric", state)
         return ParseResult(state, ParseResultType.FAILURE, None, state)
 
-    return ParseResult(state, ParseResultType.SUCCESS, parser_node.ExponentiationPart(operator_part.value, right_part.value), right_part.next)
+    return ParseResult(state, ParseResultType.SUCCESS, parser_node.ExponentiationPart(parser_node.Operator.of(operator_part.value), operator_part.value.token.offset, right_part.value), right_part.next)
 
 
 def parse_exponentiation(state: ParseState):
@@ -516,7 +661,7 @@ def parse_exponentiation(state: ParseState):
     start_part = parse_numeric(state)
 
     if start_part.type == ParseResultType.FAILURE or start_part.value is None:
-        state.raise_issue(Exception("Expected numeric"), state)
+        state.raise_issue("Expected numeric", state)
         return ParseResult(state, ParseResultType.FAILURE, None, state)
 
     rest_part = get_zero_or_more(
@@ -546,7 +691,7 @@ def parse_numeric(state: ParseState):
 
         if paren_group_part.type == ParseResultType.FAILURE or paren_group_part.value is None:
             state.raise_issue(
-                Exception("Expected number or paren group"), state)
+                "Expected number or paren group", state)
             return ParseResult(state, ParseResultType.FAILURE, None, state)
         else:
             return ParseResult(state, ParseResultType.SUCCESS, parser_node.Numeric(paren_group_part.value), paren_group_part.next)
@@ -559,95 +704,26 @@ def parse_number(state: ParseState):
     """
     Number -> Float | Integer
     """
-    # part = get_choose(state,
-    #                   lambda x: parse_integer(x),
-    #                   lambda x: parse_float(x))
-
-    float_part = parse_float(state)
-
-    if float_part.type == ParseResultType.FAILURE or float_part.value is None:
-        integer_part = parse_integer(state)
-
-        if integer_part.type == ParseResultType.FAILURE or integer_part.value is None:
-            state.raise_issue(Exception("Expected float or integer"), state)
-            return ParseResult(state, ParseResultType.FAILURE, None, state)
-        else:
-            return ParseResult(state, ParseResultType.SUCCESS, parser_node.Number(integer_part.value), integer_part.next)
-    else:
-        return ParseResult(state, ParseResultType.SUCCESS, parser_node.Number(float_part.value), float_part.next)
-
-
-@debug_wrapper
-def parse_integer(state: ParseState):
-    """
-    Integer -> Digit+
-    """
-    # Get the parts
-    integer_parts = get_one_or_more(state, lambda x: x.get_digit())
+    # Scan the digits once, then look for the fraction instead of trying Float and Integer in turn
+    integer_end = state.get_digit_run_end()
 
     # did it match?
-    if integer_parts.type == ParseResultType.FAILURE or integer_parts.value is None:
-        state.raise_issue(Exception("Expected one or more digits"), state)
+    if integer_end == state.index:
+        state.raise_issue("Expected float or integer", state)
         return ParseResult(state, ParseResultType.FAILURE, None, state)
-        # raise Exception("Expected digit after")
-
-    # join the list and parse it as an integer
-    values: list[source_lexer.LexerToken] = []
-
-    for part in integer_parts.value:
-        if part.value is not None:
-            values.append(part.value)
 
-    value = int(''.join([part.token.c for part in values]))
-    return ParseResult(state, ParseResultType.SUCCESS, parser_node.Integer(value), integer_parts.next)
+    if state.get_mask_at(integer_end) & source_lexer.DOT:
+        fraction_end = state.get_digit_run_end(integer_end + 1)
 
+        if fraction_end > integer_end + 1:
+            value = float(state.get_text(fraction_end))
+            return ParseResult(state, ParseResultType.SUCCESS, parser_node.Number(parser_node.Float(value)), state.get_at(fraction_end))
 
-@debug_wrapper
-def parse_float(state: ParseState):
-    """
-    Float -> Digit+ '.' Digit+
-    """
-    # Get the parts
-    integer_parts = get_one_or_more(state, lambda x: x.get_digit())
-
-    # did it match?
-    if integer_parts.type == ParseResultType.FAILURE or integer_parts.value == None:
-        state.raise_issue(Exception("Expected one or more digits"), state)
-        return ParseResult(state, ParseResultType.FAILURE, None, state)
+        state.get_at(integer_end + 1).raise_issue(
+            "Expected one or more digits", state)
 
-    decimal_part = integer_parts.next.get_char('.')
-
-    # did it match?
-    if decimal_part.type == ParseResultType.FAILURE:
-        integer_parts.next.raise_issue(Exception("Expected '.'"), state)
-        return ParseResult(state, ParseResultType.FAILURE, None, state)
-
-    # Get the parts
-    remainder_parts = get_one_or_more(
-        decimal_part.next, lambda x: x.get_digit())
-
-    # did it match?
-    if remainder_parts.type == ParseResultType.FAILURE or remainder_parts.value == None:
-        decimal_part.next.raise_issue(
-            Exception("Expected one or more digits"), state)
-        return ParseResult(state, ParseResultType.FAILURE, None, state)
-
-    # join the parts and parse it as an integer
-    integer_values: list[source_lexer.LexerToken] = []
-
-    for part in integer_parts.value:
-        if part.value is not None:
-            integer_values.append(part.value)
-
-    remainder_values: list[source_lexer.LexerToken] = []
-
-    for part in remainder_parts.value:
-        if part.value is not None:
-            remainder_values.append(part.value)
-
-    value = float(''.join([part.token.c for part in integer_values]) +
-                  '.' + ''.join([part.token.c for part in remainder_values]))
-    return ParseResult(state, ParseResultType.SUCCESS, parser_node.Float(value), remainder_parts.next)
+    value = int(state.get_text(integer_end))
+    return ParseResult(state, ParseResultType.SUCCESS, parser_node.Number(parser_node.Integer(value)), state.get_at(integer_end))
 
 
 @debug_wrapper
@@ -659,11 +735,10 @@ def parse_paren_group(state: ParseState):
 
     # did it match?
     if open_paren_part.type == ParseResultType.FAILURE:
-        state.raise_issue(Exception("Expected '('"), state)
+        state.raise_issue("Expected '('", state)
         return ParseResult(state, ParseResultType.FAILURE, None, state)
 
-    leading_whitespace_part = get_zero_or_more(
-        open_paren_part.next, lambda x: x.get_whitespace())
+    leading_whitespace_part = open_paren_part.next.get_whitespace_run()
 
     # did it match?
     if leading_whitespace_part.type == ParseResultType.FAILURE:
@@ -674,11 +749,10 @@ def parse_paren_group(state: ParseState):
     # did it match?
     if content.type == ParseResultType.FAILURE or content.value is None:
         leading_whitespace_part.next.raise_issue(
-            Exception("Expected bitwise shift"), state)
+            "Expected bitwise shift", state)
         return ParseResult(state, ParseResultType.FAILURE, None, state)
 
-    trailing_whitespace_part = get_zero_or_more(
-        content.next, lambda x: x.get_whitespace())
+    trailing_whitespace_part = content.next.get_whitespace_run()
 
     # did it match?
     if trailing_whitespace_part.type == ParseResultType.FAILURE:
@@ -689,15 +763,163 @@ def parse_paren_group(state: ParseState):
     # did it match?
     if close_paren_part.type == ParseResultType.FAILURE:
         trailing_whitespace_part.next.raise_issue(
-            Exception("Expected ')'"), state)
+            "Expected ')'", state)
         return ParseResult(state, ParseResultType.FAILURE, None, state)
 
     return ParseResult(state, ParseResultType.SUCCESS, parser_node.ParenGroup(content.value), close_paren_part.next)
 
 
-def parse(lexer_tokens: list[source_lexer.LexerToken]):
+def get_source(lexer_tokens: LexerTokens) -> input_tokens.Source:
+    """
+    Get the source text behind the lexed tokens
+    """
+    if isinstance(lexer_tokens, source_lexer.LexerTokenStream):
+        return lexer_tokens.tokens.source
+
+    if isinstance(lexer_tokens, source_lexer.LookaheadTokens):
+        raise Exception("The whole source is needed, but only a lookahead window is available")
+
+    return ''.join([token.token.c for token in lexer_tokens])
+
+
+def parse(lexer_tokens: LexerTokens | input_tokens.TokenStream, bulk: Optional[bulk_lexer.BulkLexResult] = None, engine: str = "descent", diagnostics: bool = True):
     """
     Parse the lexed tokens into an AST
+
+    When bulk is the bulk lexer's result for the same source, digit and whitespace runs are taken from its arrays.
+
+    The engine is "descent" for the character level parser, "cursor" for the same grammar parsed by moving
+    an index without creating states and results, "pratt" for the cursor parser with the operator levels
+    parsed by precedence climbing, "arena" for the precedence climbing parser building a node_arena.NodeArena
+    instead of node objects, "interned" for it hash-consing the nodes so equal subtrees are shared,
+    "tokens" to parse the multi-character tokens of source_lexer.lex_tokens, or "generated" for the parser
+    parser_generator generates from its EXPRESSION_GRAMMAR.
+    When another engine fails, "pratt" reparses to record the issues where it stops. It keeps a stack of
+    its own instead of recursing, so this also parses input nested too deep for the recursive engines, as
+    does "descent" on reaching the recursion limit.
+
+    With diagnostics False no issues are recorded and a failed parse isn't repeated to find them.
+    """
+    state = ParseState(lexer_tokens, issues=ParseIssues(
+        diagnostics), context=ParseContext(bulk))
+    return parse_state(state, engine, diagnostics)
+
+
+def parse_state(state: ParseState, engine: str = "descent", diagnostics: bool = True):
+    """
+    Parse an expression from the state with the engine, see parse
     """
-    state = ParseState(lexer_tokens)
-    return parse_expresion(state)
+    if engine == "descent":
+        try:
+            return parse_expresion(state)
+        except RecursionError:
+            return parse_iterative(state, diagnostics)
+    elif engine == "pratt":
+        return parse_iterative(state, diagnostics)
+    elif engine == "tokens" or engine == "generated":
+        if engine == "tokens":
+            value = token_parser.parse_tokens(
+                source_lexer.lex_tokens(get_source(state.lexer_tokens)))
+        else:
+            value = parser_generator.parse_generated(
+                get_source(state.lexer_tokens))
+
+        if value is not None:
+            return ParseResult(state, ParseResultType.SUCCESS, value, state.get_at(len(state.lexer_tokens) - 1))
+    elif engine == "cursor" or engine == "arena" or engine == "interned":
+        if engine == "cursor":
+            parsed = cursor_parser.parse_cursor(state)
+        elif engine == "arena":
+            parsed = node_arena.parse_arena(state)
+        else:
+            parsed = common_subexpressions.parse_interned(state)
+
+        if parsed is not None:
+            (value, end) = parsed
+            return ParseResult(state, ParseResultType.SUCCESS, value, state.get_at(end))
+    else:
+        raise Exception(f"Unknown parser engine '{engine}'")
+
+    if not diagnostics:
+        return ParseResult(state, ParseResultType.FAILURE, None, state)
+
+    return parse_iterative(state)
+
+
+def parse_iterative(state: ParseState, diagnostics: bool = True):
+    """
+    Parse an expression from the state by precedence climbing, which nests as deep as memory allows,
+    recording the issues where it stops when it fails and diagnostics is True
+    """
+    parsed = pratt_parser.parse_pratt(state)
+
+    if parsed is None:
+        # recording them costs a successful parse too, so they are only looked for once it has failed
+        if diagnostics:
+            pratt_parser.parse_pratt(state, diagnostics)
+
+        return ParseResult(state, ParseResultType.FAILURE, None, state)
+
+    (value, end) = parsed
+    return ParseResult(state, ParseResultType.SUCCESS, value, state.get_at(end))
+
+
+def compile_source(lexer_tokens: LexerTokens | input_tokens.TokenStream, bulk: Optional[bulk_lexer.BulkLexResult] = None, diagnostics: bool = True):
+    """
+    Parse the lexed tokens straight into code, without building an AST.
+
+    The value of a successful result is the same code compile_node gives for the AST parse returns.
+    A failure is reparsed with the "pratt" engine to record its issues, unless diagnostics is False.
+    """
+    state = ParseState(lexer_tokens, issues=ParseIssues(
+        diagnostics), context=ParseContext(bulk))
+    compiled = direct_compiler.compile_direct(state)
+
+    if compiled is not None:
+        (code, end) = compiled
+        return ParseResult(state, ParseResultType.SUCCESS, code, state.get_at(end))
+
+    if diagnostics:
+        pratt_parser.parse_pratt(state, diagnostics)
+
+    return ParseResult(state, ParseResultType.FAILURE, None, state)
+
+
+class StatementResult:
+    """
+    The result of parsing one statement of a batch, with the line it is on
+    """
+
+    def __init__(self, line_number: int, result: ParseResult[Any]) -> None:
+        self.line_number = line_number
+        self.result = result
+
+    @property
+    def success(self) -> bool:
+        return self.result.type == ParseResultType.SUCCESS
+
+    @property
+    def value(self) -> Optional[parser_node.Expresion]:
+        return self.result.value if self.success else None
+
+    def get_issues(self) -> list[ParseIssue]:
+        return self.result.start.get_last_issues()
+
+
+def parse_batch(lines: Iterable[str | bytes], engine: str = "descent", diagnostics: bool = True) -> Iterator[StatementResult]:
+    """
+    Parse a stream of lines, each one a statement, yielding a result per statement.
+
+    Lines holding only whitespace are skipped. A statement that fails to parse gives a failed result with its
+    issues, positioned in the whole stream, and parsing continues with the next line. Pass an open file to
+    parse it without reading it all in.
+    """
+    for (line_number, line) in enumerate(lines, 1):
+        line = line.rstrip('\r\n' if isinstance(line, str) else b'\r\n')
+
+        if len(line.strip()) == 0:
+            continue
+
+        state = ParseState(source_lexer.lex(input_tokens.tokenize_stream(line)), issues=ParseIssues(diagnostics),
+                           context=ParseContext(line_number=line_number))
+        yield StatementResult(line_number, parse_state(state, engine, diagnostics))
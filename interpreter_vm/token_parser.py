@@ -0,0 +1,139 @@
+from typing import Optional
+
+import basic_interpreter.source_lexer as source_lexer
+import interpreter_vm.parser_node as parser_node
+
+"""
+Expresion -> '=' BitwiseShift $
+BitwiseShift -> AdditionOrSubtraction (('<<' | '>>') AdditionOrSubtraction)*
+AdditionOrSubtraction -> MultiplicationOrDivision (('+' | '-') MultiplicationOrDivision)*
+MultiplicationOrDivision -> Exponentiation (('*' | '/' | '%') Exponentiation)*
+Exponentiation -> Numeric ('**' Numeric)*
+Numeric -> NUMBER | ParenGroup
+ParenGroup -> '(' BitwiseShift ')'
+"""
+
+TokenKind = source_lexer.TokenKind
+
+
+class TokenParseError(Exception):
+    def __init__(self, token: source_lexer.SourceToken, message: str) -> None:
+        super().__init__(f"{message} at offset {token.offset}")
+        self.token = token
+
+
+class TokenParser:
+    """
+    Recursive descent over the lexer's multi-character tokens, building the same AST as source_parser
+    """
+
+    def __init__(self, tokens: list[source_lexer.SourceToken]) -> None:
+        self.tokens = tokens
+        self.index = 0
+
+    def peek(self) -> source_lexer.SourceToken:
+        return self.tokens[self.index]
+
+    def take(self) -> source_lexer.SourceToken:
+        token = self.tokens[self.index]
+        self.index += 1
+        return token
+
+    def is_operator(self, options: tuple[str, ...]) -> bool:
+        token = self.tokens[self.index]
+        return token.kind == TokenKind.OPERATOR and token.text in options
+
+    def expect(self, kind: TokenKind, text: Optional[str] = None) -> source_lexer.SourceToken:
+        token = self.tokens[self.index]
+
+        if token.kind != kind or (text is not None and token.text != text):
+            raise TokenParseError(token, f"Expected '{text or kind.name}'")
+
+        self.index += 1
+        return token
+
+    def parse_expresion(self) -> parser_node.Expresion:
+        self.expect(TokenKind.OPERATOR, '=')
+        value = self.parse_bitwise_shift()
+        end = self.peek()
+
+        # like the character parser, trailing whitespace isn't part of the expression
+        if end.kind != TokenKind.END or self.tokens[self.index - 1].end != end.offset:
+            raise TokenParseError(end, "Expected end of file")
+
+        return parser_node.Expresion(value)
+
+    def parse_bitwise_shift(self) -> parser_node.BitwiseShift:
+        start = self.parse_addition_or_subtraction()
+        rest: list[parser_node.BitwiseShiftPart] = []
+
+        while self.is_operator(('<<', '>>')):
+            operator = self.take()
+            rest.append(parser_node.BitwiseShiftPart(
+                parser_node.Operator(operator.text[0]), operator.offset, self.parse_addition_or_subtraction()))
+
+        return parser_node.BitwiseShift(start, rest)
+
+    def parse_addition_or_subtraction(self) -> parser_node.AdditionOrSubtraction:
+        start = self.parse_multiplication_or_division()
+        rest: list[parser_node.AdditionOrSubtractionPart] = []
+
+        while self.is_operator(('+', '-')):
+            operator = self.take()
+            rest.append(parser_node.AdditionOrSubtractionPart(
+                parser_node.Operator(operator.text[0]), operator.offset, self.parse_multiplication_or_division()))
+
+        return parser_node.AdditionOrSubtraction(start, rest)
+
+    def parse_multiplication_or_division(self) -> parser_node.MultiplicationOrDivision:
+        start = self.parse_exponentiation()
+        rest: list[parser_node.MultiplicationOrDivisionPart] = []
+
+        while self.is_operator(('*', '/', '%')):
+            operator = self.take()
+            rest.append(parser_node.MultiplicationOrDivisionPart(
+                parser_node.Operator(operator.text[0]), operator.offset, self.parse_exponentiation()))
+
+        return parser_node.MultiplicationOrDivision(start, rest)
+
+    def parse_exponentiation(self) -> parser_node.Exponentiation:
+        start = self.parse_numeric()
+        rest: list[parser_node.ExponentiationPart] = []
+
+        while self.is_operator(('**',)):
+            operator = self.take()
+            rest.append(parser_node.ExponentiationPart(
+                parser_node.Operator(operator.text[0]), operator.offset, self.parse_numeric()))
+
+        return parser_node.Exponentiation(start, rest)
+
+    def parse_numeric(self) -> parser_node.Numeric:
+        token = self.peek()
+
+        if token.kind == TokenKind.NUMBER:
+            self.index += 1
+
+            if isinstance(token.value, float):
+                return parser_node.Numeric(parser_node.Number(parser_node.Float(token.value)))
+            elif isinstance(token.value, int):
+                return parser_node.Numeric(parser_node.Number(parser_node.Integer(token.value)))
+            else:
+                raise TokenParseError(token, "Number token without a value")
+
+        if token.kind == TokenKind.OPEN_PAREN:
+            self.index += 1
+            content = self.parse_bitwise_shift()
+            self.expect(TokenKind.CLOSE_PAREN, ')')
+            return parser_node.Numeric(parser_node.ParenGroup(content))
+
+        raise TokenParseError(token, "Expected number or paren group")
+
+
+def parse_tokens(tokens: list[source_lexer.SourceToken]) -> Optional[parser_node.Expresion]:
+    """
+    Parse the multi-character tokens into an AST, or None if they aren't a valid expression
+    """
+    try:
+        return TokenParser(tokens).parse_expresion()
+    except (TokenParseError, RecursionError):
+        return None
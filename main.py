@@ -1,38 +1,31 @@
-from io import SEEK_SET, SEEK_END
-
 import basic_interpreter.input_tokens as input_tokens
 import basic_interpreter.source_lexer as source_lexer
 import interpreter_vm.source_parser as source_parser
+import interpreter_vm.optimizer as optimizer
+import interpreter_vm.peephole as peephole
 import interpreter_vm.parser_node as parser_node
 import interpreter_vm.interpreter_operations as interpreter_operations
 import stack_executer.stack_executer as stack_executer
 
 
-def read_source(source_name: str) -> str:
-    with open(source_name) as file:
-        file_end = file.seek(0, SEEK_END)
-        file.seek(0, SEEK_SET)
-        return file.read(file_end + 1)
-
-
 def main():
     # print("Reading source")
     source_name = "src2.src"
-    source = read_source(source_name)
 
-    tokens = input_tokens.tokenize(source)
-    # [print(input_token) for input_token in tokens]
+    with input_tokens.MappedSource(source_name) as source:
+        tokens = input_tokens.tokenize_stream(source)
+        # [print(input_token) for input_token in tokens]
 
-    lexer_tokens = source_lexer.lex(tokens)
-    # [print(lexer_token) for lexer_token in lexer_tokens]
+        lexer_tokens = source_lexer.lex(tokens)
+        # [print(lexer_token) for lexer_token in lexer_tokens]
 
-    parser_result = source_parser.parse(lexer_tokens)
+        parser_result = source_parser.parse(lexer_tokens)
 
-    if parser_result.type != source_parser.ParseResultType.SUCCESS or parser_result.value is None:
-        print("parse failed")
-        print("issues:")
-        [print(issue) for issue in parser_result.start.get_last_issues()]
-        return
+        if parser_result.type != source_parser.ParseResultType.SUCCESS or parser_result.value is None:
+            print("parse failed")
+            print("issues:")
+            [print(issue) for issue in parser_result.start.get_last_issues()]
+            return
 
     print("parse result:")
     print(parser_result.value)
@@ -41,8 +34,14 @@ def main():
     # [print(issue) for issue in parser_result.start.issues.issues]
 
     print("compiling...")
-    code = parser_node.compile_node(parser_result.value)
+    code = parser_node.compile_node(
+        optimizer.fold_constants(parser_result.value))
+
+    peephole_optimizer = peephole.PeepholeOptimizer()
+    code = peephole_optimizer.optimize(code)
 
+    print("peephole passes:")
+    print(peephole_optimizer.report())
     print(interpreter_operations.code_to_string(code))
 
     print("running...")
@@ -1,6 +1,8 @@
 from enum import Enum
 from typing import Any, Callable, Optional
 
+import basic_interpreter.line_index as line_index
+
 
 InvolvedSet = list['Rule']
 
@@ -36,6 +38,31 @@ class Index:
         self.next: Optional['Index']
 
 
+def createIndexes(source: str, lineIndex: Optional[line_index.LineIndex] = None) -> list[Index]:
+    """
+    Create the linked indexes for each character of the source, plus one for the end.
+
+    The line and column fields come from the source's line index, which is built if it isn't given.
+    """
+    if lineIndex is None:
+        lineIndex = line_index.index_source(source)
+
+    indexes: list[Index] = []
+    lineStarts = lineIndex.line_starts
+
+    for lineNumber, lineStart in enumerate(lineStarts, 1):
+        lineEnd = lineStarts[lineNumber] if lineNumber < len(lineStarts) else len(source) + 1
+
+        for offset in range(lineStart, lineEnd):
+            indexes.append(Index(offset, source[offset] if offset < len(source) else None,
+                                 lineNumber, offset - lineStart + 1))
+
+    for i, index in enumerate(indexes):
+        index.next = indexes[i + 1] if i + 1 < len(indexes) else None
+
+    return indexes
+
+
 class ResultType(Enum):
     Unparsed = 0
     Parsing = 1
@@ -1,4 +1,5 @@
 from parser_base import *
+import basic_interpreter.source_lexer as source_lexer
 
 
 class SuccessOperation(CompiledOperation):
@@ -233,6 +234,53 @@ class TestEndOperation(CompiledOperation):
         return f"test $"
 
 
+class TakeRunOperation(CompiledOperation):
+    def __init__(self, mask: int, allowEmpty: bool):
+        super().__init__()
+        self.mask = mask
+        self.allowEmpty = allowEmpty
+
+    def getRunEnd(self, start: Index) -> Index:
+        end = start
+
+        while end.next is not None and isinstance(end.token, str) and source_lexer.get_character_class(end.token).mask & self.mask:
+            end = end.next
+
+        return end
+
+    def getRunText(self, start: Index, end: Index) -> str:
+        parts: list[str] = []
+        index = start
+
+        while index is not end and index is not None:
+            parts.append(index.token)
+            index = index.next
+
+        return "".join(parts)
+
+    def eval(self, state: State):
+        callStack = state.callStack
+
+        if callStack is not None:
+            stepStack = callStack.stepStack
+
+            if stepStack is not None:
+                start = stepStack.index
+                end = self.getRunEnd(start)
+
+                if end is not start or self.allowEmpty:
+                    callStack.resultType = ResultType.Positive
+                    callStack.locals._ = self.getRunText(start, end)
+                else:
+                    callStack.resultType = ResultType.Negative
+
+                callStack.stepStack = StepStackItem(
+                    stepStack.stepIndex + 1, end, stepStack)
+
+    def __str__(self):
+        return f"take run {self.mask}{" or none" if self.allowEmpty else ""}"
+
+
 class ZeroOrMoreInitOperation(CompiledOperation):
     def __init__(self):
         self.index: Index
@@ -598,6 +646,22 @@ def getChar(target: str):
     return _getChar
 
 
+def takeRun(mask: int, allowEmpty: bool):
+    def _takeRun(positive: IntermediateCall, negative: IntermediateCall, output: list[CompiledOperation]):
+        fail_label = JumpLabel()
+
+        output.append(TakeRunOperation(mask, allowEmpty))
+        output.append(fail_label.jumpIfNegative())
+        positive(noop(), noop(), output)
+        fail_label.setTargetIndex(len(output))
+        negative(noop(), noop(), output)
+    return _takeRun
+
+
+def getDigits():
+    return takeRun(source_lexer.DIGIT, False)
+
+
 def getEnd():
     def _getEnd(positive: IntermediateCall, negative: IntermediateCall, output: list[CompiledOperation]):
         fail_label = JumpLabel()
@@ -677,44 +741,11 @@ def generateTestParser():
                  call(["Float"]),
                  call(["Integer"]))),
         rule("Integer",
-             oneOrMore(
-                 choose(
-                     getChar("0"),
-                     getChar("1"),
-                     getChar("2"),
-                     getChar("3"),
-                     getChar("4"),
-                     getChar("5"),
-                     getChar("6"),
-                     getChar("7"),
-                     getChar("8"),
-                     getChar("9")))),
+             getDigits()),
         rule("Float",
-             oneOrMore(
-                 choose(
-                     getChar("0"),
-                     getChar("1"),
-                     getChar("2"),
-                     getChar("3"),
-                     getChar("4"),
-                     getChar("5"),
-                     getChar("6"),
-                     getChar("7"),
-                     getChar("8"),
-                     getChar("9"))),
+             getDigits(),
              getChar("."),
-             oneOrMore(
-                 choose(
-                     getChar("0"),
-                     getChar("1"),
-                     getChar("2"),
-                     getChar("3"),
-                     getChar("4"),
-                     getChar("5"),
-                     getChar("6"),
-                     getChar("7"),
-                     getChar("8"),
-                     getChar("9")))),
+             getDigits()),
         rule("ParenGroup",
              getChar("("),
              call(["AdditionOrSubtraction"]),
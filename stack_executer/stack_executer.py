@@ -1,3 +1,6 @@
+import marshal
+import sys
+from array import array
 from typing import Any, Callable, Optional
 
 
@@ -14,6 +17,8 @@ class CallStackItem:
         self.programIndex = programIndex
         self.resultStack: list[Any] = []
         self.locals = Locals()
+        # values kept by StoreTemporary, by slot
+        self.temporaries: list[Any] = []
         self.next = next
 
 
@@ -90,4 +95,92 @@ def execute_code(code: list[Operation]):
             state.running = False
             print(f"Exception encountered while running: {e}")
     
-    return state.resultStack.pop() if len(state.resultStack) > 0 else None
\ No newline at end of file
+    return state.resultStack.pop() if len(state.resultStack) > 0 else None
+
+
+# the opcodes the dispatch loop handles itself, the others index the handlers it is given
+EXTENDED_ARG = 0
+RETURN = 1
+
+# runs an instruction given the result stack, the constant pool, the temporaries and the operand
+Handler = Callable[[list[Any], list[Any], list[Any], int], None]
+
+
+class Bytecode:
+    """
+    A program as pairs of 16 bit words, an opcode and its operand, with the values it pushes kept once each
+    in the constant pool. Operands past 16 bits are given by EXTENDED_ARG instructions before them.
+    """
+    __slots__ = ("codes", "constants")
+
+    def __init__(self, codes: Optional[array] = None, constants: Optional[list[Any]] = None) -> None:
+        self.codes = codes if codes is not None else array("H")
+        self.constants = constants if constants is not None else []
+
+    def __len__(self) -> int:
+        return len(self.codes) // 2
+
+    def to_bytes(self) -> bytes:
+        codes = array("H", self.codes)
+
+        # stored little endian
+        if sys.byteorder == "big":
+            codes.byteswap()
+
+        return marshal.dumps((codes.tobytes(), self.constants))
+
+    @staticmethod
+    def from_bytes(data: bytes) -> 'Bytecode':
+        (code_bytes, constants) = marshal.loads(data)
+        codes = array("H")
+        codes.frombytes(code_bytes)
+
+        if sys.byteorder == "big":
+            codes.byteswap()
+
+        return Bytecode(codes, list(constants))
+
+
+def execute_bytecode(bytecode: Bytecode, handlers: list[Handler]):
+    """
+    Run the bytecode, dispatching each opcode to its handler, and give the value left on top of the stack.
+
+    An error stops the program like it does in execute_code, though the instructions aren't printed.
+    """
+    codes = bytecode.codes
+    constants = bytecode.constants
+    stack: list[Any] = []
+    temporaries: list[Any] = []
+    end = len(codes)
+
+    if end % 2 != 0:
+        raise Exception("Expected the bytecode to be opcode and operand pairs")
+
+    if end > 0 and max(codes[0::2]) >= len(handlers):
+        raise Exception("Unknown opcode in the bytecode")
+
+    index = 0
+    extended = 0
+
+    try:
+        while index < end:
+            opcode = codes[index]
+            operand = extended | codes[index + 1]
+            index += 2
+
+            if opcode == EXTENDED_ARG:
+                extended = operand << 16
+                continue
+
+            if opcode == RETURN:
+                break
+
+            extended = 0
+            handlers[opcode](stack, constants, temporaries, operand)
+    except IndexError:
+        # only popping an empty stack raises it, the opcodes having been checked
+        print("Exception encountered while running: Stack index underflow")
+    except Exception as e:
+        print(f"Exception encountered while running: {e}")
+
+    return stack.pop() if len(stack) > 0 else None
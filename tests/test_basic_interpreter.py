@@ -1,7 +1,10 @@
 from io import SEEK_SET, SEEK_END
 
+import pytest
+
 import basic_interpreter.input_tokens as input_tokens
 import basic_interpreter.source_lexer as source_lexer
+import basic_interpreter.parser_node as parser_node
 import basic_interpreter.source_parser as source_parser
 
 def read_source(source_name: str) -> str:
@@ -38,4 +41,44 @@ def test():
     print("running...")
     run_result = parser_result.value.exec()
 
-    print(f"result: {run_result}")
\ No newline at end of file
+    print(f"result: {run_result}")
+
+def test_compile_to_closure():
+    for source in ["= 5 + 7.3 * 3", "=(2 * 3 - 4) % 7 - 1 / 4", "= 12 * (4 - 5) + 1.5 % 0.5", "= 7"]:
+        value = source_parser.parse(source_lexer.lex(input_tokens.tokenize(source))).value
+        closure = parser_node.compile_to_closure(value)
+
+        assert closure() == value.exec()
+        assert closure() == closure()
+
+    closure = parser_node.compile_to_closure(source_parser.parse(
+        source_lexer.lex(input_tokens.tokenize("= 1 + 2 / (3 - 3)"))).value)
+
+    with pytest.raises(ZeroDivisionError):
+        closure()
+
+    plus = source_lexer.lex(input_tokens.tokenize("+"))[0]
+    closure = parser_node.compile_to_closure(parser_node.AdditionOrSubtraction(
+        parser_node.Integer(1), [parser_node.AdditionOrSubtractionPart(plus, parser_node.ExecNode())]))
+
+    with pytest.raises(Exception, match="right operand returned None"):
+        closure()
+
+    times = source_lexer.lex(input_tokens.tokenize("*"))[0]
+    wrapped = [parser_node.Numeric(parser_node.ExecNode()), parser_node.Numeric(parser_node.Number(parser_node.ExecNode())),
+               parser_node.Numeric(parser_node.ParenGroup(parser_node.MultiplicationOrDivision(parser_node.ExecNode(), [])))]
+
+    for operand in wrapped:
+        closure = parser_node.compile_to_closure(parser_node.AdditionOrSubtraction(
+            parser_node.Integer(1), [parser_node.AdditionOrSubtractionPart(plus, operand)]))
+
+        with pytest.raises(Exception, match="right operand returned None"):
+            closure()
+
+        closure = parser_node.compile_to_closure(parser_node.MultiplicationOrDivision(
+            operand, [parser_node.MultiplicationOrDivisionPart(times, parser_node.Integer(2))]))
+
+        with pytest.raises(Exception, match="left operand returned None"):
+            closure()
+
+        assert operand.to_closure() is None
@@ -0,0 +1,34 @@
+import pytest
+
+import basic_interpreter.input_tokens as input_tokens
+import basic_interpreter.source_lexer as source_lexer
+import interpreter_vm.source_parser as source_parser
+
+np = pytest.importorskip("numpy")
+
+import basic_interpreter.bulk_lexer as bulk_lexer
+
+
+def test_bulk_lex_classes_and_runs():
+    result = bulk_lexer.bulk_lex("= 12  +3")
+
+    assert len(result) == 9
+    assert result.classes[2] & source_lexer.DIGIT
+    assert result.classes[-1] == 0
+    assert list(result.digit_run_starts) == [2, 7]
+    assert list(result.digit_run_stops) == [4, 8]
+    assert result.get_digit_run_end(2) == 4
+    assert result.get_whitespace_run_end(4) == 6
+    assert result.get_whitespace_run_end(6) == 6
+
+
+def test_parse_with_bulk_arrays():
+    source = "=  12.5 *  (3 + 40)"
+    expected = source_parser.parse(source_lexer.lex(input_tokens.tokenize(source)))
+
+    for buffer in [source, source.encode()]:
+        result = source_parser.parse(source_lexer.lex(
+            input_tokens.tokenize_stream(buffer)), bulk_lexer.bulk_lex(buffer))
+
+        assert result.type == source_parser.ParseResultType.SUCCESS
+        assert str(result.value) == str(expected.value)
@@ -0,0 +1,67 @@
+import basic_interpreter.input_tokens as input_tokens
+import basic_interpreter.source_lexer as source_lexer
+import interpreter_vm.common_subexpressions as common_subexpressions
+import interpreter_vm.interpreter_operations as interpreter_operations
+import interpreter_vm.parser_node as parser_node
+import interpreter_vm.source_parser as source_parser
+import stack_executer.stack_executer as stack_executer
+
+
+def repeated_source(depth: int) -> str:
+    """
+    An expression whose subexpression at each depth is written out twice
+    """
+    expression = "1 + 2 * 3"
+
+    for i in range(depth):
+        expression = f"({expression}) * ({expression}) % {i + 5} - 1"
+
+    return "= " + expression
+
+
+def test_interned_engine():
+    check = "= 5 + 7.3 * 3 - (1 << 2) + (1 << 2)"
+    lexer_tokens = source_lexer.lex(input_tokens.tokenize_stream(check))
+    result = source_parser.parse(lexer_tokens, engine="interned")
+
+    assert result.type == source_parser.ParseResultType.SUCCESS
+    assert interpreter_operations.code_to_string(parser_node.compile_node(result.value)) == \
+        interpreter_operations.code_to_string(
+            parser_node.compile_node(source_parser.parse(lexer_tokens).value))
+    rest = result.value.value.start.rest
+
+    assert rest[1].right is rest[2].right
+
+    result = source_parser.parse(source_lexer.lex(
+        input_tokens.tokenize("= (1")), engine="interned", diagnostics=False)
+
+    assert result.type == source_parser.ParseResultType.FAILURE
+
+
+def test_shared_code_scales_with_distinct_subtrees():
+    depth = 12
+    lexer_tokens = source_lexer.lex(
+        input_tokens.tokenize_stream(repeated_source(depth)))
+    state = source_parser.ParseState(lexer_tokens)
+    nodes = common_subexpressions.NodeTable()
+    (value, _) = common_subexpressions.parse_interned(state, nodes)
+    shared = common_subexpressions.compile_shared(value)
+    full = parser_node.compile_node(value)
+
+    assert len(nodes) < 20 * depth
+    assert len(shared) < 20 * depth
+    assert len(full) > 2 ** depth
+    assert sum(isinstance(operation, interpreter_operations.LoadTemporary)
+               for operation in shared) == depth
+    assert stack_executer.execute_code(
+        shared) == stack_executer.execute_code(full)
+
+
+def test_shared_code_without_sharing():
+    for source in ["= 5 + 7.3 * 3", " =(2 ** 3 ** 4) % 7 - 1 >> 1", "= 2 ** (3 + 1) ** 2 * 4 ** 5 << 1"]:
+        value = source_parser.parse(source_lexer.lex(
+            input_tokens.tokenize(source))).value
+
+        assert interpreter_operations.code_to_string(common_subexpressions.compile_shared(value)) == \
+            interpreter_operations.code_to_string(
+                parser_node.compile_node(value))
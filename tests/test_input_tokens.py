@@ -0,0 +1,61 @@
+import basic_interpreter.input_tokens as input_tokens
+import basic_interpreter.source_lexer as source_lexer
+import interpreter_vm.source_parser as source_parser
+
+
+def test_token_stream_matches_tokenize():
+    source = "= 1 + 2"
+    tokens = input_tokens.tokenize(source)
+    stream = input_tokens.tokenize_stream(source)
+
+    assert len(stream) == len(tokens)
+    assert [str(token) for token in stream] == [str(token) for token in tokens]
+    assert isinstance(stream[-1], input_tokens.EndOfStream)
+
+
+def test_token_stream_bytes_source():
+    stream = input_tokens.tokenize_stream(b"= 12")
+
+    assert stream[2].c == "1"
+    assert stream.text(2, 4) == "12"
+
+
+def test_parse_token_stream():
+    stream = input_tokens.tokenize_stream("= (1 + 2) * 3")
+    result = source_parser.parse(source_lexer.lex(stream))
+
+    assert result.type == source_parser.ParseResultType.SUCCESS
+    assert str(result.value) == str(source_parser.parse(
+        source_lexer.lex(input_tokens.tokenize("= (1 + 2) * 3"))).value)
+
+
+def test_parse_chunked_stream(tmp_path):
+    source_path = tmp_path / "source.src"
+    source_path.write_text("= 12 + 3.5 * (4 << 1)")
+
+    tokens = input_tokens.tokenize_chunks(
+        input_tokens.read_chunks(str(source_path), 4))
+    lexer_tokens = source_lexer.lex_stream(tokens, 8)
+    result = source_parser.parse(lexer_tokens)
+
+    assert result.type == source_parser.ParseResultType.SUCCESS
+    assert str(result.value) == str(source_parser.parse(
+        source_lexer.lex(input_tokens.tokenize(source_path.read_text()))).value)
+    assert len(lexer_tokens.window) <= 8
+
+
+def test_parse_mapped_source(tmp_path):
+    source_path = tmp_path / "source.src"
+    source_path.write_text("= 12 + 3.5")
+
+    with input_tokens.MappedSource(str(source_path)) as source:
+        assert isinstance(source, memoryview)
+
+        result = source_parser.parse(
+            source_lexer.lex(input_tokens.tokenize_stream(source)))
+
+        assert result.type == source_parser.ParseResultType.SUCCESS
+        value = result.value
+
+    assert str(value) == str(source_parser.parse(
+        source_lexer.lex(input_tokens.tokenize("= 12 + 3.5"))).value)
@@ -1,5 +1,9 @@
+import basic_interpreter.input_tokens as input_tokens
+import basic_interpreter.source_lexer as source_lexer
 import stack_executer.stack_executer as stack_executer
 import interpreter_vm.interpreter_operations as interpreter_operations
+import interpreter_vm.parser_node as parser_node
+import interpreter_vm.source_parser as source_parser
 
 def test_integer():
     target: int = 1
@@ -26,4 +30,61 @@ def test_float():
 
     result = state.resultStack.pop()
     assert isinstance(result, float)
-    assert result == target
\ No newline at end of file
+    assert result == target
+
+
+def compile_source(source: str) -> list[stack_executer.Operation]:
+    return parser_node.compile_node(source_parser.parse(source_lexer.lex(input_tokens.tokenize(source))).value)
+
+
+def test_bytecode_matches_execute_code():
+    sources = ["= 1 + 2 * 3 - 4 / 5", "= 7 % 3 << 4 >> 1", "= 2 ** 3 ** 2", "= (1 + 2) * (1 + 2) - 0.5",
+               "= 1.5 << 2", "= 1 / 0 + 2", "= 1 + 2 % 0.0"]
+
+    for source in sources:
+        code = compile_source(source)
+        bytecode = interpreter_operations.encode(code)
+
+        assert stack_executer.execute_bytecode(bytecode, interpreter_operations.HANDLERS) == \
+            stack_executer.execute_code(code)
+        assert [str(operation) for operation in interpreter_operations.decode(bytecode)] == \
+            [str(operation) for operation in code]
+
+
+def test_bytecode_constant_pool():
+    code = compile_source("= 3 + 3 * 3 - 3.0 + 0.0")
+    code[-1:-1] = [interpreter_operations.Float(-0.0), interpreter_operations.Subtract()]
+    bytecode = interpreter_operations.encode(code)
+
+    assert bytecode.constants == [3, 3.0, 0.0, -0.0]
+    assert str(bytecode.constants[3]) == "-0.0"
+    assert len(bytecode) == len(code)
+    assert bytecode.codes.itemsize == 2
+
+
+def test_bytecode_extended_operands():
+    count = 70000
+    code: list[stack_executer.Operation] = [interpreter_operations.Integer(0)]
+
+    for value in range(1, count):
+        code += [interpreter_operations.Integer(value), interpreter_operations.Add()]
+
+    code += [interpreter_operations.StoreTemporary(count), interpreter_operations.LoadTemporary(count),
+             interpreter_operations.Add(), interpreter_operations.Return()]
+    bytecode = interpreter_operations.encode(code)
+
+    assert len(bytecode.constants) == count
+    assert len(bytecode) > len(code)
+    assert stack_executer.execute_bytecode(bytecode, interpreter_operations.HANDLERS) == count * (count - 1)
+    assert [str(operation) for operation in interpreter_operations.decode(bytecode)] == \
+        [str(operation) for operation in code]
+
+
+def test_bytecode_to_bytes():
+    bytecode = interpreter_operations.encode(compile_source("= 1 + 2.5 * 3 << 1"))
+    loaded = stack_executer.Bytecode.from_bytes(bytecode.to_bytes())
+
+    assert loaded.codes == bytecode.codes
+    assert loaded.constants == bytecode.constants
+    assert stack_executer.execute_bytecode(loaded, interpreter_operations.HANDLERS) == \
+        stack_executer.execute_bytecode(bytecode, interpreter_operations.HANDLERS)
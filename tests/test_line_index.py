@@ -0,0 +1,39 @@
+import basic_interpreter.input_tokens as input_tokens
+import basic_interpreter.line_index as line_index
+import basic_interpreter.source_lexer as source_lexer
+import interpreter_vm.source_parser as source_parser
+import parser_base
+
+
+def test_line_and_column():
+    index = line_index.index_source("ab\ncd\n\ne")
+
+    assert [index.get_line_number(offset) for offset in range(9)] == [
+        1, 1, 1, 2, 2, 2, 3, 4, 4]
+    assert [index.get_column_number(offset) for offset in range(9)] == [
+        1, 2, 3, 1, 2, 3, 1, 1, 2]
+    assert list(index.line_starts) == list(
+        line_index.index_tokens(input_tokens.tokenize("ab\ncd\n\ne")).line_starts)
+
+
+def test_issue_position():
+    source = "= 1 +\n  2 $"
+
+    for lexer_tokens in [source_lexer.lex(input_tokens.tokenize(source)),
+                         source_lexer.lex(input_tokens.tokenize_stream(source)),
+                         source_lexer.lex_stream(input_tokens.tokenize(source))]:
+        result = source_parser.parse_expresion(source_parser.ParseState(
+            lexer_tokens, issues=source_parser.ParseIssues()))
+        issue = result.start.get_last_issues()[0]
+
+        assert result.type == source_parser.ParseResultType.FAILURE
+        assert (issue.start.get_line_number(),
+                issue.start.get_column_number()) == (2, 5)
+
+
+def test_create_indexes_positions():
+    indexes = parser_base.createIndexes("1\n+2")
+
+    assert [(index.line, index.column) for index in indexes] == [
+        (1, 1), (1, 2), (2, 1), (2, 2), (2, 3)]
+    assert indexes[-1].token is None and indexes[-1].next is None
@@ -0,0 +1,86 @@
+import ast
+
+import pytest
+
+import basic_interpreter.input_tokens as input_tokens
+import basic_interpreter.source_lexer as source_lexer
+import interpreter_vm.common_subexpressions as common_subexpressions
+import interpreter_vm.native_compiler as native_compiler
+import interpreter_vm.parser_node as parser_node
+import interpreter_vm.source_parser as source_parser
+import stack_executer.stack_executer as stack_executer
+
+
+def parse(source: str) -> parser_node.ExecNode:
+    return source_parser.parse(source_lexer.lex(input_tokens.tokenize(source))).value
+
+
+def test_native_matches_vm():
+    for source in ["= 5 + 7.3 * 3", " =(2 ** 3 ** 4) % 7 - 1 >> 1", "= 2 ** (3 + 1) ** 2 * 4 ** 5 << 1",
+                   "= 7 / 2 - 8 % 3.5", "= 1 << 70 >> 3"]:
+        node = parse(source)
+        value = native_compiler.run_native(native_compiler.compile_native(node))
+
+        assert value == stack_executer.execute_code(parser_node.compile_node(node))
+        assert type(value) == type(stack_executer.execute_code(parser_node.compile_node(node)))
+
+
+def test_native_errors():
+    for (source, message) in [("= 1.5 << 2", "Expected left operand of LeftShift to be an Integer"),
+                              ("= 1 >> 2.5", "Expected right operand of RightShift to be an Integer")]:
+        with pytest.raises(Exception, match=message):
+            native_compiler.run_native(
+                native_compiler.compile_native(parse(source)))
+
+    with pytest.raises(ZeroDivisionError):
+        native_compiler.run_native(
+            native_compiler.compile_native(parse("= 1 / (2 - 2)")))
+
+
+def test_native_cache():
+    cache = native_compiler.NativeCache(2)
+    first = native_compiler.compile_native(parse("= 1 + 2"), cache)
+
+    assert native_compiler.compile_native(parse(" = 1+2"), cache) is first
+    assert cache.hits == 1 and cache.misses == 1
+
+    native_compiler.compile_native(parse("= 3"), cache)
+    native_compiler.compile_native(parse("= 4"), cache)
+
+    assert len(cache.code) == 2
+    assert native_compiler.compile_native(parse("= 1 + 2"), cache) is not first
+
+
+def test_native_temporaries():
+    state = source_parser.ParseState(source_lexer.lex(
+        input_tokens.tokenize("= (1 + 2 * 3) * (1 + 2 * 3) - (1 + 2 * 3)")))
+    (value, _) = common_subexpressions.parse_interned(state)
+    code = common_subexpressions.compile_shared(value)
+
+    assert native_compiler.run_native(native_compiler.NativeCache().compile(
+        native_compiler.lower_code(code))) == 42
+
+
+def test_native_long_chain():
+    source = "= 1" + "".join(f" {'+-*%'[i % 4]} {i % 7 + 1}" for i in range(3000)) + " << 2 ** 3"
+    node = source_parser.parse(source_lexer.lex(
+        input_tokens.tokenize_stream(source)), engine="pratt").value
+
+    assert native_compiler.run_native(native_compiler.compile_native(node)) == \
+        stack_executer.execute_code(parser_node.compile_node(node))
+
+
+def test_native_runs_keep_no_names():
+    names = dict(native_compiler.NATIVE_GLOBALS)
+    state = source_parser.ParseState(source_lexer.lex(
+        input_tokens.tokenize("= (1 + 2 * 3) * (1 + 2 * 3) - (1 + 2 * 3)")))
+    (value, _) = common_subexpressions.parse_interned(state)
+    shared = native_compiler.lower_code(common_subexpressions.compile_shared(value))
+    spilled = native_compiler.lower_code(parser_node.compile_node(
+        parse("= 1" + " + 2" * (native_compiler.MAX_NATIVE_DEPTH * 3))))
+
+    assert "t0" in ast.dump(shared) and "s0" in ast.dump(spilled)
+    assert native_compiler.run_native(native_compiler.NativeCache().compile(shared)) == 42
+    assert native_compiler.run_native(native_compiler.NativeCache().compile(spilled)) == \
+        1 + 2 * native_compiler.MAX_NATIVE_DEPTH * 3
+    assert native_compiler.NATIVE_GLOBALS == names
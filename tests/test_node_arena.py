@@ -0,0 +1,54 @@
+import basic_interpreter.input_tokens as input_tokens
+import basic_interpreter.source_lexer as source_lexer
+import interpreter_vm.interpreter_operations as interpreter_operations
+import interpreter_vm.node_arena as node_arena
+import interpreter_vm.parser_node as parser_node
+import interpreter_vm.source_parser as source_parser
+
+
+def test_arena_compiles_like_the_ast():
+    big = "9" * 30
+
+    for source in ["= 5 + 7.3 * 3", " =(2 ** 3 ** 4) % 7 - 1 >> 1", "= 2 ** (3 + 1) ** 2 * 4 ** 5 << 1",
+                   "=\n 12 *\t( 4 - 5 ) >> 1", "= ((1 ** 2) ** (3 ** 4)) ** 5", f"= {big} - 1.5", "= 7"]:
+        lexer_tokens = source_lexer.lex(input_tokens.tokenize_stream(source))
+        result = source_parser.parse(lexer_tokens, engine="arena")
+
+        assert result.type == source_parser.ParseResultType.SUCCESS
+        assert isinstance(result.value, node_arena.NodeArena)
+        assert interpreter_operations.code_to_string(parser_node.compile_node(result.value)) == \
+            interpreter_operations.code_to_string(
+                parser_node.compile_node(source_parser.parse(lexer_tokens).value))
+
+    for source in ["= 1 ", "= (1", "= 2 ** * 3", "= 1 + 2 *"]:
+        result = source_parser.parse(source_lexer.lex(
+            input_tokens.tokenize(source)), engine="arena", diagnostics=False)
+
+        assert result.type == source_parser.ParseResultType.FAILURE
+
+
+def test_arena_walk():
+    arena = source_parser.parse(source_lexer.lex(input_tokens.tokenize(
+        "= 1 + 2 ** 3 ** 4")), engine="arena").value
+    order = list(arena.walk())
+    kinds = [arena.kinds[index] for index in order]
+
+    assert len(arena) == 8
+    assert order[-1] == arena.root
+    assert [arena.get_value(index) for (index, kind) in zip(order, kinds)
+            if kind != node_arena.NodeKind.BINARY and kind != node_arena.NodeKind.EXPRESSION] == [1, 3, 4, 2]
+    assert [arena.get_operator(index).value for (index, kind) in zip(order, kinds)
+            if kind == node_arena.NodeKind.BINARY] == ["*", "*", "+"]
+
+
+def test_arena_deep_nesting():
+    depth = 3000
+    source = "= " + "(" * depth + "1 + 2 ** 3" + " )" * depth
+    result = source_parser.parse(source_lexer.lex(
+        input_tokens.tokenize_stream(source)), engine="arena")
+
+    assert result.type == source_parser.ParseResultType.SUCCESS
+    assert len(result.value) == 6
+    assert interpreter_operations.code_to_string(parser_node.compile_node(result.value)) == \
+        interpreter_operations.code_to_string(parser_node.compile_node(
+            source_parser.parse(source_lexer.lex(input_tokens.tokenize("= 1 + 2 ** 3"))).value))
@@ -0,0 +1,47 @@
+import basic_interpreter.input_tokens as input_tokens
+import basic_interpreter.source_lexer as source_lexer
+import interpreter_vm.interpreter_operations as interpreter_operations
+import interpreter_vm.optimizer as optimizer
+import interpreter_vm.parser_node as parser_node
+import interpreter_vm.source_parser as source_parser
+import stack_executer.stack_executer as stack_executer
+
+
+def parse(source: str) -> parser_node.ExecNode:
+    return source_parser.parse(source_lexer.lex(input_tokens.tokenize(source))).value
+
+
+def test_fold_to_one_push():
+    for (source, value) in [("= 5 + 7.3 * 3", 5 + 7.3 * 3), ("= 1 << 2", 4), ("= 7 / 2", 3.5),
+                            ("= (2 ** 3 ** 4) % 7 - 1 >> 1", (3 * 4 * 2) % 7 - 1 >> 1), ("= 8 % 3.5", 8 % 3.5)]:
+        code = parser_node.compile_node(optimizer.fold_constants(parse(source)))
+
+        assert len(code) == 2
+        assert isinstance(code[1], interpreter_operations.Return)
+        assert code[0].value == value and type(code[0].value) == type(value)
+
+
+def test_fold_keeps_runtime_errors():
+    for source in ["= 1 + 2 / 0", "= 1 + 2 + 3 % 0 * 4", "= 1.5 << 2", "= 1 << 2.5 + 1", "= 2 >> (1 - 3)",
+                   "= 3 * (1 / 0) ** 2", "= 1 << 100000", "= (4 - 4) / (4 - 4) + 1"]:
+        node = parse(source)
+        code = parser_node.compile_node(node)
+        folded = parser_node.compile_node(optimizer.fold_constants(node))
+
+        assert len(folded) > 2
+        assert len(folded) <= len(code)
+        assert stack_executer.execute_code(folded) == stack_executer.execute_code(code)
+
+    folded = parser_node.compile_node(
+        optimizer.fold_constants(parse("= 1 + 2 + 3 % 0 * 4")))
+
+    assert [str(operation) for operation in folded] == [
+        "Integer 3", "Integer 3", "Integer 0", "Modulus", "Integer 4", "Multiply", "Add", "Return"]
+
+
+def test_fold_deep_nesting():
+    depth = 3000
+    node = source_parser.parse(source_lexer.lex(input_tokens.tokenize_stream(
+        "= " + "(" * depth + "1 + 2 ** 3" + " )" * depth)), engine="pratt").value
+
+    assert str(optimizer.fold_constants(node)) == "Expresion(Numeric(Number(Integer(7))))"
@@ -0,0 +1,102 @@
+import os
+
+import pytest
+
+import basic_interpreter.input_tokens as input_tokens
+import basic_interpreter.source_lexer as source_lexer
+import interpreter_vm.parser_generator as parser_generator
+import interpreter_vm.source_parser as source_parser
+
+
+def test_generated_parser(tmp_path):
+    generated = parser_generator.load_parser(cache_dir=str(tmp_path))
+
+    for source in ["= 5 + 7.3 * 3", " =(2 ** 3 ** 4) % 7 - 1 >> 1", "=\n 12 *\t( 4 - 5 ) >> 1",
+                   "= 1 ", "= 1 < 2", "= (1", "= 1.", "= 2 ** * 3", "= 1 + 2 *"]:
+        descent = source_parser.parse(source_lexer.lex(
+            input_tokens.tokenize(source)), diagnostics=False)
+
+        assert (generated.parse(source) is not None) == (
+            descent.type == source_parser.ParseResultType.SUCCESS)
+
+    tree = generated.parse("= 1 + 2.5")
+
+    assert tree[0] == "Expresion" and tree[1:3] == (0, 9)
+    (equals, shift) = tree[3]
+    addition = shift[3][0]
+
+    assert equals == "=" and shift[0] == "BitwiseShift"
+
+    assert addition[0] == "AdditionOrSubtraction"
+    assert [node[0] for node in addition[3]] == [
+        "MultiplicationOrDivision", "AdditionOperator", "MultiplicationOrDivision"]
+    assert addition[3][1] == ("AdditionOperator", 4, 5, ["+"])
+
+
+def test_generated_actions(tmp_path):
+    for source in ["= 5 + 7.3 * 3", " =(2 ** 3 ** 4) % 7 - 1 >> 1", "=\n 12 *\t( 4 - 5 ) >> 1",
+                   "= 1 + 2 * 3 ** 4 << 5 - 6 % 7 >> 8 ** 9 + 1", "= 1 ", "= (1", "= 1."]:
+        descent = source_parser.parse(source_lexer.lex(
+            input_tokens.tokenize(source)), diagnostics=False)
+        value = parser_generator.parse_generated(source, str(tmp_path))
+
+        assert str(value) == str(descent.value)
+
+    generated = parser_generator.load_parser(cache_dir=str(tmp_path))
+    parse = generated.make_parser({"Integer": lambda text, start, end, children: int(text[start:end])})
+
+    node = parse("= 12")
+
+    # the rules without an action are still tuples, down to the integer
+    while isinstance(node, tuple):
+        node = node[3][-1]
+
+    assert node == 12
+
+
+def test_generated_engine(tmp_path, monkeypatch):
+    monkeypatch.setattr(parser_generator, "EXPRESSION_PARSERS", {parser_generator.DEFAULT_CACHE_DIR: parser_generator.load_parser(
+        cache_dir=str(tmp_path)).make_parser(parser_generator.EXPRESSION_ACTIONS)})
+
+    for source in ["= 2 * 3 ** 2 / 1.5", "= 1 << 2"]:
+        lexer_tokens = source_lexer.lex(input_tokens.tokenize_stream(source))
+        descent = source_parser.parse(lexer_tokens)
+        result = source_parser.parse(lexer_tokens, engine="generated")
+
+        assert result.type == source_parser.ParseResultType.SUCCESS
+        assert str(result.value) == str(descent.value)
+        assert result.next.index == descent.next.index
+
+    result = source_parser.parse(source_lexer.lex(
+        input_tokens.tokenize("= (1 + 2")), engine="generated")
+
+    assert result.type == source_parser.ParseResultType.FAILURE
+    assert "Expected ')' at 1:9" in [str(issue) for issue in result.start.get_last_issues()]
+
+
+def test_generated_parser_cache(tmp_path):
+    grammar = "Digits -> Digit+ ('.' Digit+)? $"
+    generated = parser_generator.load_parser(grammar, str(tmp_path))
+    path = os.path.join(str(tmp_path), f"grammar_{generated.GRAMMAR_HASH}.py")
+
+    assert generated.parse("12.5")[0:3] == ("Digits", 0, 4)
+    assert generated.parse("12.") is None
+    assert os.path.exists(path)
+
+    parser_generator.LOADED_PARSERS.clear()
+    modified = os.path.getmtime(path)
+
+    assert parser_generator.load_parser(grammar, str(tmp_path)).parse("7") is not None
+    assert os.path.getmtime(path) == modified
+
+    changed = parser_generator.load_parser(grammar.replace("+", "*"), str(tmp_path))
+
+    assert changed.GRAMMAR_HASH != generated.GRAMMAR_HASH
+    assert changed.parse(".") is not None
+    assert len(os.listdir(str(tmp_path))) >= 2
+
+
+def test_generator_errors():
+    for grammar in ["Start -> Missing", "Start -> Start '1'", "Start -> ('1'", "Start -> '1'\nStart -> '2'"]:
+        with pytest.raises(Exception):
+            parser_generator.generate_parser(grammar)
@@ -5,3 +5,18 @@ def test_getChar():
                       parser_operation.getChar("a"))
     
     assert isinstance(result.steps[0], parser_operation.TestCharacterOperation) and result.steps[0].target == "a"
+
+
+def test_takeRun():
+    indexes = parser_operation.createIndexes("123+4")
+    state = parser_operation.State()
+    state.callStack = parser_operation.CallStackItem(0, 0, None)
+    state.callStack.stepStack = parser_operation.StepStackItem(
+        0, indexes[0], None)
+
+    parser_operation.TakeRunOperation(
+        parser_operation.source_lexer.DIGIT, False).eval(state)
+
+    assert state.callStack.resultType == parser_operation.ResultType.Positive
+    assert state.callStack.locals._ == "123"
+    assert state.callStack.stepStack.index is indexes[3]
@@ -0,0 +1,132 @@
+import random
+
+import basic_interpreter.input_tokens as input_tokens
+import basic_interpreter.source_lexer as source_lexer
+import interpreter_vm.interpreter_operations as interpreter_operations
+import interpreter_vm.parser_node as parser_node
+import interpreter_vm.peephole as peephole
+import interpreter_vm.source_parser as source_parser
+import stack_executer.stack_executer as stack_executer
+
+
+def compile_source(source: str) -> list[stack_executer.Operation]:
+    return parser_node.compile_node(source_parser.parse(source_lexer.lex(input_tokens.tokenize(source))).value)
+
+
+def to_strings(code: list[stack_executer.Operation]) -> list[str]:
+    return [str(operation) for operation in code]
+
+
+def test_fold_constant_pushes():
+    optimizer = peephole.PeepholeOptimizer()
+    code = optimizer.optimize(compile_source("= 1 + 2 * 3 - 4.5"))
+
+    assert to_strings(code) == ["Float 2.5", "Return"]
+    assert optimizer.removed["constant folding"] == 6
+
+
+def test_fold_keeps_runtime_errors():
+    for source in ["= 1 / 0 + 2", "= 1.5 << 2", "= 3 % 0.0"]:
+        code = compile_source(source)
+        optimized = peephole.PeepholeOptimizer().optimize(code)
+
+        assert to_strings(optimized) == to_strings(code)
+
+
+def test_identities_follow_types():
+    Integer = interpreter_operations.Integer
+    Float = interpreter_operations.Float
+    code = [interpreter_operations.LoadTemporary(0), Integer(0), interpreter_operations.Add(), interpreter_operations.Return()]
+
+    # the type of a temporary that was never stored isn't known
+    assert len(peephole.IdentityElimination().run(code)) == 4
+
+    def run(value: stack_executer.Operation, operations: list[stack_executer.Operation]) -> list[str]:
+        code = [value, *operations, interpreter_operations.Return()]
+        return to_strings(peephole.IdentityElimination().run(code))[1:-1]
+
+    assert run(Integer(5), [Integer(0), interpreter_operations.Add(), Integer(1),
+                            interpreter_operations.Multiply(), Integer(0), interpreter_operations.LeftShift()]) == []
+    assert run(Integer(5), [Float(0.0), interpreter_operations.Add()]) == ["Float 0.0", "Add"]
+    assert run(Integer(5), [Integer(1), interpreter_operations.Divide()]) == ["Integer 1", "Divide"]
+    assert run(Float(5.0), [Integer(0), interpreter_operations.Add()]) == ["Integer 0", "Add"]
+    assert run(Float(5.0), [Float(-0.0), interpreter_operations.Subtract()]) == ["Float -0.0", "Subtract"]
+    assert run(Float(5.0), [Integer(0), interpreter_operations.Subtract(), Float(1.0),
+                            interpreter_operations.Divide(), Integer(1), interpreter_operations.Multiply()]) == []
+    assert run(Float(5.0), [Integer(0), interpreter_operations.LeftShift()]) == ["Integer 0", "LeftShift"]
+
+
+def test_combine_chains():
+    code = [interpreter_operations.LoadTemporary(0)]
+    code[0:0] = [interpreter_operations.Integer(3), interpreter_operations.StoreTemporary(0)]
+
+    for operation in [interpreter_operations.Add(), interpreter_operations.Subtract(), interpreter_operations.Add()]:
+        code += [interpreter_operations.Integer(4), operation]
+
+    code += [interpreter_operations.Integer(1), interpreter_operations.LeftShift(),
+             interpreter_operations.Integer(2), interpreter_operations.LeftShift(),
+             interpreter_operations.Integer(1), interpreter_operations.RightShift(), interpreter_operations.Return()]
+    optimizer = peephole.PeepholeOptimizer([peephole.ChainCombining()])
+    optimized = optimizer.optimize(code)
+
+    assert to_strings(optimized)[3:] == ["Integer 4", "Add", "Integer 3", "LeftShift",
+                                         "Integer 1", "RightShift", "Return"]
+    assert optimizer.removed == {"chain combining": 6}
+    assert stack_executer.execute_code(optimized) == stack_executer.execute_code(code)
+
+
+def test_custom_passes_and_report():
+    class DropReturn(peephole.PeepholePass):
+        name = "drop return"
+
+        def rewrite(self, output, tracker, operation):
+            return isinstance(operation, interpreter_operations.Return)
+
+    optimizer = peephole.PeepholeOptimizer([*peephole.get_default_passes(), DropReturn()])
+    code = optimizer.optimize(compile_source("= 1 + 2"))
+
+    assert to_strings(code) == ["Integer 3"]
+    assert optimizer.removed == {"constant folding": 2, "identity elimination": 0,
+                                 "chain combining": 0, "drop return": 1}
+    assert "drop return" in optimizer.report()
+
+
+def test_optimized_code_runs_the_same():
+    random.seed(25)
+    operators = ["+", "-", "*", "/", "%", "<<", ">>", "**"]
+    operands = ["0", "1", "2", "3", "0.0", "1.0", "2.5", "(2 + 3)", "(1 << 2)"]
+
+    for _ in range(300):
+        parts = [random.choice(operands)]
+
+        for _ in range(random.randint(1, 8)):
+            parts += [random.choice(operators), random.choice(operands)]
+
+        code = compile_source("= " + " ".join(parts))
+        optimized = peephole.PeepholeOptimizer().optimize(code)
+
+        assert len(optimized) <= len(code)
+        assert repr(stack_executer.execute_code(optimized)) == repr(stack_executer.execute_code(code))
+
+
+def test_rewritten_chains_run_the_same():
+    random.seed(24)
+    operations = [interpreter_operations.Add, interpreter_operations.Subtract, interpreter_operations.Multiply,
+                  interpreter_operations.Divide, interpreter_operations.Modulus, interpreter_operations.LeftShift,
+                  interpreter_operations.RightShift]
+    values = [0, 1, 2, 3, 0.0, -0.0, 1.0, 2.5]
+
+    for _ in range(500):
+        start = random.choice([interpreter_operations.Integer(7), interpreter_operations.Float(-0.0),
+                               interpreter_operations.Float(1.5)])
+        # a value the passes can't see, though its type is known
+        code = [start, interpreter_operations.StoreTemporary(0), interpreter_operations.LoadTemporary(0),
+                interpreter_operations.Add()]
+
+        for _ in range(random.randint(1, 10)):
+            code += [peephole.make_push(random.choice(values)), random.choice(operations)()]
+
+        code.append(interpreter_operations.Return())
+        optimized = peephole.PeepholeOptimizer().optimize(code)
+
+        assert repr(stack_executer.execute_code(optimized)) == repr(stack_executer.execute_code(code))
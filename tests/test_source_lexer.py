@@ -0,0 +1,42 @@
+import basic_interpreter.input_tokens as input_tokens
+import basic_interpreter.source_lexer as source_lexer
+
+
+def test_character_classes_are_shared():
+    lexer_tokens = source_lexer.lex(input_tokens.tokenize("1 1"))
+
+    assert lexer_tokens[0].character_class is lexer_tokens[2].character_class
+    assert lexer_tokens[0].digit and not lexer_tokens[0].whitespace
+    assert lexer_tokens[1].whitespace
+    assert lexer_tokens[3].mask == 0
+
+
+def test_options_mask():
+    assert source_lexer.get_options_mask(('+', '-')) == source_lexer.PLUS | source_lexer.MINUS
+    assert source_lexer.get_options_mask(('+', '1')) is None
+
+
+def test_lex_tokens():
+    tokens = source_lexer.lex_tokens("= 12 << 3.5**(4)")
+
+    assert [str(token) for token in tokens] == [
+        "token(0:=)", "token(2:12)", "token(5:<<)", "token(8:3.5)", "token(11:**)",
+        "token(13:()", "token(14:4)", "token(15:))", "token(16:)"]
+    assert tokens[1].value == 12 and tokens[3].value == 3.5
+    assert tokens[2].left_angle_bracket and tokens[4].multiply
+    assert tokens[-1].kind == source_lexer.TokenKind.END
+    assert [str(token) for token in source_lexer.lex_tokens(b"=1>>2 $")][-2:] == [
+        "token(6:$)", "token(7:)"]
+
+
+def test_index_whitespace_runs():
+    runs = source_lexer.index_whitespace_runs("= 1  +\n\t2 ", 1)
+
+    assert (list(runs.starts), list(runs.ends)) == ([1, 3, 6, 9], [2, 5, 8, 10])
+    assert [runs.get_run_end(offset) for offset in range(11)] == [
+        None, 2, None, 5, 5, None, 8, 8, None, 10, None]
+
+    runs = source_lexer.index_whitespace_runs(memoryview(b" =1" + b" " * 6 + b"+ 2"))
+
+    assert (list(runs.starts), list(runs.ends)) == ([3], [9])
+    assert runs.get_run_end(0) is None and runs.get_run_end(4) == 9
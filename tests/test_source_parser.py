@@ -0,0 +1,207 @@
+import gc
+from enum import Enum
+
+import basic_interpreter.input_tokens as input_tokens
+import basic_interpreter.source_lexer as source_lexer
+import interpreter_vm.interpreter_operations as interpreter_operations
+import interpreter_vm.parser_node as parser_node
+import interpreter_vm.source_parser as source_parser
+
+
+def test_parse_token_engine():
+    for source in ["= 5 + 7.3 * 3", "= 1 << 2", " =(2 ** 3 ** 4) % 7 - 1 >> 1"]:
+        lexer_tokens = source_lexer.lex(input_tokens.tokenize_stream(source))
+        descent = source_parser.parse(lexer_tokens)
+        tokens = source_parser.parse(lexer_tokens, engine="tokens")
+
+        assert tokens.type == source_parser.ParseResultType.SUCCESS
+        assert interpreter_operations.code_to_string(parser_node.compile_node(tokens.value)) == \
+            interpreter_operations.code_to_string(
+                parser_node.compile_node(descent.value))
+
+    for source in ["= 1 ", "= 1 < 2", "= (1"]:
+        result = source_parser.parse(source_lexer.lex(
+            input_tokens.tokenize(source)), engine="tokens")
+
+        assert result.type == source_parser.ParseResultType.FAILURE
+
+
+def test_parse_numbers():
+    digits = "9" * 500
+    result = source_parser.parse(source_lexer.lex(
+        input_tokens.tokenize_stream(f"= {digits} + {digits}.25 + 7")))
+
+    assert result.type == source_parser.ParseResultType.SUCCESS
+    assert f"Integer({digits})" in str(result.value)
+    assert f"Float({float(digits + '.25')})" in str(result.value)
+
+    issues = source_parser.ParseIssues()
+    result = source_parser.parse_expresion(source_parser.ParseState(
+        source_lexer.lex(input_tokens.tokenize("= 1.")), issues=issues))
+
+    assert result.type == source_parser.ParseResultType.FAILURE
+    assert str(result.start.get_last_issues()[0]) == "Expected one or more digits at 1:5"
+
+
+def check_engine(engine: str):
+    sources = ["= 5 + 7.3 * 3", "= 1 << 2", " =(2 ** 3 ** 4) % 7 - 1 >> 1",
+               "=\n 12 *\t( 4 - 5 ) >> 1", "= 2 * 3 ** 2 / 1.5",
+               "= 1 + 2 * 3 ** 4 << 5 - 6 % 7 >> 8 ** 9 + 1"]
+
+    for source in sources:
+        for lexer_tokens in [source_lexer.lex(input_tokens.tokenize(source)),
+                             source_lexer.lex(input_tokens.tokenize_stream(source.encode()))]:
+            descent = source_parser.parse(lexer_tokens)
+            result = source_parser.parse(lexer_tokens, engine=engine)
+
+            assert result.type == source_parser.ParseResultType.SUCCESS
+            assert str(result.value) == str(descent.value)
+            assert result.next.index == descent.next.index
+
+    for source in ["= 1 ", "= 1 < 2", "= (1", "= 1.", "= 2 ** * 3", "= 1 + 2 *"]:
+        result = source_parser.parse(source_lexer.lex(
+            input_tokens.tokenize(source)), engine=engine)
+
+        assert result.type == source_parser.ParseResultType.FAILURE
+
+
+def test_parse_cursor_engine():
+    check_engine("cursor")
+
+
+def test_parse_pratt_engine():
+    check_engine("pratt")
+
+
+def test_parse_diagnostics():
+    lexer_tokens = source_lexer.lex(input_tokens.tokenize("= (1 + 2"))
+    first = source_parser.parse(lexer_tokens)
+    second = source_parser.parse(lexer_tokens, engine="cursor")
+
+    assert first.start.issues is not second.start.issues
+    assert [str(issue) for issue in first.start.get_last_issues()] == \
+        [str(issue) for issue in second.start.get_last_issues()]
+    assert all(issue.start.index == 8 for issue in first.start.get_last_issues())
+    assert "Expected ')' at 1:9" in [str(issue) for issue in first.start.get_last_issues()]
+
+    for engine in ["descent", "cursor"]:
+        result = source_parser.parse(
+            lexer_tokens, engine=engine, diagnostics=False)
+
+        assert result.type == source_parser.ParseResultType.FAILURE
+        assert result.start.get_last_issues() == []
+
+
+def test_parse_deep_nesting():
+    depth = 3000
+    source = "= " + "(" * depth + "1 + 2 ** 3" + " )" * depth
+    result = source_parser.parse(source_lexer.lex(
+        input_tokens.tokenize_stream(source)), engine="pratt")
+
+    assert result.type == source_parser.ParseResultType.SUCCESS
+    assert str(result.value).count("Numeric((") == depth
+    assert interpreter_operations.code_to_string(parser_node.compile_node(result.value)) == \
+        interpreter_operations.code_to_string(parser_node.compile_node(
+            source_parser.parse(source_lexer.lex(input_tokens.tokenize("= 1 + 2 ** 3"))).value))
+
+    result = source_parser.parse(source_lexer.lex(input_tokens.tokenize_stream(
+        "= " + "(" * depth + "1")), engine="pratt", diagnostics=False)
+
+    assert result.type == source_parser.ParseResultType.FAILURE
+
+
+def test_parse_deep_nesting_issues():
+    depth = 5000
+    source = "= " + "(" * depth + "1" + ")" * depth
+
+    for engine in ["descent", "cursor"]:
+        result = source_parser.parse(source_lexer.lex(
+            input_tokens.tokenize_stream(source)), engine=engine)
+
+        assert result.type == source_parser.ParseResultType.SUCCESS
+        assert [result.success for result in source_parser.parse_batch([source])] == [True]
+
+    for engine in ["descent", "pratt", "cursor"]:
+        result = source_parser.parse(source_lexer.lex(
+            input_tokens.tokenize_stream(source[:-1])), engine=engine)
+        issues = [str(issue) for issue in result.start.get_last_issues()]
+
+        assert result.type == source_parser.ParseResultType.FAILURE
+        assert f"Expected ')' at 1:{len(source)}" in issues
+        assert not any("recursion" in issue for issue in issues)
+
+    result = source_parser.compile_source(source_lexer.lex(
+        input_tokens.tokenize_stream(source[:-1])))
+
+    assert f"Expected ')' at 1:{len(source)}" in [
+        str(issue) for issue in result.start.get_last_issues()]
+
+
+def test_parse_batch():
+    lines = ["= 1 + 2\n", "  \n", "= 3 *\n", "= (4)\r\n", "= 5 )\n", "=6"]
+
+    for engine in ["descent", "pratt"]:
+        results = list(source_parser.parse_batch(lines, engine=engine))
+
+        assert [result.line_number for result in results] == [1, 3, 4, 5, 6]
+        assert [result.success for result in results] == [
+            True, False, True, False, True]
+        assert str(results[0].value) == str(source_parser.parse(
+            source_lexer.lex(input_tokens.tokenize("= 1 + 2"))).value)
+        assert all(str(issue).endswith(" at 3:6")
+                   for issue in results[1].get_issues())
+        assert "Expected '+' or '-' at 5:5" in [
+            str(issue) for issue in results[3].get_issues()]
+
+    results = list(source_parser.parse_batch(
+        [line.encode() for line in lines], diagnostics=False))
+
+    assert [result.success for result in results] == [
+        True, False, True, False, True]
+    assert results[1].get_issues() == []
+
+
+def test_compile_source():
+    for source in ["= 5 + 7.3 * 3", " =(2 ** 3 ** 4) % 7 - 1 >> 1", "= 2 ** (3 + 1) ** 2 * 4 ** 5 << 1",
+                   "=\n 12 *\t( 4 - 5 ) >> 1", "= ((1 ** 2) ** (3 ** 4)) ** 5"]:
+        lexer_tokens = source_lexer.lex(input_tokens.tokenize_stream(source))
+        result = source_parser.compile_source(lexer_tokens)
+
+        assert result.type == source_parser.ParseResultType.SUCCESS
+        assert interpreter_operations.code_to_string(result.value) == interpreter_operations.code_to_string(
+            parser_node.compile_node(source_parser.parse(lexer_tokens).value))
+
+    result = source_parser.compile_source(
+        source_lexer.lex(input_tokens.tokenize("= 2 ** (3 +")))
+
+    assert result.type == source_parser.ParseResultType.FAILURE
+    assert len(result.start.get_last_issues()) > 0
+
+
+def get_reachable(value) -> list:
+    """
+    The objects the value refers to, directly or not, leaving out classes and enum members
+    """
+    seen = {id(value): value}
+    stack = [value]
+
+    while len(stack) > 0:
+        for item in gc.get_referents(stack.pop()):
+            if id(item) not in seen and not isinstance(item, (type, Enum)):
+                seen[id(item)] = item
+                stack.append(item)
+
+    return list(seen.values())
+
+
+def test_ast_drops_tokens():
+    for engine in ["descent", "cursor", "pratt"]:
+        value = source_parser.parse(source_lexer.lex(
+            input_tokens.tokenize("= 1 + 2 ** 3 << 4")), engine=engine).value
+
+        assert not any(isinstance(item, (source_lexer.LexerToken, input_tokens.InputToken))
+                       for item in get_reachable(value))
+        assert "token(4:+)(" in str(value)
+        assert "token(8:*)(" in str(value) and "token(13:<)(" in str(value)
+        assert not hasattr(value, "__dict__")
+        assert not hasattr(value.value.start.rest[0], "__dict__")